@@ -0,0 +1,31 @@
+import argparse
+
+import smartcity
+from smartcity import logger
+from smartcity.air_quality.backfill import WINDOW_DAYS, run_backfill
+
+# Example:
+#   python examples/backfill.py --start 2025-06-01 --end 2025-09-01 --workers 4
+# Interrupt it at any time: re-running the same command resumes from the checkpoint.
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load OpenAQ history into Supabase.")
+    parser.add_argument("--start", required=True, help="Start date (inclusive), e.g. 2025-06-01")
+    parser.add_argument("--end", required=True, help="End date (exclusive), e.g. 2025-09-01")
+    parser.add_argument("--window-days", type=int, default=WINDOW_DAYS)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=60, help="OpenAQ requests per minute")
+    parser.add_argument("--checkpoint", default="", help="Checkpoint file (default: under .cache/)")
+    args = parser.parse_args()
+
+    logger.info(f"{smartcity.__version__ = }")
+    summary = run_backfill(
+        start_date=args.start,
+        end_date=args.end,
+        window_days=args.window_days,
+        max_workers=args.workers,
+        requests_per_minute=args.rpm,
+        checkpoint_path=args.checkpoint,
+    )
+    logger.info(f"Summary: {summary}")
@@ -1,16 +1,38 @@
+from datetime import datetime
+
 from prefect_flows.task import (
     fetch_openaq,
     insert_openaq_data,
+    stream_openaq,
+    detect_openaq_anomalies,
+    index_insights,
+    archive_table,
     cleanup_table,
     upload_logs,
+    backfill_openaq,
+    plan_openaq_shards,
+    ingest_shard,
+    merge_shards,
+    fetch_weather_data,
+    insert_weather_data,
+    cleanup_weather,
+    publish_version,
 )
 import smartcity
+from smartcity.air_quality.rate_limit import OPENAQ_REQUESTS_PER_MINUTE
+from smartcity.air_quality.shards import Shard, shard_request_budget
+from smartcity.config import TABLE_NAME_WEATHER
+from smartcity.weather.open_meteo import UNIQUE_WEATHER
+from smartcity.utils import get_dates_range
 
-from prefect import flow, task, get_run_logger
+from prefect import flow, task, get_run_logger, runtime, unmapped
+from prefect.deployments import run_deployment
+from prefect.flow_runs import wait_for_flow_run
+from prefect.utilities.asyncutils import run_coro_as_sync
 
 
 @flow(name="SmartCity OpenAQ ETL", log_prints=True)
-def workflow_openaq():
+def workflow_openaq(streaming: bool = False):
     """
     Prefect Flow: SmartCity OpenAQ ETL
 
@@ -19,13 +41,23 @@ def workflow_openaq():
 
     Steps:
         1. **Fetch data** — Retrieve the latest air quality measurements from OpenAQ.
-        2. **Upsert data** — Insert or update measurements in the Supabase table.
-        3. **Cleanup old records** — Delete data older than 30 days to keep storage optimized.
-        4. **Upload logs** — Push local log files to Supabase Storage for audit and traceability.
+        2. **Upsert data** — Insert or update measurements in the Supabase table, then
+           update the per-sensor anomaly state and flag spikes / stuck sensors.
+           Daily summaries are appended to the on-disk insight index (RAG).
+        3. **Cleanup old records** — Export the expired days as Parquet (local disk or
+           `SMARTCITY_ARCHIVE_BUCKET`), then delete them from the table.
+        4. **Publish data version** — Bump the table's marker in `smartcity_data_versions`,
+           so the dashboard reloads its cached copy in the background.
+        5. **Upload logs** — Push local log files to Supabase Storage for audit and traceability.
 
     This flow is designed to run daily via Prefect Cloud (scheduled or automated), 
     ensuring the SmartCity data lake remains up-to-date and clean.
 
+    Args:
+        streaming (bool): Steps 1 and 2 run as one streaming task: pages flow from
+            OpenAQ to the table in memory-bounded batches (`SMARTCITY_STREAM_MEMORY_MB`),
+            so the flow fits on a small worker whatever the number of sensors.
+
     Returns:
         None
 
@@ -38,19 +70,204 @@ def workflow_openaq():
     logger.info("Starting SmartCity OpenAQ ETL flow ...")
     logger.info(f">>> {smartcity.__version__ =  }")
 
-    df = fetch_openaq()
-    logger.info(f"> Air quality measurements Fetched !")
-    if df.empty:
-        logger.warning("No data fetched from OpenAQ.")
-        return
+    if streaming:
+        summary = stream_openaq()
+        logger.info(f"> Air quality measurements streamed: {summary}")
+        if not summary["rows"]:
+            logger.warning("No data fetched from OpenAQ.")
+            return
+    else:
+        df = fetch_openaq()
+        logger.info(f"> Air quality measurements Fetched !")
+        if df.empty:
+            logger.warning("No data fetched from OpenAQ.")
+            return
+
+        df = insert_openaq_data(df)
+        logger.info(f"> Air quality measurements Upserted successfully.")
+
+        # Quarantined rows must not feed the per-sensor anomaly state
+        anomalies = detect_openaq_anomalies(df)
+        logger.info(f"> Anomaly detection done: {anomalies} anomalies flagged.")
+
+    indexed = index_insights(days=2)
+    logger.info(f"> Insight index: {indexed} daily summaries appended.")
 
-    insert_openaq_data(df)
-    logger.info(f"> Air quality measurements Upserted successfully.")
+    archived = archive_table(days=61)
+    logger.info(f"> Expired days archived: {archived}")
 
     cleanup_table(days=61)
     logger.info(f"> Old measurements (< 30 days) deleted successfully.")
 
+    version = publish_version()
+    logger.info(f"> Data version published: {version}")
+
     upload_logs()
     logger.info(f"> Logs uploaded to Supabase.")
 
     logger.info("SmartCity OpenAQ ETL flow completed.")
+
+
+@flow(name="SmartCity Weather ETL", log_prints=True)
+def workflow_weather(past_days: int = 2, forecast_days: int = 2):
+    """
+    Prefect Flow: SmartCity Weather ETL
+
+    Fetches hourly weather (recent hours and forecasts) of every sensor location
+    from Open-Meteo, a hundred coordinates per request, upserts it into
+    `weather_hourly` and applies the same archive + 61-day retention as the measurements.
+    Forecast hours are overwritten by each run.
+    """
+    logger = get_run_logger()
+    logger.info("Starting SmartCity Weather ETL flow ...")
+
+    df = fetch_weather_data(past_days=past_days, forecast_days=forecast_days)
+    if df.empty:
+        logger.warning("No data fetched from Open-Meteo.")
+        return
+
+    insert_weather_data(df)
+    logger.info(f"> Weather data upserted: {len(df)} rows.")
+
+    archive_table(days=61, table_name=TABLE_NAME_WEATHER, key=UNIQUE_WEATHER)
+    cleanup_weather(days=61)
+    publish_version(TABLE_NAME_WEATHER)
+    upload_logs()
+    logger.info("SmartCity Weather ETL flow completed.")
+
+
+@flow(name="SmartCity OpenAQ Backfill", log_prints=True)
+def workflow_openaq_backfill(
+    start_date: str, end_date: str, window_days: int = 7, max_workers: int = 4
+):
+    """
+    Prefect Flow: SmartCity OpenAQ Backfill
+
+    Loads OpenAQ history between `start_date` and `end_date` for every sensor
+    of the location catalogue. The range is split into sensor × window units
+    fetched in parallel under a shared rate limit and upserted in chunks.
+
+    Completed units are checkpointed, so a retry or a new run with the same
+    dates resumes where the previous one stopped.
+    """
+    logger = get_run_logger()
+    logger.info(f"Starting SmartCity OpenAQ backfill {start_date} → {end_date} ...")
+
+    summary = backfill_openaq(
+        start_date=start_date,
+        end_date=end_date,
+        window_days=window_days,
+        max_workers=max_workers,
+    )
+    logger.info(f"> Backfill summary: {summary}")
+
+    publish_version()
+    upload_logs()
+    logger.info(f"> Logs uploaded to Supabase.")
+
+
+@flow(name="SmartCity OpenAQ Shard", log_prints=True)
+def workflow_openaq_shard(
+    run_id: str,
+    shard_id: str,
+    sensor_ids: list,
+    date_from: str,
+    date_to: str,
+    requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE,
+) -> dict:
+    """
+    Prefect Flow: one shard of a sharded OpenAQ ingestion.
+
+    Deployed on a work pool, each shard of `workflow_openaq_sharded` runs as its
+    own flow run on any available worker, with its share of the API key's
+    request budget (`requests_per_minute`).
+    """
+    shard = Shard(shard_id, tuple(sensor_ids), ())
+    return ingest_shard(run_id, shard, date_from, date_to, requests_per_minute)
+
+
+@flow(name="SmartCity OpenAQ Sharded ETL", log_prints=True)
+def workflow_openaq_sharded(
+    by: str = "locality",
+    max_sensors: int = 200,
+    history_days: int = 7,
+    shard_deployment: str = "",
+    concurrency: int = 0,
+):
+    """
+    Prefect Flow: SmartCity OpenAQ ETL, sharded by city / location group.
+
+    All shards share one OpenAQ API key, whose limit (`OPENAQ_REQUESTS_PER_MINUTE`)
+    is split evenly between them: each gets 1/`concurrency` of it. By default
+    `concurrency` is the number of shards, as every shard is scheduled at once;
+    set it to the number of shards the work pool (or task runner) actually runs
+    together to give each a larger share. Setting it lower than that exceeds
+    the key's limit.
+
+    Steps:
+        1. **Plan** — Split the location catalogue into shards of at most
+           `max_sensors` sensors, grouped by `by` (see `plan_shards`).
+        2. **Ingest shards** — Each shard streams its sensors' measurements and
+           updates their anomaly state, recording its state in `openaq_ingestion_shards`.
+           With `shard_deployment` (a deployment of `workflow_openaq_shard`, e.g.
+           "SmartCity OpenAQ Shard/openaq-shard"), shards run as separate flow runs
+           on the deployment's work pool, spreading parsing and upserts over the
+           workers; otherwise they run as concurrent tasks of this flow. Either
+           way the OpenAQ request budget is that of one key, split between shards.
+        3. **Merge** — Check every shard is done and sum their counts; failed
+           shards are listed and the flow fails.
+        4. **Cleanup old records**, **Publish data version** and **Upload logs**, once
+           for the whole run.
+    """
+    logger = get_run_logger()
+    run_id = str(runtime.flow_run.id or datetime.now().strftime("%Y%m%dT%H%M%S"))
+    date_from, date_to = get_dates_range(history_days=history_days)
+
+    shards = plan_openaq_shards(by=by, max_sensors=max_sensors)
+    requests_per_minute = shard_request_budget(min(concurrency or len(shards), len(shards)))
+    logger.info(
+        f"Run '{run_id}': {len(shards)} shards from '{date_from}' to '{date_to}' "
+        f"({requests_per_minute:.1f} OpenAQ requests/min each)."
+    )
+
+    if shard_deployment:
+        flow_runs = [
+            run_deployment(
+                name=shard_deployment,
+                parameters={
+                    "run_id": run_id,
+                    "shard_id": shard.shard_id,
+                    "sensor_ids": list(shard.sensor_ids),
+                    "date_from": date_from,
+                    "date_to": date_to,
+                    "requests_per_minute": requests_per_minute,
+                },
+                timeout=0,  # do not wait: every shard is scheduled at once
+            )
+            for shard in shards
+        ]
+        for flow_run in flow_runs:
+            # wait_for_flow_run is async-only: run it to completion from this sync flow
+            final = run_coro_as_sync(wait_for_flow_run(flow_run.id, timeout=None))
+            if final is None or final.state is None or not final.state.is_completed():
+                state = final.state.name if final is not None and final.state else "unknown"
+                logger.warning(f"Shard flow run '{flow_run.name}' ended in state '{state}'.")
+    else:
+        futures = ingest_shard.map(
+            unmapped(run_id),
+            shards,
+            unmapped(date_from),
+            unmapped(date_to),
+            unmapped(requests_per_minute),
+        )
+        for future in futures:
+            future.wait()
+
+    totals = merge_shards(run_id, [shard.shard_id for shard in shards])
+    logger.info(f"> Shards merged: {totals}")
+
+    archive_table(days=61)
+    cleanup_table(days=61)
+    publish_version()
+    upload_logs()
+    logger.info("SmartCity OpenAQ sharded ETL flow completed.")
@@ -2,11 +2,28 @@ import pandas as pd
 
 from smartcity.database import (
     delete_old_measurements,
+    publish_data_version,
+    query_cache,
+    read_daily_stats,
     upload_logs_to_supabase,
     upsert_measurements,
     TABLE_NAME_MEASUREMENTS,
+    UNIQUE_MEASUREMENT,
 )
 from smartcity.air_quality.openaq_api import fetch_openaq_data
+from smartcity.air_quality.anomalies import AnomalyDetector, detect_anomalies
+from smartcity.air_quality.backfill import run_backfill
+from smartcity.air_quality.locations import get_location_catalogue
+from smartcity.air_quality.rate_limit import OPENAQ_REQUESTS_PER_MINUTE
+from smartcity.air_quality.shards import Shard, merge_shard_states, plan_shards, run_shard
+from smartcity.air_quality.streaming import stream_openaq_data
+from smartcity.air_quality.validation import validate_and_quarantine
+from smartcity.archive import archive_expired_days
+from smartcity.insights import index_daily_insights
+from smartcity.profiling import profiler, upload_profiles
+from smartcity.weather.open_meteo import delete_old_weather, fetch_weather, upsert_weather
+from smartcity.utils import get_dates_range
+from smartcity import logger
 
 from prefect import task
 
@@ -19,8 +36,87 @@ def fetch_openaq() -> pd.DataFrame:
 
 
 @task(retries=3, retry_delay_seconds=10)
-def insert_openaq_data(df: pd.DataFrame):
-    upsert_measurements(df)
+def insert_openaq_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Upsert the valid rows and return them (the rows later steps may use)"""
+    # Invalid rows are quarantined rather than failing (and retrying) the whole upsert
+    df = validate_and_quarantine(df)
+    upsert_measurements(df, chunk_size=1000, return_records=False)
+    return df
+
+
+@task(retries=3, retry_delay_seconds=10)
+def stream_openaq(history_days: int = 7) -> dict:
+    """Fetch and upsert OpenAQ data page by page, within a fixed memory budget"""
+    date_from, date_to = get_dates_range(history_days=history_days)
+    sensor_ids = get_location_catalogue().sensor_ids()
+    detector = AnomalyDetector.load()
+    summary = stream_openaq_data(
+        sensor_ids, date_from=date_from, date_to=date_to, on_batch=detector.update
+    )
+    # A failed anomaly write must not make the (already loaded) stream retry
+    try:
+        summary["anomalies"] = detector.save()
+    except Exception as e:
+        logger.error(f"Anomaly detection results could not be saved: {e}")
+    return summary
+
+
+@task(retries=2, retry_delay_seconds=10)
+def detect_openaq_anomalies(df: pd.DataFrame) -> int:
+    """Update the per-sensor anomaly state with the new rows and flag anomalies"""
+    return detect_anomalies(df)
+
+
+@task(retries=2, retry_delay_seconds=10)
+def index_insights(days: int = 2) -> int:
+    """Append the daily summaries of the last complete days to the on-disk insight index"""
+    first_day, end_day = get_dates_range(history_days=days)  # end_day: today, incomplete
+    # One extra day so the first summary has a day-over-day trend
+    context_day, _ = get_dates_range(end_date=end_day, history_days=days + 1)
+    stats = read_daily_stats(start_date=context_day, end_date=end_day)
+    return index_daily_insights(
+        stats, get_location_catalogue().data, first_day=first_day, end_day=end_day
+    )
+
+
+@task
+def plan_openaq_shards(by: str = "locality", max_sensors: int = 200) -> list:
+    """Split the location catalogue into shards of sensors"""
+    return plan_shards(get_location_catalogue().data, by=by, max_sensors=max_sensors)
+
+
+@task(retries=2, retry_delay_seconds=30)
+def ingest_shard(
+    run_id: str,
+    shard: Shard,
+    date_from: str,
+    date_to: str,
+    requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE,
+) -> dict:
+    """Stream one shard's measurements; the shard state is recorded in Supabase"""
+    return run_shard(
+        run_id,
+        shard,
+        date_from=date_from,
+        date_to=date_to,
+        requests_per_minute=requests_per_minute,
+    )
+
+
+@task
+def merge_shards(run_id: str, shard_ids: list) -> dict:
+    """Check every shard of the run is done and sum their counts"""
+    return merge_shard_states(run_id, shard_ids)
+
+
+@task(retries=3, retry_delay_seconds=10)
+def archive_table(
+    days: int = 61,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    key: str = UNIQUE_MEASUREMENT,
+) -> list:
+    """Export the days the retention is about to delete as Parquet partitions"""
+    return archive_expired_days(days=days, table_name=table_name, key=key)
 
 
 @task(retries=3, retry_delay_seconds=10)
@@ -28,6 +124,50 @@ def cleanup_table(days: int = 30):
     delete_old_measurements(days=days, table_name=TABLE_NAME_MEASUREMENTS)
 
 
+@task(retries=3, retry_delay_seconds=10)
+def fetch_weather_data(past_days: int = 2, forecast_days: int = 2) -> pd.DataFrame:
+    """Fetch hourly weather of every sensor location from Open-Meteo, in batched requests"""
+    return fetch_weather(
+        get_location_catalogue().data, past_days=past_days, forecast_days=forecast_days
+    )
+
+
+@task(retries=3, retry_delay_seconds=10)
+def insert_weather_data(df: pd.DataFrame):
+    upsert_weather(df, chunk_size=1000)
+
+
+@task(retries=3, retry_delay_seconds=10)
+def cleanup_weather(days: int = 61):
+    delete_old_weather(days=days)
+
+
+@task(retries=3, retry_delay_seconds=10)
+def publish_version(dataset: str = TABLE_NAME_MEASUREMENTS) -> str:
+    """Tells the dashboard `dataset` changed, so it reloads its cached copy."""
+    return publish_data_version(dataset)
+
+
 @task(retries=2, retry_delay_seconds=15)
 def upload_logs():
+    logger.info(f"Query cache stats: {query_cache.stats()}")
+    if profiler.enabled:
+        logger.info(f"Hot path timings: {profiler.timing_summary()}")
+        upload_profiles()
     upload_logs_to_supabase(remote_name="workflow_openaq.log")
+
+
+@task(retries=2, retry_delay_seconds=60)
+def backfill_openaq(
+    start_date: str, end_date: str, window_days: int = 7, max_workers: int = 4
+) -> dict:
+    """Load OpenAQ history; retries resume from the checkpoint."""
+    summary = run_backfill(
+        start_date=start_date,
+        end_date=end_date,
+        window_days=window_days,
+        max_workers=max_workers,
+    )
+    if summary["failed"]:
+        raise RuntimeError(f"{summary['failed']} backfill units failed.")
+    return summary
@@ -1,6 +1,12 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
 # --- Versioning ---
 __major__ = 0
@@ -17,22 +23,118 @@ LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE_PATH = os.path.join(LOG_DIR, "smartcity.log")
 
+LOG_JSON = os.getenv("SMARTCITY_LOG_JSON", "").lower() in ("1", "true", "yes")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s - %(funcName)s - %(message)s"
+
+
+class LazyMessage:
+    """
+    Defers an expensive log argument until a record passes the level check.
+
+    Example:
+        >>> logger.debug("Missing sensors: %s", LazyMessage(lambda: set(a) - set(b)))
+    """
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+
+class _JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line (structured logs)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler that resolves the message on the calling thread.
+
+    `msg % args` (and any `LazyMessage`) must be evaluated before the record
+    crosses threads, as callers may mutate the arguments right after logging.
+    Only records that passed the level check get here, so a disabled
+    `LazyMessage` is still never evaluated; formatting the line (timestamp,
+    JSON) and the I/O are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+
+class _LogListener(QueueListener):
+    """QueueListener that acknowledges the flush markers put by `flush_logs`."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        flushed = getattr(record, "flushed", None)
+        if flushed is None:
+            super().handle(record)
+            return
+        for handler in self.handlers:
+            handler.flush()
+        flushed.set()
+
+
+_log_listener = None
+
+
 def _configure_base_logger(name="smartcity"):
+    global _log_listener
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     if not logger.handlers:
         console_handler = logging.StreamHandler(sys.stdout)
-        file_handler = logging.FileHandler(LOG_FILE_PATH, mode="w", encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s - %(funcName)s - %(message)s"
-        )
+        # Truncate once, then append: a handler closed by a later logging
+        # reconfiguration (e.g. Prefect's dictConfig) reopens on the next record.
+        open(LOG_FILE_PATH, "w", encoding="utf-8").close()
+        file_handler = logging.FileHandler(LOG_FILE_PATH, mode="a", encoding="utf-8")
+        formatter = _JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT)
         console_handler.setFormatter(formatter)
         file_handler.setFormatter(formatter)
 
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        # Handlers run on the listener thread: callers only pay for a queue put.
+        log_queue = queue.SimpleQueue()
+        _log_listener = _LogListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
+        logger.addHandler(_QueueHandler(log_queue))
     logger.propagate = False
     return logger
 
 
-logger = _configure_base_logger()
\ No newline at end of file
+def flush_logs(timeout: float = 10.0) -> None:
+    """
+    Block until every record queued so far has been written (e.g. before
+    uploading the log file). Safe to call from any thread.
+
+    Args:
+        timeout (float): Maximum wait, in seconds (the listener may be stopped at exit).
+    """
+    if _log_listener is None:
+        return
+    marker = logging.makeLogRecord({"flushed": threading.Event()})
+    _log_listener.queue.put(marker)  # FIFO: handled after every earlier record
+    marker.flushed.wait(timeout)
+
+
+logger = _configure_base_logger()
@@ -0,0 +1,260 @@
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import TABLE_NAME_ANOMALIES, TABLE_NAME_ANOMALY_STATE
+from smartcity.database import is_missing_table, read_db, read_db_where, upsert_rows
+
+SERIES_KEY = ["sensor_id", "parameter_name"]
+STATE_COLUMNS = ["count", "mean", "var", "last_value", "last_datetime", "stuck_run"]
+ANOMALY_KEY = "sensor_id,parameter_name,datetime_from,kind"
+
+EWMA_SPAN = 24  # hours
+Z_THRESHOLD = 4.0
+WARMUP = 24  # values before z-scores are trusted
+STUCK_REPEATS = 11  # 12 identical consecutive values
+
+
+class AnomalyDetector:
+    """
+    Online anomaly detector, one compact state per sensor and parameter.
+
+    Each series keeps an exponentially weighted mean and variance (a plain
+    running mean/variance over its first values, so the warm-up is not biased
+    towards zero variance), its last
+    value and timestamp, and the length of its current run of identical values.
+    `update()` only reads rows newer than a series' last timestamp, so its cost
+    depends on the new rows, not on the history. Rows are processed step by
+    step in time order, all series at once, and flagged as:
+
+    - "spike": |z| >= `z_threshold` against the EWMA mean/std before the value;
+    - "stuck": the same value repeated `stuck_repeats` + 1 times in a row.
+
+    Args:
+        state (pd.DataFrame, optional): Saved state (`SERIES_KEY` + `STATE_COLUMNS`).
+        span (float): EWMA span, in values (hours).
+        z_threshold (float): Spike threshold.
+        warmup (int): Values a series needs before spikes are flagged.
+        stuck_repeats (int): Identical repeats flagged as a stuck sensor.
+    """
+
+    def __init__(
+        self,
+        state: Optional[pd.DataFrame] = None,
+        span: float = EWMA_SPAN,
+        z_threshold: float = Z_THRESHOLD,
+        warmup: int = WARMUP,
+        stuck_repeats: int = STUCK_REPEATS,
+    ):
+        self.alpha = 2.0 / (span + 1.0)
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.stuck_repeats = stuck_repeats
+        self.anomalies: List[pd.DataFrame] = []
+
+        if state is None or state.empty:
+            index = pd.MultiIndex.from_arrays([[], []], names=SERIES_KEY)
+            self.state = pd.DataFrame(
+                {
+                    "count": pd.Series(dtype="int64"),
+                    "mean": pd.Series(dtype=float),
+                    "var": pd.Series(dtype=float),
+                    "last_value": pd.Series(dtype=float),
+                    "last_datetime": pd.Series(dtype="datetime64[ns, UTC]"),
+                    "stuck_run": pd.Series(dtype="int64"),
+                },
+                index=index,
+            )
+        else:
+            state = state.set_index(SERIES_KEY)[STATE_COLUMNS].copy()
+            state["last_datetime"] = pd.to_datetime(
+                state["last_datetime"], utc=True, format="ISO8601"
+            )
+            self.state = state.astype({"count": "int64", "stuck_run": "int64"})
+
+    def update(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feeds new measurements to the detector and returns the anomalies found.
+
+        Args:
+            data (pd.DataFrame): Rows with 'sensor_id', 'parameter_name',
+                'datetime_from' and 'value'. Rows not newer than a series' last
+                seen timestamp are ignored (re-fetched windows cost nothing).
+
+        Returns:
+            pd.DataFrame: Anomalies ('sensor_id', 'parameter_name',
+                'datetime_from', 'value', 'kind', 'score'); also kept in
+                `self.anomalies` until `save()`.
+        """
+        rows = data[SERIES_KEY + ["datetime_from", "value"]].dropna(subset=["value"])
+        rows = rows.assign(
+            datetime_from=pd.to_datetime(rows["datetime_from"], utc=True, format="ISO8601"),
+            value=rows["value"].astype(float),
+        )
+        if rows.empty:
+            return _empty_anomalies()
+
+        keys = pd.MultiIndex.from_frame(rows[SERIES_KEY])
+        new_series = keys.unique().difference(self.state.index)
+        if len(new_series):
+            defaults = {
+                "count": 0,
+                "mean": 0.0,
+                "var": 0.0,
+                "last_value": np.nan,
+                "last_datetime": pd.NaT,
+                "stuck_run": 0,
+            }
+            fresh = pd.DataFrame(
+                {
+                    column: pd.Series(default, index=new_series, dtype=self.state[column].dtype)
+                    for column, default in defaults.items()
+                }
+            )
+            self.state = pd.concat([self.state, fresh]) if len(self.state) else fresh
+
+        pos = self.state.index.get_indexer(keys)
+        last_seen = self.state["last_datetime"].to_numpy(dtype="datetime64[ns]")[pos]
+        timestamps = rows["datetime_from"].to_numpy(dtype="datetime64[ns]")
+        is_new = np.isnat(last_seen) | (timestamps > last_seen)
+        rows = rows[is_new].assign(_pos=pos[is_new])
+        rows = rows.sort_values(["_pos", "datetime_from"]).drop_duplicates(
+            ["_pos", "datetime_from"]
+        )
+        if rows.empty:
+            return _empty_anomalies()
+
+        count = self.state["count"].to_numpy().copy()
+        mean = self.state["mean"].to_numpy().copy()
+        var = self.state["var"].to_numpy().copy()
+        last_value = self.state["last_value"].to_numpy().copy()
+        stuck_run = self.state["stuck_run"].to_numpy().copy()
+
+        series = rows["_pos"].to_numpy()
+        values = rows["value"].to_numpy()
+        step = rows.groupby("_pos").cumcount().to_numpy()
+        scores = np.zeros(len(rows))
+        runs = np.zeros(len(rows), dtype=np.int64)
+
+        # Each step updates every series at most once: fancy indexing is safe
+        for k in range(step.max() + 1):
+            at = np.flatnonzero(step == k)
+            p, x = series[at], values[at]
+
+            std = np.sqrt(var[p])
+            trusted = (count[p] >= self.warmup) & (std > 0)
+            scores[at] = np.where(trusted, (x - mean[p]) / np.where(std > 0, std, 1.0), 0.0)
+            runs[at] = np.where(x == last_value[p], stuck_run[p] + 1, 0)
+
+            # Running mean/variance until 1 / n drops below alpha, EWMA after
+            alpha = np.maximum(self.alpha, 1.0 / (count[p] + 1))
+            diff = x - mean[p]
+            mean[p] += alpha * diff
+            var[p] = (1 - alpha) * (var[p] + alpha * diff**2)
+            count[p] += 1
+            last_value[p] = x
+            stuck_run[p] = runs[at]
+
+        self.state["count"] = count
+        self.state["mean"] = mean
+        self.state["var"] = var
+        self.state["last_value"] = last_value
+        self.state["stuck_run"] = stuck_run
+        latest = rows.groupby("_pos")["datetime_from"].max()
+        last_datetime = self.state["last_datetime"].copy()
+        last_datetime.iloc[latest.index.to_numpy()] = latest.to_numpy()
+        self.state["last_datetime"] = last_datetime
+
+        spikes = rows[np.abs(scores) >= self.z_threshold].assign(
+            kind="spike", score=scores[np.abs(scores) >= self.z_threshold]
+        )
+        stuck = rows[runs == self.stuck_repeats].assign(
+            kind="stuck", score=runs[runs == self.stuck_repeats].astype(float)
+        )
+        anomalies = pd.concat([spikes, stuck], ignore_index=True).drop(columns="_pos")
+        if not anomalies.empty:
+            self.anomalies.append(anomalies)
+        return anomalies
+
+    def state_frame(self) -> pd.DataFrame:
+        """The state as table rows."""
+        state = self.state.reset_index()
+        state["last_datetime"] = state["last_datetime"].map(
+            lambda ts: None if pd.isna(ts) else ts.isoformat()
+        )
+        return state
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(
+        cls,
+        table_name: str = TABLE_NAME_ANOMALY_STATE,
+        sensor_ids: Optional[List[int]] = None,
+        **kwargs,
+    ) -> "AnomalyDetector":
+        """
+        Detector resumed from the state table (empty state if the table does
+        not exist yet). Any other read error is raised: starting fresh would
+        make `save()` overwrite the stored state and lose the series' history.
+
+        With `sensor_ids`, only those sensors' state is loaded (and later saved),
+        so detectors of disjoint shards can run concurrently.
+        """
+        try:
+            if sensor_ids is None:
+                state = read_db(table_name)
+            else:
+                state = read_db_where(table_name, {"sensor_id": list(sensor_ids)})
+        except Exception as e:
+            if not is_missing_table(e):
+                raise
+            logger.warning(f"Anomaly state table '{table_name}' not found, starting fresh.")
+            state = None
+        return cls(state, **kwargs)
+
+    def save(
+        self,
+        state_table: str = TABLE_NAME_ANOMALY_STATE,
+        anomalies_table: str = TABLE_NAME_ANOMALIES,
+    ) -> int:
+        """
+        Writes the flagged anomalies, then the updated state.
+
+        Both writes are upserts, so a retried run neither duplicates anomalies
+        nor loses the state. Returns the number of anomalies written.
+        """
+        anomalies = (
+            pd.concat(self.anomalies, ignore_index=True) if self.anomalies else _empty_anomalies()
+        )
+        if not anomalies.empty:
+            anomalies = anomalies.assign(
+                datetime_from=anomalies["datetime_from"].map(lambda ts: ts.isoformat()),
+                detected_at=datetime.now().isoformat(),
+            )
+            upsert_rows(anomalies, anomalies_table, on_conflict=ANOMALY_KEY)
+        upsert_rows(self.state_frame(), state_table, on_conflict=",".join(SERIES_KEY))
+        self.anomalies = []
+        return len(anomalies)
+
+
+def _empty_anomalies() -> pd.DataFrame:
+    return pd.DataFrame(columns=SERIES_KEY + ["datetime_from", "value", "kind", "score"])
+
+
+def detect_anomalies(data: pd.DataFrame) -> int:
+    """
+    Runs one incremental detection pass over freshly fetched measurements:
+    resumes the saved state, updates it with `data` and saves anomalies + state.
+
+    Returns:
+        int: Number of anomalies flagged.
+    """
+    detector = AnomalyDetector.load()
+    detector.update(data)
+    flagged = detector.save()
+    logger.info(f"> Anomaly detection: '{flagged}' anomalies over {len(detector.state)} series.")
+    return flagged
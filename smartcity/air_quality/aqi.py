@@ -0,0 +1,155 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# European Air Quality Index (EEA) levels and band upper bounds, in µg/m³.
+# A concentration above the last bound is "Extremely poor".
+EAQI_LEVELS = ["Good", "Fair", "Moderate", "Poor", "Very poor", "Extremely poor"]
+EAQI_COLORS = ["#50f0e6", "#50ccaa", "#f0e641", "#ff5050", "#960032", "#7d2181"]
+EAQI_BANDS = {
+    "pm25": [10, 20, 25, 50, 75],
+    "pm10": [20, 40, 50, 100, 150],
+    "no2": [40, 90, 120, 230, 340],
+    "o3": [50, 100, 130, 240, 380],
+    "so2": [100, 200, 350, 500, 750],
+}
+# Averaging period of each sub-index (hours), and the share of hours that
+# must be present in the window for the mean to count.
+AVERAGING_HOURS = {"pm25": 24, "pm10": 24, "o3": 8, "no2": 1, "so2": 1}
+MIN_COVERAGE = 0.75
+
+
+def sub_index(values, parameter: str) -> np.ndarray:
+    """
+    EAQI level (1 = Good … 6 = Extremely poor) of concentrations of a pollutant.
+
+    Args:
+        values (array-like): Averaged concentrations (µg/m³); NaN gives level 0.
+        parameter (str): A key of `EAQI_BANDS`.
+
+    Returns:
+        np.ndarray: Integer levels, same shape as `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    levels = np.searchsorted(EAQI_BANDS[parameter], values, side="left") + 1
+    return np.where(np.isnan(values), 0, levels)
+
+
+def level_name(level: int) -> str:
+    return EAQI_LEVELS[level - 1] if 1 <= level <= len(EAQI_LEVELS) else "N/A"
+
+
+def rolling_sub_indices(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rolling means and EAQI sub-indices for every sensor, pollutant and hour.
+
+    Measurements are binned into a dense (sensor × pollutant) × hour matrix with
+    `np.bincount`; rolling 24h (PM), 8h (O3) and 1h (NO2, SO2) means are then
+    read off cumulative sums along the hour axis, for all series at once.
+    A mean is kept only if at least `MIN_COVERAGE` of its window is present.
+
+    Args:
+        data (pd.DataFrame): Measurements with 'sensor_id', 'parameter_name',
+            'datetime_from' and 'value'. Pollutants without a band are ignored.
+
+    Returns:
+        pd.DataFrame: Columns 'sensor_id', 'parameter_name', 'hour' (UTC start
+            of the last hour of the window), 'concentration', 'sub_index'.
+    """
+    columns = ["sensor_id", "parameter_name", "hour", "concentration", "sub_index"]
+    data = data[data["parameter_name"].isin(list(EAQI_BANDS)) & data["value"].notna()]
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    hours = pd.to_datetime(data["datetime_from"], utc=True).dt.floor("h")
+    first_hour = hours.min()
+    offsets = ((hours - first_hour) // pd.Timedelta(hours=1)).to_numpy()
+    n_hours = int(offsets.max()) + 1
+
+    codes, series = pd.MultiIndex.from_arrays(
+        [data["sensor_id"], data["parameter_name"]]
+    ).factorize()
+    n_series = len(series)
+    flat = codes * n_hours + offsets
+
+    # Hourly means (several values in the same hour are averaged)
+    sums = np.bincount(flat, weights=data["value"].to_numpy(float), minlength=n_series * n_hours)
+    counts = np.bincount(flat, minlength=n_series * n_hours)
+    sums = sums.reshape(n_series, n_hours)
+    present = counts.reshape(n_series, n_hours) > 0
+    hourly = np.divide(sums, counts.reshape(n_series, n_hours), where=present, out=np.zeros_like(sums))
+
+    zeros = np.zeros((n_series, 1))
+    cum_values = np.hstack([zeros, np.cumsum(hourly, axis=1)])
+    cum_present = np.hstack([zeros, np.cumsum(present, axis=1)])
+
+    parameters = series.get_level_values(1).to_numpy()
+    windows = np.array([AVERAGING_HOURS[p] for p in parameters])
+    concentration = np.full((n_series, n_hours), np.nan)
+    end = np.arange(1, n_hours + 1)
+    for window in np.unique(windows):
+        rows = windows == window
+        start = np.maximum(end - window, 0)
+        total = cum_values[rows][:, end] - cum_values[rows][:, start]
+        n = cum_present[rows][:, end] - cum_present[rows][:, start]
+        valid = n >= np.ceil(MIN_COVERAGE * window)
+        concentration[rows] = np.where(valid, total / np.maximum(n, 1), np.nan)
+
+    series_idx, hour_idx = np.nonzero(~np.isnan(concentration))
+    values = concentration[series_idx, hour_idx]
+    result = pd.DataFrame(
+        {
+            "sensor_id": series.get_level_values(0).to_numpy()[series_idx],
+            "parameter_name": parameters[series_idx],
+            "hour": first_hour + pd.to_timedelta(hour_idx, unit="h"),
+            "concentration": values,
+        }
+    )
+    result["sub_index"] = 0
+    for parameter in np.unique(parameters):
+        rows = (result["parameter_name"] == parameter).to_numpy()
+        result.loc[rows, "sub_index"] = sub_index(values[rows], parameter)
+    return result
+
+
+def air_quality_index(sub_indices: pd.DataFrame, by: str = "sensor_id") -> pd.DataFrame:
+    """
+    Overall EAQI per group and hour: the worst sub-index over pollutants.
+
+    OpenAQ sensors measure a single pollutant, so the overall index is usually
+    taken per station: add its 'id' to the sub-indices and pass `by="id"`.
+
+    Args:
+        sub_indices (pd.DataFrame): Output of `rolling_sub_indices`.
+        by (str): Column identifying a group (sensor or station).
+
+    Returns:
+        pd.DataFrame: Columns `by`, 'hour', 'index' (1-6), 'level' and
+            'dominant' (pollutant with the worst sub-index).
+    """
+    if sub_indices.empty:
+        return pd.DataFrame(columns=[by, "hour", "index", "level", "dominant"])
+
+    worst = (
+        sub_indices.sort_values("sub_index", ascending=False, kind="stable")
+        .drop_duplicates([by, "hour"])
+        .sort_values(["hour", by], ignore_index=True)
+    )
+    return pd.DataFrame(
+        {
+            by: worst[by],
+            "hour": worst["hour"],
+            "index": worst["sub_index"].astype(int),
+            "level": pd.Categorical.from_codes(worst["sub_index"] - 1, EAQI_LEVELS),
+            "dominant": worst["parameter_name"],
+        }
+    )
+
+
+def latest_index(aqi: pd.DataFrame, hour: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Index of every group at `hour` (default: the most recent hour available)."""
+    if aqi.empty:
+        return aqi
+    hour = aqi["hour"].max() if hour is None else hour
+    return aqi[aqi["hour"] == hour]
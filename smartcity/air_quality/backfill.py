@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pendulum
+from openaq import OpenAQ
+
+from smartcity import logger
+from smartcity.config import CACHE_DIR
+from smartcity.database import bulk_load_available, bulk_upsert, upsert_measurements
+from smartcity.air_quality.locations import get_location_catalogue
+from smartcity.air_quality.openaq_api import make_client
+from smartcity.air_quality.rate_limit import OPENAQ_REQUESTS_PER_MINUTE, AdaptiveRateLimiter
+from smartcity.air_quality.response_cache import get_response_cache
+from smartcity.air_quality.streaming import MEMORY_BUDGET, iter_measurement_pages, load_stream
+
+WINDOW_DAYS = 7  # 168 hourly values: a single OpenAQ page per unit
+UPSERT_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """One sensor over one time window of a backfill."""
+
+    sensor_id: int
+    date_from: str
+    date_to: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.sensor_id}|{self.date_from}|{self.date_to}"
+
+
+def plan_work_units(
+    sensor_ids: Iterable[int],
+    start_date: str,
+    end_date: str,
+    window_days: int = WINDOW_DAYS,
+) -> List[WorkUnit]:
+    """
+    Splits [start_date, end_date) into consecutive windows for every sensor.
+
+    Windows are ordered oldest first, so an interrupted backfill leaves a
+    contiguous history behind it.
+    """
+    start = pendulum.parse(start_date)
+    end = pendulum.parse(end_date)
+    if start >= end:  # type: ignore
+        raise ValueError("Error : start_date must be before end_date.")
+
+    windows = []
+    current = start
+    while current < end:  # type: ignore
+        upper = min(current.add(days=window_days), end)  # type: ignore
+        windows.append((current.to_datetime_string(), upper.to_datetime_string()))  # type: ignore
+        current = upper
+
+    sensor_ids = list(sensor_ids)
+    return [WorkUnit(s, d_from, d_to) for d_from, d_to in windows for s in sensor_ids]
+
+
+class Checkpoint:
+    """
+    Append-only record of completed work units (one JSON line per unit).
+
+    Re-running a backfill with the same checkpoint file skips every unit
+    already listed, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.done.add(json.loads(line)["key"])
+
+    def __contains__(self, unit: WorkUnit) -> bool:
+        return unit.key in self.done
+
+    def mark_done(self, unit: WorkUnit, rows: int) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": unit.key, "rows": rows}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(unit.key)
+
+
+def default_checkpoint_path(start_date: str, end_date: str) -> str:
+    name = f"backfill_{start_date}_{end_date}".replace(" ", "T").replace(":", "-")
+    return os.path.join(CACHE_DIR, "backfill", f"{name}.jsonl")
+
+
+def run_backfill(
+    start_date: str,
+    end_date: str,
+    sensor_ids: Optional[List[int]] = None,
+    window_days: int = WINDOW_DAYS,
+    max_workers: int = 4,
+    requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE,
+    checkpoint_path: str = "",
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    memory_budget: int = MEMORY_BUDGET,
+) -> dict:
+    """
+    Loads OpenAQ history between two dates, in parallel and resumably.
+
+    The range is split into sensor × window work units (`plan_work_units`).
+    Units run on a thread pool behind one shared `AdaptiveRateLimiter`; each unit
+    streams its pages through dedup and upsert on its own (see `load_stream`),
+    then is recorded in the checkpoint. Failed units are logged and left for the next run.
+    When `SUPABASE_DB_URL` is set, units are loaded with `bulk_upsert` (COPY)
+    instead of PostgREST.
+
+    Args:
+        start_date (str): Start of the history to load (inclusive).
+        end_date (str): End of the history to load (exclusive).
+        sensor_ids (List[int], optional): Sensors to load; defaults to the
+            whole location catalogue.
+        window_days (int): Length of each work unit window.
+        max_workers (int): Number of parallel workers.
+        requests_per_minute (float): OpenAQ request budget shared by all workers.
+        checkpoint_path (str): Checkpoint file; derived from the dates if empty.
+        chunk_size (int): Rows per upsert request.
+        memory_budget (int): Bytes of rows buffered at once, shared by all workers.
+
+    Returns:
+        dict: Counts of planned, skipped, completed and failed units and
+            loaded rows, plus the keys of failed units.
+    """
+    if sensor_ids is None:
+        sensor_ids = get_location_catalogue().sensor_ids()
+
+    units = plan_work_units(sensor_ids, start_date, end_date, window_days)
+    checkpoint = Checkpoint(checkpoint_path or default_checkpoint_path(start_date, end_date))
+    pending = [u for u in units if u not in checkpoint]
+    logger.info(
+        f"Backfill {start_date} → {end_date}: {len(units)} units, "
+        f"{len(units) - len(pending)} already done, {len(pending)} to run "
+        f"(checkpoint: {checkpoint.path})."
+    )
+
+    limiter = AdaptiveRateLimiter(requests_per_minute)
+    use_copy = bulk_load_available()
+    if use_copy:
+        logger.info("Direct Postgres connection configured: units are loaded with COPY.")
+    cache = get_response_cache()
+    local = threading.local()
+    clients = []
+    clients_lock = threading.Lock()
+
+    def _client() -> OpenAQ:
+        # One client per worker thread; they are all closed at the end.
+        if not hasattr(local, "client"):
+            local.client = make_client()
+            with clients_lock:
+                clients.append(local.client)
+        return local.client
+
+    def _load(df: pd.DataFrame) -> None:
+        if use_copy:
+            bulk_upsert(df)
+        else:
+            upsert_measurements(df, chunk_size=chunk_size, return_records=False)
+
+    def _run(unit: WorkUnit) -> int:
+        pages = iter_measurement_pages(
+            _client(), [unit.sensor_id], unit.date_from, unit.date_to, cache, limiter
+        )
+        rows = load_stream(pages, max_bytes=memory_budget // max_workers, loader=_load)["rows"]
+        checkpoint.mark_done(unit, rows)
+        return rows
+
+    summary = {
+        "planned": len(units),
+        "skipped": len(units) - len(pending),
+        "completed": 0,
+        "failed": 0,
+        "rows": 0,
+        "failed_units": [],
+    }
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backfill") as pool:
+            futures = {pool.submit(_run, unit): unit for unit in pending}
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    summary["rows"] += future.result()
+                    summary["completed"] += 1
+                except Exception as e:
+                    logger.error(f"Backfill unit '{unit.key}' failed: {e}")
+                    summary["failed"] += 1
+                    summary["failed_units"].append(unit.key)
+    finally:
+        for client in clients:
+            client.close()
+
+    logger.info(
+        f"Backfill done: {summary['completed']} units loaded ({summary['rows']} rows), "
+        f"{summary['failed']} failed, {summary['skipped']} skipped."
+    )
+    return summary
@@ -0,0 +1,262 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from smartcity import logger
+
+WEEKDAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+def _to_days(dates: pd.Series) -> np.ndarray:
+    """Local calendar day of each timestamp, as `datetime64[D]`."""
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)  # keep the local wall time
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+class MeasurementCube:
+    """
+    Array-backed aggregates of measurements over day × sensor × parameter.
+
+    Each cell holds the sum, count, min and max of the raw values, so any
+    date range / pollutant selection is answered by slicing the arrays and
+    reducing the remaining axes — the raw rows are never scanned again.
+
+    Attributes:
+        days (np.ndarray): Sorted `datetime64[D]` axis.
+        sensors (np.ndarray): Sorted sensor IDs.
+        parameters (np.ndarray): Sorted parameter names.
+        sum, count, min, max (np.ndarray): Arrays of shape
+            (len(days), len(sensors), len(parameters)). Empty cells have
+            count 0, sum 0 and NaN min/max.
+    """
+
+    def __init__(self, days, sensors, parameters, sum_, count, min_, max_):
+        self.days = days
+        self.sensors = sensors
+        self.parameters = parameters
+        self.sum = sum_
+        self.count = count
+        self.min = min_
+        self.max = max_
+
+    @classmethod
+    def from_measurements(
+        cls, data: pd.DataFrame, date_column: str = "datetime_from"
+    ) -> "MeasurementCube":
+        """
+        Builds the cube from raw measurement rows.
+
+        Args:
+            data (pd.DataFrame): Rows with `date_column`, 'sensor_id',
+                'parameter_name' and 'value'.
+            date_column (str): Timestamp column used for the day axis.
+
+        Returns:
+            MeasurementCube: The aggregated cube (empty if `data` is empty).
+        """
+        if data.empty:
+            return cls.empty()
+
+        values = data["value"].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        values = values[valid]
+        logger.debug("Building measurement cube from %d rows.", len(values))
+        return cls._build(
+            _to_days(data[date_column])[valid],
+            data["sensor_id"].to_numpy()[valid],
+            data["parameter_name"].astype(str).to_numpy()[valid],
+            sums=values,
+            counts=np.ones(len(values), dtype=int),
+            mins=values,
+            maxs=values,
+        )
+
+    @classmethod
+    def from_daily_stats(cls, stats: pd.DataFrame) -> "MeasurementCube":
+        """
+        Builds the cube from rows already aggregated per day, sensor and parameter
+        (the output of `smartcity.database.read_daily_stats`).
+
+        Args:
+            stats (pd.DataFrame): Columns day, sensor_id, parameter_name,
+                value_sum, value_count, value_min, value_max.
+        """
+        if stats.empty:
+            return cls.empty()
+
+        return cls._build(
+            pd.to_datetime(stats["day"]).to_numpy().astype("datetime64[D]"),
+            stats["sensor_id"].to_numpy(),
+            stats["parameter_name"].astype(str).to_numpy(),
+            sums=stats["value_sum"].to_numpy(dtype=float),
+            counts=stats["value_count"].to_numpy(dtype=int),
+            mins=stats["value_min"].to_numpy(dtype=float),
+            maxs=stats["value_max"].to_numpy(dtype=float),
+        )
+
+    @classmethod
+    def _build(cls, days, sensors, parameters, sums, counts, mins, maxs):
+        """Scatters per-cell partial aggregates into the dense cube arrays."""
+        days, d_idx = np.unique(days, return_inverse=True)
+        sensors, s_idx = np.unique(sensors, return_inverse=True)
+        parameters, p_idx = np.unique(parameters, return_inverse=True)
+        shape = (len(days), len(sensors), len(parameters))
+        flat = np.ravel_multi_index((d_idx, s_idx, p_idx), shape)
+        size = int(np.prod(shape))
+
+        sum_ = np.bincount(flat, weights=sums, minlength=size)
+        count = np.bincount(flat, weights=counts, minlength=size).astype(int)
+        min_ = np.full(size, np.inf)
+        max_ = np.full(size, -np.inf)
+        np.minimum.at(min_, flat, mins)
+        np.maximum.at(max_, flat, maxs)
+        min_[count == 0] = np.nan
+        max_[count == 0] = np.nan
+
+        return cls(
+            days,
+            sensors,
+            parameters,
+            sum_.reshape(shape),
+            count.reshape(shape),
+            min_.reshape(shape),
+            max_.reshape(shape),
+        )
+
+    @classmethod
+    def empty(cls) -> "MeasurementCube":
+        shape = (0, 0, 0)
+        return cls(
+            np.array([], dtype="datetime64[D]"),
+            np.array([], dtype=int),
+            np.array([], dtype=str),
+            np.zeros(shape),
+            np.zeros(shape, dtype=int),
+            np.zeros(shape),
+            np.zeros(shape),
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.count.any()
+
+    def select(
+        self,
+        start_date=None,
+        end_date=None,
+        parameters: Optional[Iterable[str]] = None,
+    ) -> "MeasurementCube":
+        """
+        Restricts the cube to an inclusive day range and a set of parameters.
+
+        The day range is located by binary search on the sorted day axis and
+        returned as array views; only the parameter selection copies.
+        """
+        lo = 0
+        hi = len(self.days)
+        if start_date is not None:
+            lo = np.searchsorted(self.days, np.datetime64(start_date, "D"), side="left")
+        if end_date is not None:
+            hi = np.searchsorted(self.days, np.datetime64(end_date, "D"), side="right")
+        days = slice(lo, hi)
+
+        if parameters is None:
+            params = slice(None)
+        else:
+            params = np.flatnonzero(np.isin(self.parameters, list(parameters)))
+
+        return MeasurementCube(
+            self.days[days],
+            self.sensors,
+            self.parameters[params],
+            self.sum[days][:, :, params],
+            self.count[days][:, :, params],
+            self.min[days][:, :, params],
+            self.max[days][:, :, params],
+        )
+
+    def available_parameters(self) -> list:
+        """Parameters that have at least one value in the cube."""
+        return self.parameters[self.count.sum(axis=(0, 1)) > 0].tolist()
+
+    def daily_means(self) -> pd.DataFrame:
+        """Mean value per day and parameter (columns: date, parameter_name, value)."""
+        sums = self.sum.sum(axis=1)
+        counts = self.count.sum(axis=1)
+        days, params = np.nonzero(counts)
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(self.days[days]).date,
+                "parameter_name": self.parameters[params],
+                "value": sums[days, params] / counts[days, params],
+            }
+        )
+
+    def daily_stats(self) -> pd.DataFrame:
+        """Mean, min, max and count per day and parameter."""
+        counts = self.count.sum(axis=1)
+        days, params = np.nonzero(counts)
+        with np.errstate(invalid="ignore"):
+            mins = np.fmin.reduce(self.min, axis=1)
+            maxs = np.fmax.reduce(self.max, axis=1)
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(self.days[days]).date,
+                "parameter_name": self.parameters[params],
+                "mean": self.sum.sum(axis=1)[days, params] / counts[days, params],
+                "min": mins[days, params],
+                "max": maxs[days, params],
+                "count": counts[days, params],
+            }
+        )
+
+    def sensor_means(self) -> pd.DataFrame:
+        """Mean value per sensor and parameter (columns: sensor_id, parameter_name, value)."""
+        sums = self.sum.sum(axis=0)
+        counts = self.count.sum(axis=0)
+        sensors, params = np.nonzero(counts)
+        return pd.DataFrame(
+            {
+                "sensor_id": self.sensors[sensors],
+                "parameter_name": self.parameters[params],
+                "value": sums[sensors, params] / counts[sensors, params],
+            }
+        )
+
+    def weekday_means(self) -> pd.DataFrame:
+        """Mean value per weekday and parameter (columns: weekday, parameter_name, value)."""
+        # 1970-01-01 was a Thursday: shift so that Monday == 0.
+        weekday = (self.days.astype("int64") + 3) % 7
+        sums = np.zeros((7, len(self.parameters)))
+        counts = np.zeros((7, len(self.parameters)))
+        np.add.at(sums, weekday, self.sum.sum(axis=1))
+        np.add.at(counts, weekday, self.count.sum(axis=1))
+        days, params = np.nonzero(counts)
+        return pd.DataFrame(
+            {
+                "weekday": pd.Categorical(
+                    np.array(WEEKDAYS)[days], categories=WEEKDAYS, ordered=True
+                ),
+                "parameter_name": self.parameters[params],
+                "value": sums[days, params] / counts[days, params],
+            }
+        )
+
+    def sensor_counts(self) -> pd.DataFrame:
+        """Number of measurements per sensor (columns: sensor_id, count)."""
+        counts = self.count.sum(axis=(0, 2))
+        present = counts > 0
+        return pd.DataFrame(
+            {"sensor_id": self.sensors[present], "count": counts[present]}
+        )
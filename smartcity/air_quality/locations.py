@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import CACHE_DIR, TABLE_NAME_LOCATIONS
+from smartcity.database import read_db, read_table_version
+
+VERSION_CHECK_INTERVAL = 300  # seconds between two version polls
+
+
+def content_hash(data: pd.DataFrame) -> str:
+    """Stable hash of a DataFrame's content (used when the table has no version column)."""
+    if data.empty:
+        return "empty"
+    hashed = pd.util.hash_pandas_object(data.astype(str), index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+class LocationCatalogue:
+    """
+    In-memory copy of the `openaq_locations` table, tagged with a version.
+
+    Rows are one per sensor; lookups by `sensor_id` and by location `id`
+    go through prebuilt indexes instead of scanning the frame.
+
+    Attributes:
+        data (pd.DataFrame): The table content.
+        version (str): The version tag the content was read at.
+    """
+
+    def __init__(self, data: pd.DataFrame, version: str):
+        self.data = data
+        self.version = version
+        if data.empty:
+            self._sensor_pos = {}
+            self._location_pos = {}
+        else:
+            self._sensor_pos = {
+                sensor_id: pos for pos, sensor_id in enumerate(data["sensor_id"].tolist())
+            }
+            self._location_pos = data.groupby("id", sort=False).indices
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def sensor_ids(self) -> list:
+        """Unique sensor IDs, in table order."""
+        return list(self._sensor_pos)
+
+    def location_ids(self) -> list:
+        """Unique location IDs, in table order."""
+        return list(self._location_pos)
+
+    def by_sensor(self, sensor_id: int) -> Optional[pd.Series]:
+        """The catalogue row of a sensor, or None if unknown."""
+        pos = self._sensor_pos.get(sensor_id)
+        return None if pos is None else self.data.iloc[pos]
+
+    def by_location(self, location_id: int) -> pd.DataFrame:
+        """All sensor rows of a location (empty if unknown)."""
+        pos = self._location_pos.get(location_id)
+        return self.data.iloc[pos] if pos is not None else self.data.iloc[0:0]
+
+    # --- Local persistence ---
+
+    @staticmethod
+    def cache_path(table_name: str = TABLE_NAME_LOCATIONS, cache_dir: str = CACHE_DIR) -> str:
+        return os.path.join(cache_dir, f"{table_name}.pkl")
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pd.to_pickle({"version": self.version, "data": self.data}, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["LocationCatalogue"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            payload = pd.read_pickle(path)
+            return cls(payload["data"], payload["version"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalogue cache '{path}': {e}")
+            return None
+
+    # --- Loading ---
+
+    @classmethod
+    def load(
+        cls,
+        table_name: str = TABLE_NAME_LOCATIONS,
+        cache_dir: str = CACHE_DIR,
+        cached: Optional["LocationCatalogue"] = None,
+    ) -> "LocationCatalogue":
+        """
+        Returns the current catalogue, reading the table only if its version changed.
+
+        The version tag comes from `read_table_version` (row count + max
+        `updated_at`). If the table has no `updated_at` column, the full table
+        is read and its content hash is used as the version instead.
+
+        Args:
+            table_name (str): Locations table.
+            cache_dir (str): Directory of the on-disk copy.
+            cached (LocationCatalogue, optional): An in-memory copy to validate
+                before falling back to the on-disk one.
+
+        Returns:
+            LocationCatalogue: A catalogue matching the current table version.
+        """
+        path = cls.cache_path(table_name, cache_dir)
+        cached = cached or cls.from_file(path)
+
+        try:
+            version = read_table_version(table_name)
+        except Exception:
+            logger.info(f"No version column on '{table_name}', falling back to content hash.")
+            data = read_db(table_name)
+            catalogue = cls(data, content_hash(data))
+        else:
+            if cached is not None and cached.version == version:
+                logger.debug("Location catalogue is up to date (version %s).", version)
+                return cached
+            catalogue = cls(read_db(table_name), version)
+
+        if cached is None or cached.version != catalogue.version:
+            logger.info(
+                f"Location catalogue refreshed: {len(catalogue)} sensors (version {catalogue.version})."
+            )
+            catalogue.save(path)
+        return catalogue
+
+
+_catalogue: Optional[LocationCatalogue] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_location_catalogue(max_age: float = VERSION_CHECK_INTERVAL) -> LocationCatalogue:
+    """
+    Process-wide location catalogue shared by the flow and the dashboard.
+
+    The table version is polled at most once every `max_age` seconds; in
+    between, the in-memory catalogue is returned as is.
+    """
+    global _catalogue, _checked_at
+    with _lock:
+        if _catalogue is None or time.monotonic() - _checked_at >= max_age:
+            _catalogue = LocationCatalogue.load(cached=_catalogue)
+            _checked_at = time.monotonic()
+        return _catalogue
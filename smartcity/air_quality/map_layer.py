@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+STATION_COLUMNS = [
+    "id",
+    "name",
+    "locality",
+    "owner_name",
+    "provider_name",
+    "latitude",
+    "longitude",
+    "is_monitor",
+    "is_mobile",
+]
+
+NO_X_COLOR = [0, 200, 100]  # stations measuring NO / NO₂
+OTHER_COLOR = [255, 100, 50]
+
+
+def build_station_layer(sensors: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapses the per-sensor location catalogue into one row per station for the map.
+
+    Everything is computed with vectorized column operations (no row-wise
+    `apply`); only the columns the map layer and its tooltip use are kept,
+    which keeps the payload sent to pydeck small.
+
+    Args:
+        sensors (pd.DataFrame): Rows of `openaq_locations` (one per sensor).
+
+    Returns:
+        pd.DataFrame: One row per station with `STATION_COLUMNS`, plus
+            'parameter_name' and 'sensor_id' (sorted, comma-separated) and
+            'color' ([r, g, b]).
+    """
+    if sensors.empty:
+        return pd.DataFrame(columns=STATION_COLUMNS + ["parameter_name", "sensor_id", "color"])
+
+    stations = sensors.drop_duplicates("id")[STATION_COLUMNS].set_index("id")
+
+    parameters = (
+        sensors[["id", "parameter_name"]]
+        .drop_duplicates()
+        .sort_values(["id", "parameter_name"])
+        .groupby("id")["parameter_name"]
+        .agg(", ".join)
+    )
+    sensor_ids = (
+        sensors[["id", "sensor_id"]]
+        .drop_duplicates()
+        .sort_values(["id", "sensor_id"])
+        .astype({"sensor_id": str})
+        .groupby("id")["sensor_id"]
+        .agg(", ".join)
+    )
+    stations = stations.join(parameters).join(sensor_ids).reset_index()
+
+    has_no = stations["parameter_name"].str.contains("no", regex=False).to_numpy()
+    stations["color"] = np.where(has_no[:, None], NO_X_COLOR, OTHER_COLOR).tolist()
+    return stations
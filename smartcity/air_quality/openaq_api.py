@@ -1,14 +1,142 @@
+import threading
+import time
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Optional
+import openaq
 from openaq import OpenAQ
+from openaq.core.exceptions import APIError
+from openaq.core.transport import Response, Transport
 import pandas as pd
 
-from smartcity.config import OPENAQ_API_KEY, TABLE_NAME_LOCATIONS
-from smartcity import logger
-from smartcity.database import read_db
+from smartcity.config import OPENAQ_API_KEY
+from smartcity import logger, LazyMessage
+from smartcity.air_quality.locations import get_location_catalogue
+from smartcity.air_quality.rate_limit import (
+    OPENAQ_REQUESTS_PER_MINUTE,
+    AdaptiveRateLimiter,
+    RateLimiter,
+    backoff_delay,
+)
+from smartcity.air_quality.response_cache import ResponseCache, get_response_cache
+from smartcity.profiling import profiled
 from smartcity.utils import flatten_and_transform, get_dates_range, get_yesterday_local_range
 
 
+MAX_RETRIES = 5
+
+# Throttling, 5xx and transport errors are worth retrying; other 4xx are not.
+THROTTLING_ERRORS = (openaq.HTTPRateLimitError, openaq.RateLimitError)
+RETRYABLE_ERRORS = THROTTLING_ERRORS + (
+    openaq.ServerError,
+    openaq.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class HeaderTransport(Transport):
+    """
+    OpenAQ transport whose HTTP errors carry the failed response's
+    `status_code` and `headers`.
+
+    openaq raises its HTTP errors as `exc_class(response.text)`, dropping the
+    headers, so `Retry-After` on a 429 would never reach the backoff. The raw
+    response of each request is kept (per thread: clients are shared by the
+    shard workers) and attached to the error raised for it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def _raw_request(self, *args, **kwargs) -> Response:
+        response = super()._raw_request(*args, **kwargs)
+        self._local.response = response
+        return response
+
+    def send_request(self, *args, **kwargs) -> Response:
+        self._local.response = None
+        try:
+            return super().send_request(*args, **kwargs)
+        except APIError as e:
+            response = getattr(self._local, "response", None)
+            if response is not None:
+                e.status_code = response.status_code  # type: ignore[attr-defined]
+                e.headers = response.headers  # type: ignore[attr-defined]
+            raise
+
+
+def make_client(api_key: Optional[str] = OPENAQ_API_KEY) -> OpenAQ:
+    """OpenAQ client whose HTTP errors carry their response headers (see `HeaderTransport`)."""
+    return OpenAQ(api_key=api_key, _transport=HeaderTransport())
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` / rate-limit reset header, if the error carries one."""
+    headers = getattr(error, "headers", None) or getattr(
+        getattr(error, "response", None), "headers", None
+    )
+    if not headers:
+        return None
+    for name in ("retry-after", "Retry-After", "x-ratelimit-reset", "X-RateLimit-Reset"):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _list_measurements(
+    client: OpenAQ,
+    limiter: Optional[RateLimiter],
+    max_retries: int = MAX_RETRIES,
+    **params,
+):
+    """
+    Calls `client.measurements.list` with per-request retries.
+
+    Retryable errors are retried up to `max_retries` times with jittered
+    exponential backoff (at least `Retry-After` when the server sends it).
+    An adaptive limiter slows every worker down on throttling and speeds back
+    up on success, following the rate-limit headers of successful responses.
+    """
+    adaptive = isinstance(limiter, AdaptiveRateLimiter)
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = client.measurements.list(**params)
+        except RETRYABLE_ERRORS as e:
+            retry_after = _retry_after(e)
+            if adaptive and isinstance(e, THROTTLING_ERRORS):
+                limiter.on_throttle(retry_after)  # type: ignore
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt, retry_after=retry_after)
+            logger.warning(
+                "> %s for sensor ID '%s' (attempt %d/%d), retrying in %.1fs ...",
+                type(e).__name__,
+                params.get("sensors_id"),
+                attempt + 1,
+                max_retries + 1,
+                delay,
+            )
+            time.sleep(delay)
+            continue
+
+        if adaptive:
+            headers = getattr(response, "headers", None)
+            if headers is not None and getattr(headers, "x_ratelimit_limit", 0):
+                limiter.on_success(  # type: ignore
+                    headers.x_ratelimit_remaining, headers.x_ratelimit_reset
+                )
+            else:
+                limiter.on_success()  # type: ignore
+        return response
+
+
 def fetch_locations(
     client: OpenAQ, country_code: str = "US", limit: int = 100
 ) -> pd.DataFrame:
@@ -27,6 +155,26 @@ def fetch_locations(
     return locations
 
 
+def fetch_all_locations(
+    client: OpenAQ, country_code: str = "FR", limit: int = 1000
+) -> pd.DataFrame:
+    """
+    Fetches every location of a country, page by page (a country can have
+    thousands of locations, more than a single `fetch_locations` page).
+    """
+    pages = []
+    page = 1
+    while True:
+        locations = client.locations.list(limit=limit, page=page, iso=country_code)
+        if locations.results:
+            pages.append(flatten_and_transform(locations.results))
+        if len(locations.results) < limit:
+            break
+        page += 1
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+
+
+@profiled()
 def flatten_measurements(measurements: list) -> pd.DataFrame:
     """
     Transforms a list of OpenAQ Measurement objects into a pandas DataFrame.
@@ -54,8 +202,16 @@ def flatten_measurements(measurements: list) -> pd.DataFrame:
     return pd.DataFrame(flattened_data)
 
 
+@profiled()
 def fetch_sensor_measurements(
-    client: OpenAQ, sensor_id: int, date_from: str, date_to: str, limit: int = 1000
+    client: OpenAQ,
+    sensor_id: int,
+    date_from: str,
+    date_to: str,
+    limit: int = 1000,
+    page: int = 1,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
 ) -> pd.DataFrame:
     """
     Fetches air quality measurements from the OpenAQ API for a specific location ID
@@ -66,41 +222,120 @@ def fetch_sensor_measurements(
         sensor_id (int): The ID of the sensor/location to fetch measurements for.
         date_from (str): The start date in 'YYYY-MM-DD' format.
         date_to (str): The end date in 'YYYY-MM-DD' format.
-        limit (int): Maximum number of records to fetch. Default is 10,000.
+        limit (int): Maximum number of records to fetch. Default is 1,000.
+        page (int): Page of results to fetch. Default is 1.
+        cache (ResponseCache, optional): On-disk cache checked before calling the API.
+        limiter (RateLimiter, optional): Shared limiter acquired before each API call
+            (and retry); an AdaptiveRateLimiter also adapts to throttling.
 
     Returns:
         pd.DataFrame: A DataFrame containing the fetched measurements.
     """
+    if cache is not None:
+        cached = cache.get(sensor_id, date_from, date_to, page, limit=limit)
+        if cached is not None:
+            logger.debug("> Sensor ID '%s' page %d served from cache.", sensor_id, page)
+            return cached
+
     try:
-        logger.debug(f"> Fetching measurements for Sensor ID '{sensor_id}' ...")
-        response = client.measurements.list(
+        logger.debug("> Fetching measurements for Sensor ID '%s' ...", sensor_id)
+        response = _list_measurements(
+            client,
+            limiter,
             sensors_id=sensor_id,
             datetime_from=date_from,
             datetime_to=date_to,
             limit=limit,
+            page=page,
         )
         if response and response.results:
             df = flatten_measurements(response.results)
-            logger.debug(f"> Fetched '{len(df)}' records.")
-            return df
+            logger.debug("> Fetched '%d' records.", len(df))
         else:
-            logger.warning(f"> No measurements found (for sensor ID : {sensor_id}).")
-            return pd.DataFrame()
+            logger.warning("> No measurements found (for sensor ID : %s).", sensor_id)
+            df = pd.DataFrame()
+
+        if cache is not None:
+            cache.set(sensor_id, date_from, date_to, page, df, limit=limit)
+        return df
     except Exception as e:
-        logger.error(f"> Error fetching measurements: {e}")
+        logger.error("> Error fetching measurements: %s", e)
         raise e
 
 
+def iter_sensor_pages(
+    client: OpenAQ,
+    sensor_id: int,
+    date_from: str,
+    date_to: str,
+    limit: int = 1000,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields a sensor's measurements over a window, one non-empty page at a time.
+
+    Pages are requested lazily, until one comes back with fewer than `limit` rows.
+    """
+    page = 1
+    while True:
+        df = fetch_sensor_measurements(
+            client=client,
+            sensor_id=sensor_id,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            page=page,
+            cache=cache,
+            limiter=limiter,
+        )
+        if not df.empty:
+            yield df
+        if len(df) < limit:
+            return
+        page += 1
+
+
+def fetch_sensor_window(
+    client: OpenAQ,
+    sensor_id: int,
+    date_from: str,
+    date_to: str,
+    limit: int = 1000,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> pd.DataFrame:
+    """
+    Fetches every page of a sensor's measurements over a window.
+
+    Returns:
+        pd.DataFrame: All measurements of the window (empty if none).
+    """
+    pages = list(
+        iter_sensor_pages(client, sensor_id, date_from, date_to, limit, cache, limiter)
+    )
+    if not pages:
+        return pd.DataFrame()
+    return pd.concat(pages, ignore_index=True)
+
+
 def fetch_measurements(list_sensors: List[int], date_from, date_to) -> pd.DataFrame:
-    client: OpenAQ = OpenAQ(api_key=OPENAQ_API_KEY)
+    client: OpenAQ = make_client()
     logger.info(">>> OpenAQ client initialized")
 
     logger.info("Fetching measurements from OpenAQ ...")
     logger.info(f"From '{date_from}' to '{date_to}' ...")
+    cache = get_response_cache()
+    limiter = AdaptiveRateLimiter(OPENAQ_REQUESTS_PER_MINUTE, burst=10)
     measurements_df = pd.DataFrame()
     for sensor_id in list_sensors:
         df = fetch_sensor_measurements(
-            client=client, sensor_id=sensor_id, date_from=date_from, date_to=date_to
+            client=client,
+            sensor_id=sensor_id,
+            date_from=date_from,
+            date_to=date_to,
+            cache=cache,
+            limiter=limiter,
         )
         if not df.empty:
             df["sensor_id"] = sensor_id
@@ -109,8 +344,13 @@ def fetch_measurements(list_sensors: List[int], date_from, date_to) -> pd.DataFr
         measurements_df = pd.concat([measurements_df, df], ignore_index=True)
 
     logger.info(f"Fetched total '{len(measurements_df)}' measurements.")
+    if cache is not None:
+        logger.info(f"OpenAQ cache: {cache.hits} hits, {cache.misses} misses.")
     logger.debug(
-        f"Missing sensor IDs: {set(list_sensors) - set(measurements_df['sensor_id'])}"
+        "Missing sensor IDs: %s",
+        LazyMessage(
+            lambda: set(list_sensors) - set(measurements_df.get("sensor_id", []))
+        ),
     )
     if measurements_df.empty:
         logger.warning("No measurements were fetched.")
@@ -124,10 +364,11 @@ def fetch_openaq_data() -> pd.DataFrame:
     """Fetch air quality data from OpenAQ API"""
     date_from, date_to = get_dates_range(history_days=7)
 
-    sensors_info = read_db(table_name=TABLE_NAME_LOCATIONS)
-    logger.info(f"Fetched '{sensors_info['sensor_id'].nunique()}' sensors from DB.")
+    catalogue = get_location_catalogue()
+    sensor_ids = catalogue.sensor_ids()
+    logger.info(f"Loaded '{len(sensor_ids)}' sensors from the location catalogue.")
 
-    data = fetch_measurements(list_sensors=sensors_info["sensor_id"].unique().tolist(),
+    data = fetch_measurements(list_sensors=sensor_ids,
                               date_from=date_from, date_to=date_to)
     data = data.drop_duplicates(ignore_index=True)
     return data
\ No newline at end of file
@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+from typing import Optional
+
+OPENAQ_REQUESTS_PER_MINUTE = 60  # OpenAQ default API key limit
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` requests per `period` seconds.
+
+    Every worker calls `acquire()` before an API request; callers block until
+    a token is available, so a pool of threads never exceeds the rate as a whole.
+
+    Args:
+        rate (float): Requests allowed per period.
+        period (float): Period in seconds (default: one minute).
+        burst (int, optional): Bucket capacity; defaults to 1 (no bursts).
+    """
+
+    def __init__(self, rate: float, period: float = 60.0, burst: Optional[int] = None):
+        self.rate = rate
+        self.period = period
+        self.capacity = float(burst or 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def per_second(self) -> float:
+        return self.rate / self.period
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent; returns the time spent waiting (s)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.per_second
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter whose rate follows the server's feedback (AIMD).
+
+    - `on_throttle()` (HTTP 429): the rate is multiplied by `decrease` and all
+      workers pause for `Retry-After` seconds (or one request interval).
+    - `on_success()`: the rate grows back by `increase` requests per period,
+      up to `max_rate`. If the response says the quota is exhausted
+      (remaining == 0), workers pause until the quota resets.
+
+    Args:
+        rate (float): Initial (and by default maximum) requests per period.
+        min_rate (float, optional): Floor of the rate; defaults to `rate / 16`.
+        max_rate (float, optional): Ceiling of the rate; defaults to `rate`.
+        decrease (float): Multiplicative decrease factor on throttling.
+        increase (float): Additive increase per successful request.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        period: float = 60.0,
+        burst: Optional[int] = None,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        decrease: float = 0.5,
+        increase: float = 1.0,
+    ):
+        super().__init__(rate, period, burst)
+        self.min_rate = min_rate or rate / 16
+        self.max_rate = max_rate or rate
+        self.decrease = decrease
+        self.increase = increase
+        self._blocked_until = 0.0
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                delay = self._blocked_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+        return waited + super().acquire()
+
+    def pause(self, seconds: float) -> None:
+        """Blocks every caller of `acquire()` for `seconds`."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            pause = retry_after if retry_after else 1 / self.per_second
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    def on_success(self, remaining: Optional[int] = None, reset: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            if remaining is not None and remaining <= 0 and reset:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+
+def backoff_delay(
+    attempt: int,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    retry_after: Optional[float] = None,
+) -> float:
+    """
+    Exponential backoff with full jitter: uniform in [0, min(max_delay, base * 2**attempt)].
+
+    A server-provided `retry_after` is used as a lower bound.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import CACHE_DIR
+
+CLOSED_WINDOW_DAYS = 3  # windows ending earlier than this are considered final
+CLOSED_WINDOW_TTL = 30 * 24 * 3600  # 30 days
+OPEN_WINDOW_TTL = 3600  # 1 hour
+MAX_CACHE_BYTES = 256 * 1024 * 1024  # 256 MB
+
+
+class ResponseCache:
+    """
+    On-disk cache of OpenAQ measurement pages, keyed by the request parameters
+    (sensor, window, page and page size).
+
+    Windows that ended more than `closed_window_days` ago cannot change any more
+    and are kept for `closed_ttl` seconds; recent windows only for `open_ttl`.
+    The directory is bounded to `max_bytes`: least recently used entries are
+    evicted first.
+
+    Example:
+        >>> cache = ResponseCache(".cache/openaq")
+        >>> df = cache.get(sensor_id, date_from, date_to, page=1)
+        >>> if df is None:
+        ...     df = fetch(...)
+        ...     cache.set(sensor_id, date_from, date_to, 1, df)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = MAX_CACHE_BYTES,
+        closed_window_days: int = CLOSED_WINDOW_DAYS,
+        closed_ttl: float = CLOSED_WINDOW_TTL,
+        open_ttl: float = OPEN_WINDOW_TTL,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.closed_window_days = closed_window_days
+        self.closed_ttl = closed_ttl
+        self.open_ttl = open_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = sum(size for _, size, _ in self._entries())
+
+    def _path(self, sensor_id: int, date_from: str, date_to: str, page: int, limit: int) -> str:
+        key = json.dumps([int(sensor_id), str(date_from), str(date_to), int(page), int(limit)])
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+    def ttl_for(self, date_to: str) -> float:
+        """TTL of a window, based on how long ago it ended."""
+        end = pd.Timestamp(date_to)
+        if end.tzinfo is None:
+            end = end.tz_localize("UTC")
+        if pd.Timestamp.now(tz="UTC") - end > pd.Timedelta(days=self.closed_window_days):
+            return self.closed_ttl
+        return self.open_ttl
+
+    def get(
+        self, sensor_id: int, date_from: str, date_to: str, page: int = 1, limit: int = 1000
+    ) -> Optional[pd.DataFrame]:
+        """The cached page, or None if missing or expired."""
+        path = self._path(sensor_id, date_from, date_to, page, limit)
+        try:
+            payload = pd.read_pickle(path)
+        except (FileNotFoundError, EOFError):
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry '{path}': {e}")
+            self._discard(path)
+            self.misses += 1
+            return None
+
+        if payload["expires_at"] < time.time():
+            self._discard(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)  # mark as recently used for LRU eviction
+        self.hits += 1
+        return payload["data"]
+
+    def set(
+        self,
+        sensor_id: int,
+        date_from: str,
+        date_to: str,
+        page: int,
+        data: pd.DataFrame,
+        limit: int = 1000,
+    ) -> None:
+        """Stores a page and evicts old entries if the cache grew too large."""
+        path = self._path(sensor_id, date_from, date_to, page, limit)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        pd.to_pickle({"expires_at": time.time() + self.ttl_for(date_to), "data": data}, tmp_path)
+        with self._lock:
+            replaced = self._size(path)  # an overwritten entry no longer counts
+            os.replace(tmp_path, path)
+            self._bytes += os.path.getsize(path) - replaced
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def _entries(self) -> list:
+        """(mtime, size, path) of every cache entry."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits in `max_bytes`."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+            self._bytes = total
+        if removed:
+            logger.debug("Evicted %d OpenAQ cache entries.", removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self._bytes = 0
+
+    def _discard(self, path: str) -> None:
+        """Removes one entry and its size from the running total."""
+        with self._lock:
+            size = self._size(path)
+            self._remove(path)
+            self._bytes -= size
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Shared OpenAQ response cache under `CACHE_DIR/openaq`.
+
+    Disabled (returns None) when `SMARTCITY_OPENAQ_CACHE` is "0"/"false".
+    """
+    global _response_cache
+    if os.getenv("SMARTCITY_OPENAQ_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(os.path.join(CACHE_DIR, "openaq"))
+    return _response_cache
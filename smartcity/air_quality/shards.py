@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import TABLE_NAME_SHARDS
+from smartcity.database import read_db_where, upsert_rows
+from smartcity.air_quality.anomalies import AnomalyDetector
+from smartcity.air_quality.rate_limit import OPENAQ_REQUESTS_PER_MINUTE
+from smartcity.air_quality.streaming import stream_openaq_data
+
+MAX_SENSORS_PER_SHARD = 200
+SHARD_KEY = "run_id,shard_id"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """A group of sensors ingested by one worker."""
+
+    shard_id: str
+    sensor_ids: Tuple[int, ...]
+    groups: Tuple[str, ...]
+
+
+def _slug(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "group"
+
+
+def plan_shards(
+    sensors: pd.DataFrame,
+    by: str = "locality",
+    max_sensors: int = MAX_SENSORS_PER_SHARD,
+) -> List[Shard]:
+    """
+    Splits the location catalogue into shards of at most `max_sensors` sensors.
+
+    Sensors are grouped by `by` (city / locality); sensors without one form a
+    group per location. Groups are taken in name order and packed into shards
+    one after another, so a city stays in one shard when it fits and small
+    towns share a shard. A city larger than `max_sensors` is split.
+    The plan only depends on the catalogue content, so it is stable across runs.
+
+    Args:
+        sensors (pd.DataFrame): Catalogue rows ('sensor_id', 'id', and `by`).
+        by (str): Grouping column.
+        max_sensors (int): Shard capacity.
+
+    Returns:
+        List[Shard]: Shards with IDs like '000-clermont-ferrand'.
+    """
+    sensors = sensors.drop_duplicates("sensor_id")
+    fallback = "location-" + sensors["id"].astype(str)
+    groups = sensors[by].fillna(fallback) if by in sensors.columns else fallback
+
+    shards: List[Shard] = []
+    current: List[int] = []
+    current_groups: List[str] = []
+
+    def _close():
+        if current:
+            shard_id = f"{len(shards):03d}-{_slug(current_groups[0])}"
+            shards.append(Shard(shard_id, tuple(current), tuple(current_groups)))
+
+    for name, ids in sensors.groupby(groups.to_numpy(), sort=True)["sensor_id"]:
+        ids = sorted(ids.tolist())
+        for start in range(0, len(ids), max_sensors):
+            piece = ids[start : start + max_sensors]
+            if len(current) + len(piece) > max_sensors:
+                _close()
+                current, current_groups = [], []
+            current.extend(piece)
+            if not current_groups or current_groups[-1] != name:
+                current_groups.append(name)
+    _close()
+
+    logger.info(
+        f"Planned {len(shards)} shards for {len(sensors)} sensors "
+        f"(by '{by}', at most {max_sensors} sensors each)."
+    )
+    return shards
+
+
+def record_shard_state(
+    run_id: str,
+    shard: Shard,
+    status: str,
+    summary: Optional[dict] = None,
+    error: str = "",
+    table_name: str = TABLE_NAME_SHARDS,
+) -> None:
+    """Upserts the state of a shard for a run ('running', 'done' or 'failed')."""
+    summary = summary or {}
+    upsert_rows(
+        pd.DataFrame(
+            [
+                {
+                    "run_id": run_id,
+                    "shard_id": shard.shard_id,
+                    "status": status,
+                    "sensors": len(shard.sensor_ids),
+                    "rows": summary.get("rows", 0),
+                    "rejected": summary.get("rejected", 0),
+                    "anomalies": summary.get("anomalies", 0),
+                    "error": error[:1000],
+                    "updated_at": datetime.now().isoformat(),
+                }
+            ]
+        ),
+        table_name,
+        on_conflict=SHARD_KEY,
+    )
+
+
+def shard_request_budget(
+    concurrency: int, requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE
+) -> float:
+    """
+    OpenAQ requests per minute of each shard, when `concurrency` shards run at
+    once on the same API key.
+
+    Every shard has its own (in-process) rate limiter, and the key's limit is
+    per key, not per process: without a split, N concurrent shards would send
+    N times the allowed rate. The split assumes `concurrency` is an upper
+    bound of the shards running together.
+    """
+    return requests_per_minute / max(concurrency, 1)
+
+
+def run_shard(
+    run_id: str,
+    shard: Shard,
+    date_from: str,
+    date_to: str,
+    requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE,
+) -> dict:
+    """
+    Ingests one shard: streams its sensors' measurements to the table and
+    updates their anomaly state, recording the shard state before and after.
+    A shard already done in this run (e.g. when the run is retried) is skipped.
+
+    `requests_per_minute` is this shard's share of the API key's budget (see
+    `shard_request_budget`).
+
+    Returns:
+        dict: The streaming summary ('rows', 'rejected', 'batches', 'anomalies').
+    """
+    previous = read_db_where(TABLE_NAME_SHARDS, {"run_id": run_id, "shard_id": shard.shard_id})
+    if not previous.empty and previous["status"].iat[0] == "done":
+        logger.info(f"Shard '{shard.shard_id}' already done in run '{run_id}', skipped.")
+        return previous.iloc[0][["rows", "rejected", "anomalies"]].to_dict()
+
+    logger.info(f"Shard '{shard.shard_id}' ({len(shard.sensor_ids)} sensors) of run '{run_id}' ...")
+    record_shard_state(run_id, shard, "running")
+    try:
+        detector = AnomalyDetector.load(sensor_ids=list(shard.sensor_ids))
+        summary = stream_openaq_data(
+            list(shard.sensor_ids),
+            date_from,
+            date_to,
+            on_batch=detector.update,
+            requests_per_minute=requests_per_minute,
+        )
+        summary["anomalies"] = detector.save()
+    except Exception as e:
+        record_shard_state(run_id, shard, "failed", error=str(e))
+        raise
+    record_shard_state(run_id, shard, "done", summary)
+    return summary
+
+
+def merge_shard_states(
+    run_id: str, shard_ids: List[str], table_name: str = TABLE_NAME_SHARDS
+) -> dict:
+    """
+    Merge step of a sharded run: checks that every shard is done and sums
+    their counts.
+
+    Raises:
+        RuntimeError: If a shard failed or never reported, listing them (the
+            run can be retried for those shards only).
+    """
+    states = read_db_where(table_name, {"run_id": run_id})
+    done = states[states["status"] == "done"] if not states.empty else states
+    missing = sorted(set(shard_ids) - set(done.get("shard_id", [])))
+    totals = {
+        "shards": len(shard_ids),
+        "done": len(shard_ids) - len(missing),
+        "rows": int(done["rows"].sum()) if not done.empty else 0,
+        "rejected": int(done["rejected"].sum()) if not done.empty else 0,
+        "anomalies": int(done["anomalies"].sum()) if not done.empty else 0,
+    }
+    logger.info(f"Run '{run_id}': {totals}")
+    if missing:
+        raise RuntimeError(f"Run '{run_id}': {len(missing)} shards not done: {missing}")
+    return totals
@@ -0,0 +1,217 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # optional: pip install "smartcity[spatial]"
+    cKDTree = None
+
+EARTH_RADIUS = 6_371_000.0  # metres
+# (lat min, lat max, lon min, lon max) of the area mapped on the dashboard
+CLERMONT_FERRAND_BOUNDS = (45.74, 45.82, 3.03, 3.16)
+GRID_RESOLUTION = 250  # metres
+MAX_CACHED_GRIDS = 512
+
+
+class _BruteForceTree:
+    """Exact neighbour search with NumPy, used when SciPy is not installed."""
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+
+    def query(self, x: np.ndarray, k: int = 1):
+        distances = np.linalg.norm(x[:, None, :] - self.points[None, :, :], axis=2)
+        idx = np.argsort(distances, axis=1)[:, :k]
+        return np.take_along_axis(distances, idx, axis=1), idx
+
+
+class SpatialIndex:
+    """
+    KD-tree over sensor coordinates, with cached interpolation grids.
+
+    Coordinates are projected once to local metres (equirectangular around the
+    sensors' centroid), so neighbour distances are metric. For each grid
+    resolution, the k nearest sensors of every cell are searched once and
+    reused for every hour; interpolated grids are then cached by
+    (timestamp, resolution, method) in a bounded LRU, so animating a heatmap
+    through time only costs a weighted sum per new hour.
+
+    Args:
+        sensor_ids (array-like): Sensor IDs.
+        latitudes (array-like): Sensor latitudes.
+        longitudes (array-like): Sensor longitudes.
+        max_grids (int): Number of interpolated grids kept in memory.
+    """
+
+    def __init__(self, sensor_ids, latitudes, longitudes, max_grids: int = MAX_CACHED_GRIDS):
+        self.sensor_ids = np.asarray(sensor_ids)
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        self._origin = (
+            (float(latitudes.mean()), float(longitudes.mean())) if len(latitudes) else (0.0, 0.0)
+        )
+        points = self._project(latitudes, longitudes)
+        self._tree = cKDTree(points) if cKDTree is not None else _BruteForceTree(points)
+        self.max_grids = max_grids
+        self._neighbours = {}
+        self._grids: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_catalogue(cls, sensors: pd.DataFrame, parameter: Optional[str] = None) -> "SpatialIndex":
+        """Index of the located sensors of the catalogue (of one pollutant, if given)."""
+        if parameter is not None:
+            sensors = sensors[sensors["parameter_name"] == parameter]
+        sensors = sensors.dropna(subset=["latitude", "longitude"]).drop_duplicates("sensor_id")
+        return cls(sensors["sensor_id"], sensors["latitude"], sensors["longitude"])
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+
+    def _project(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        lat0, lon0 = np.radians(self._origin)
+        x = EARTH_RADIUS * (np.radians(longitudes) - lon0) * np.cos(lat0)
+        y = EARTH_RADIUS * (np.radians(latitudes) - lat0)
+        return np.column_stack([x, y])
+
+    def _query(self, points: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        distances, idx = self._tree.query(points, k=k)
+        return distances.reshape(len(points), k), idx.reshape(len(points), k)
+
+    def nearest(self, latitude, longitude, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The `k` nearest sensors of one or many points.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Sensor IDs and distances (metres),
+                of shape (n_points, k), closest first.
+        """
+        points = self._project(np.atleast_1d(latitude), np.atleast_1d(longitude))
+        distances, idx = self._query(points, k)
+        return self.sensor_ids[idx], distances
+
+    def grid_axes(
+        self, resolution: float = GRID_RESOLUTION, bounds: Tuple = CLERMONT_FERRAND_BOUNDS
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitudes and longitudes of the grid cell centres."""
+        lat_min, lat_max, lon_min, lon_max = bounds
+        lat_step = np.degrees(resolution / EARTH_RADIUS)
+        lon_step = lat_step / np.cos(np.radians(self._origin[0]))
+        return (
+            np.arange(lat_min + lat_step / 2, lat_max, lat_step),
+            np.arange(lon_min + lon_step / 2, lon_max, lon_step),
+        )
+
+    def _grid_neighbours(self, resolution: float, bounds: Tuple, k: int):
+        key = (resolution, bounds, k)
+        with self._lock:
+            cached = self._neighbours.get(key)
+        if cached is None:
+            lats, lons = self.grid_axes(resolution, bounds)
+            lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+            distances, idx = self._query(self._project(lat_grid.ravel(), lon_grid.ravel()), k)
+            cached = (lats, lons, distances, idx)
+            with self._lock:
+                self._neighbours[key] = cached
+        return cached
+
+    def interpolate(
+        self,
+        values: pd.Series,
+        resolution: float = GRID_RESOLUTION,
+        method: str = "idw",
+        k: int = 6,
+        power: float = 2.0,
+        bounds: Tuple = CLERMONT_FERRAND_BOUNDS,
+    ) -> np.ndarray:
+        """
+        Interpolates sensor values over the grid.
+
+        Sensors without a value (NaN or absent from `values`) are skipped:
+        "nearest" takes the closest sensor with a value among the k nearest,
+        "idw" weights those by 1 / distance**power.
+
+        Args:
+            values (pd.Series): Values indexed by sensor ID.
+            resolution (float): Cell size in metres.
+            method (str): "idw" or "nearest".
+            k (int): Neighbours considered per cell.
+            power (float): IDW power.
+            bounds (Tuple): (lat min, lat max, lon min, lon max) of the grid.
+
+        Returns:
+            np.ndarray: Grid of shape (n_lat, n_lon); NaN where no neighbour has a value.
+        """
+        if len(self) == 0:  # no neighbour to search for
+            lats, lons = self.grid_axes(resolution, bounds)
+            return np.full((len(lats), len(lons)), np.nan)
+        lats, lons, distances, idx = self._grid_neighbours(resolution, bounds, k)
+        shape = (len(lats), len(lons))
+
+        sensor_values = values.reindex(self.sensor_ids).to_numpy(dtype=float)
+        neighbours = sensor_values[idx]
+        known = ~np.isnan(neighbours)
+
+        if method == "nearest":
+            first = np.argmax(known, axis=1)
+            grid = np.take_along_axis(neighbours, first[:, None], axis=1)[:, 0]
+        elif method == "idw":
+            # Distances are floored at 1 m (no division by zero on a sensor)
+            weights = np.where(known, 1.0 / np.maximum(distances, 1.0) ** power, 0.0)
+            total = weights.sum(axis=1)
+            weighted = (weights * np.where(known, neighbours, 0.0)).sum(axis=1)
+            grid = np.divide(weighted, total, out=np.full(len(total), np.nan), where=total > 0)
+        else:
+            raise ValueError(f"Unknown interpolation method: '{method}'")
+        return grid.reshape(shape)
+
+    def grid(
+        self,
+        timestamp,
+        values: pd.Series,
+        resolution: float = GRID_RESOLUTION,
+        method: str = "idw",
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        `interpolate`, cached by (timestamp, resolution, method).
+
+        `timestamp` may be any hashable key; the values under a key are assumed
+        not to change. When the data behind them can be reloaded (e.g. a
+        partial last hour), include its version in the key, e.g.
+        `(data_version, hour)`, or call `clear()` on reload.
+        """
+        key = (timestamp, resolution, method, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key in self._grids:
+                self._grids.move_to_end(key)
+                return self._grids[key]
+        grid = self.interpolate(values, resolution, method, **kwargs)
+        with self._lock:
+            self._grids[key] = grid
+            while len(self._grids) > self.max_grids:
+                self._grids.popitem(last=False)
+        return grid
+
+    def grid_frame(
+        self,
+        grid: np.ndarray,
+        resolution: float = GRID_RESOLUTION,
+        bounds: Tuple = CLERMONT_FERRAND_BOUNDS,
+    ) -> pd.DataFrame:
+        """Cells of a grid as rows ('latitude', 'longitude', 'value'), NaN cells dropped."""
+        lats, lons = self.grid_axes(resolution, bounds)
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+        known = ~np.isnan(grid)
+        return pd.DataFrame(
+            {"latitude": lat_grid[known], "longitude": lon_grid[known], "value": grid[known]}
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._grids.clear()
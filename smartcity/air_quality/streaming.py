@@ -0,0 +1,186 @@
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from openaq import OpenAQ
+
+from smartcity import logger
+from smartcity.config import STREAM_MEMORY_BUDGET_MB
+from smartcity.database import (
+    UNIQUE_MEASUREMENT,
+    bulk_load_available,
+    bulk_upsert,
+    upsert_measurements,
+)
+from smartcity.air_quality.openaq_api import iter_sensor_pages, make_client
+from smartcity.air_quality.rate_limit import (
+    OPENAQ_REQUESTS_PER_MINUTE,
+    AdaptiveRateLimiter,
+    RateLimiter,
+)
+from smartcity.air_quality.response_cache import ResponseCache, get_response_cache
+from smartcity.air_quality.validation import validate_and_quarantine
+
+MEMORY_BUDGET = int(STREAM_MEMORY_BUDGET_MB * 1024 * 1024)
+KEY_COLUMNS = UNIQUE_MEASUREMENT.split(",")
+
+
+def iter_measurement_pages(
+    client: OpenAQ,
+    sensor_ids: Iterable[int],
+    date_from: str,
+    date_to: str,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields OpenAQ measurement pages of every sensor, tagged with 'sensor_id' and
+    'updated_at'. Pages of a sensor are contiguous; nothing is kept once yielded.
+    """
+    for sensor_id in sensor_ids:
+        for df in iter_sensor_pages(
+            client, sensor_id, date_from, date_to, cache=cache, limiter=limiter
+        ):
+            df = df.copy()  # cached pages are shared
+            df["sensor_id"] = sensor_id
+            df["updated_at"] = datetime.now().isoformat()
+            yield df
+
+
+def drop_duplicate_measurements(
+    frames: Iterable[pd.DataFrame], key_columns: List[str] = KEY_COLUMNS
+) -> Iterator[pd.DataFrame]:
+    """
+    Removes rows whose upsert key was already seen, across pages.
+
+    Only the 64-bit hashes of the current sensor's keys are kept: as pages of
+    a sensor arrive contiguously and 'sensor_id' is part of the key, the set is
+    reset whenever the sensor changes, so its size is bounded by one sensor window.
+    """
+    sensor_id = None
+    seen = np.empty(0, dtype=np.uint64)
+    for df in frames:
+        if df["sensor_id"].iat[0] != sensor_id:
+            sensor_id = df["sensor_id"].iat[0]
+            seen = np.empty(0, dtype=np.uint64)
+
+        hashes = pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, seen)
+        seen = np.concatenate([seen, hashes[keep]])
+        if keep.any():
+            yield df[keep] if not keep.all() else df
+
+
+def batch_by_memory(
+    frames: Iterable[pd.DataFrame], max_bytes: int = MEMORY_BUDGET
+) -> Iterator[pd.DataFrame]:
+    """
+    Groups consecutive frames into batches of at most about `max_bytes`
+    (pandas deep memory usage). A single frame larger than the budget is split.
+    """
+    buffered: List[pd.DataFrame] = []
+    size = 0
+    for df in frames:
+        frame_bytes = int(df.memory_usage(index=False, deep=True).sum())
+        if buffered and size + frame_bytes > max_bytes:
+            yield pd.concat(buffered, ignore_index=True)
+            buffered, size = [], 0
+
+        if frame_bytes > max_bytes:
+            rows = max(1, int(len(df) * max_bytes / frame_bytes))
+            for start in range(0, len(df), rows):
+                yield df.iloc[start : start + rows].reset_index(drop=True)
+            continue
+
+        buffered.append(df)
+        size += frame_bytes
+
+    if buffered:
+        yield pd.concat(buffered, ignore_index=True)
+
+
+def default_loader() -> Callable[[pd.DataFrame], object]:
+    """`bulk_upsert` (COPY) when a direct connection is configured, PostgREST otherwise."""
+    if bulk_load_available():
+        return bulk_upsert
+    return lambda df: upsert_measurements(df, return_records=False)
+
+
+def load_stream(
+    frames: Iterable[pd.DataFrame],
+    max_bytes: int = MEMORY_BUDGET,
+    loader: Optional[Callable[[pd.DataFrame], object]] = None,
+    on_batch: Optional[Callable[[pd.DataFrame], object]] = None,
+) -> dict:
+    """
+    Runs pages through dedup → memory-bounded batching → validation → upsert.
+    Invalid rows are quarantined (see `validate_and_quarantine`) instead of
+    failing the batch.
+
+    At most one batch (about `max_bytes`) plus the page being read is held in
+    memory at any time, whatever the number of sensors or days. `on_batch` is
+    called with every loaded batch (e.g. `AnomalyDetector.update`).
+
+    Returns:
+        dict: Counts of loaded 'rows', quarantined 'rejected' rows and upsert 'batches'.
+    """
+    loader = loader or default_loader()
+    summary = {"rows": 0, "rejected": 0, "batches": 0}
+    for batch in batch_by_memory(drop_duplicate_measurements(frames), max_bytes):
+        clean = validate_and_quarantine(batch)
+        summary["rejected"] += len(batch) - len(clean)
+        if clean.empty:
+            continue
+        loader(clean)
+        if on_batch is not None:
+            on_batch(clean)
+        summary["rows"] += len(clean)
+        summary["batches"] += 1
+        logger.debug("> Streamed batch %d (%d rows).", summary["batches"], len(clean))
+    return summary
+
+
+def stream_openaq_data(
+    sensor_ids: List[int],
+    date_from: str,
+    date_to: str,
+    max_bytes: int = MEMORY_BUDGET,
+    on_batch: Optional[Callable[[pd.DataFrame], object]] = None,
+    requests_per_minute: float = OPENAQ_REQUESTS_PER_MINUTE,
+) -> dict:
+    """
+    Streaming counterpart of `fetch_openaq_data` + `upsert_measurements`:
+    measurements go from OpenAQ to the database page by page, without
+    materialising the whole window.
+
+    Args:
+        sensor_ids (List[int]): Sensors to load.
+        date_from (str): Window start.
+        date_to (str): Window end.
+        max_bytes (int): Memory budget of the upsert batches.
+        on_batch (Callable, optional): Called with every loaded batch.
+        requests_per_minute (float): OpenAQ request budget of this call; lower
+            it when several calls share the API key (see `shard_request_budget`).
+
+    Returns:
+        dict: Counts of loaded 'rows', quarantined 'rejected' rows and upsert 'batches'.
+    """
+    client: OpenAQ = make_client()
+    cache = get_response_cache()
+    burst = max(1, round(10 * requests_per_minute / OPENAQ_REQUESTS_PER_MINUTE))
+    limiter = AdaptiveRateLimiter(requests_per_minute, burst=burst)
+    logger.info(
+        f"Streaming '{len(sensor_ids)}' sensors from '{date_from}' to '{date_to}' "
+        f"(memory budget {max_bytes / 1024 / 1024:.0f} MB) ..."
+    )
+    try:
+        pages = iter_measurement_pages(client, sensor_ids, date_from, date_to, cache, limiter)
+        summary = load_stream(pages, max_bytes, on_batch=on_batch)
+    finally:
+        client.close()
+
+    logger.info(f"Streamed '{summary['rows']}' measurements in {summary['batches']} batches.")
+    if cache is not None:
+        logger.info(f"OpenAQ cache: {cache.hits} hits, {cache.misses} misses.")
+    return summary
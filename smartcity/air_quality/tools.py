@@ -1,7 +1,9 @@
 import pandas as pd
 from smartcity import logger
+from smartcity.profiling import profiled
 
 
+@profiled()
 def clean_locations(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans and flattens a DataFrame of OpenAQ location objects.
@@ -0,0 +1,147 @@
+import json
+import os
+from datetime import datetime
+from typing import Tuple
+
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import CACHE_DIR, TABLE_NAME_QUARANTINE
+from smartcity.database import load_to_supabase
+
+REQUIRED_COLUMNS = [
+    "sensor_id",
+    "parameter_name",
+    "parameter_units",
+    "value",
+    "datetime_from",
+    "datetime_to",
+]
+
+# Units reported by OpenAQ, with the range of plausible values
+UNIT_RANGES = {
+    "µg/m³": (0.0, 10_000.0),
+    "mg/m³": (0.0, 10_000.0),
+    "ppm": (0.0, 1_000.0),
+    "ppb": (0.0, 1_000_000.0),
+    "particles/cm³": (0.0, 10_000_000.0),
+    "°C": (-80.0, 70.0),
+    "%": (0.0, 100.0),
+    "hPa": (800.0, 1_100.0),
+    "m/s": (0.0, 120.0),
+    "deg": (0.0, 360.0),
+}
+
+
+def validate_measurements(data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Splits measurements into rows safe to upsert and rows to quarantine.
+
+    Every check runs on whole columns at once:
+    - missing 'sensor_id', 'parameter_name' or 'value', non-numeric value;
+    - unknown unit (not in `UNIT_RANGES`) or value outside the unit's range;
+    - unparsable datetimes, or 'datetime_from' after 'datetime_to'.
+
+    Args:
+        data (pd.DataFrame): Measurements, as produced by `flatten_measurements`
+            plus 'sensor_id'.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The valid rows (unchanged), and the
+            invalid rows with a 'reason' column ("; "-separated failed checks).
+
+    Raises:
+        ValueError: If a required column is missing (the whole frame is unusable).
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in data.columns]
+    if missing:
+        raise ValueError(f"Measurements are missing columns: {missing}")
+    if data.empty:
+        return data, data.assign(reason=pd.Series(dtype=str))
+
+    value = pd.to_numeric(data["value"], errors="coerce")
+    units = data["parameter_units"]
+    low = units.map({unit: bounds[0] for unit, bounds in UNIT_RANGES.items()})
+    high = units.map({unit: bounds[1] for unit, bounds in UNIT_RANGES.items()})
+    date_from = pd.to_datetime(data["datetime_from"], errors="coerce", utc=True, format="ISO8601")
+    date_to = pd.to_datetime(data["datetime_to"], errors="coerce", utc=True, format="ISO8601")
+
+    checks = pd.DataFrame(
+        {
+            "missing sensor_id": data["sensor_id"].isna(),
+            "missing parameter_name": data["parameter_name"].isna(),
+            "missing value": data["value"].isna(),
+            "non-numeric value": value.isna() & data["value"].notna(),
+            "unknown unit": low.isna(),
+            "value out of range": (value < low) | (value > high),
+            "invalid datetime": date_from.isna() | date_to.isna(),
+            "datetime_from after datetime_to": date_from > date_to,
+        },
+        index=data.index,
+    )
+    invalid = checks.any(axis=1).to_numpy()
+    if not invalid.any():
+        return data, data.iloc[0:0].assign(reason=pd.Series(dtype=str))
+
+    # Boolean matrix · check names = the names of the failed checks, concatenated
+    failed = checks[invalid]
+    reasons = failed.dot(failed.columns + "; ").str.rstrip("; ")
+    rejected = data[invalid].assign(reason=reasons)
+    return data[~invalid], rejected
+
+
+def quarantine_measurements(
+    rejected: pd.DataFrame,
+    table_name: str = TABLE_NAME_QUARANTINE,
+    fallback_dir: str = os.path.join(CACHE_DIR, "quarantine"),
+) -> str:
+    """
+    Stores rejected rows with their reasons, for inspection.
+
+    Rows go to `table_name` (see sql/measurement_quarantine.sql) as the raw
+    record (JSON) + sensor and reason. If the table cannot be written, they are
+    appended to a local JSONL file instead, so rejects are never lost.
+
+    Returns:
+        str: Where the rows were written (table name or file path).
+    """
+    quarantined_at = datetime.now().isoformat()
+    # Rejects are few: a row-wise round trip through json is fine here
+    records = rejected.drop(columns="reason").astype(object)
+    records = records.where(records.notna(), None).to_dict(orient="records")
+    payload = pd.DataFrame(
+        {
+            "sensor_id": pd.to_numeric(rejected["sensor_id"], errors="coerce").astype("Int64"),
+            "reason": rejected["reason"].to_numpy(),
+            "record": [json.loads(json.dumps(r, default=str)) for r in records],
+            "quarantined_at": quarantined_at,
+        }
+    )
+
+    try:
+        load_to_supabase(payload, table_name)
+        return table_name
+    except Exception as e:
+        logger.warning(f"Quarantine table '{table_name}' unavailable ({e}), writing to disk.")
+
+    os.makedirs(fallback_dir, exist_ok=True)
+    path = os.path.join(fallback_dir, f"{table_name}.jsonl")
+    payload.to_json(path, orient="records", lines=True, force_ascii=False, mode="a")
+    return path
+
+
+def validate_and_quarantine(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Runs `validate_measurements` and quarantines the rejected rows.
+
+    Returns:
+        pd.DataFrame: The valid rows, ready for `upsert_measurements`.
+    """
+    clean, rejected = validate_measurements(data)
+    if not rejected.empty:
+        destination = quarantine_measurements(rejected)
+        logger.warning(
+            f"> Quarantined '{len(rejected)}' invalid measurements to '{destination}': "
+            f"{rejected['reason'].value_counts().to_dict()}"
+        )
+    return clean
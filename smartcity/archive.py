@@ -0,0 +1,240 @@
+import glob
+import io
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pandas as pd
+from supabase import Client, create_client
+
+from smartcity import logger
+from smartcity.config import (
+    ARCHIVE_BUCKET,
+    ARCHIVE_DIR,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+    TABLE_NAME_MEASUREMENTS,
+)
+from smartcity.database import UNIQUE_MEASUREMENT, read_db_between_dates
+
+try:
+    import duckdb
+except ImportError:  # optional: pip install "smartcity[archive]"
+    duckdb = None
+
+PARTITION_FILE = "part-0.parquet"
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 16_384
+
+
+def partition_path(table_name: str, day: str) -> str:
+    """Relative path of a day partition (Hive layout: `<table>/day=YYYY-MM-DD/`)."""
+    return f"{table_name}/day={day}/{PARTITION_FILE}"
+
+
+class _Storage:
+    """Partition files on local disk, mirrored to a Supabase Storage bucket if one is set."""
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR, bucket: str = ARCHIVE_BUCKET):
+        self.archive_dir = archive_dir
+        self.bucket = bucket
+        self._client: Optional[Client] = None
+
+    @property
+    def client(self) -> Client:
+        if self._client is None:
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                raise ValueError("Supabase credentials not found in environment variables.")
+            self._client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return self._client
+
+    def local(self, path: str) -> str:
+        return os.path.join(self.archive_dir, path)
+
+    def download(self, path: str) -> Optional[bytes]:
+        """Content of a partition in the bucket (None if absent or no bucket)."""
+        if not self.bucket:
+            return None
+        try:
+            return self.client.storage.from_(self.bucket).download(path)
+        except Exception:
+            return None  # not archived yet
+
+    def read(self, path: str) -> Optional[pd.DataFrame]:
+        if os.path.exists(self.local(path)):
+            return pd.read_parquet(self.local(path))
+        content = self.download(path)
+        return pd.read_parquet(io.BytesIO(content)) if content is not None else None
+
+    def write_local(self, path: str, content: bytes) -> None:
+        local_path = self.local(path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(f"{local_path}.tmp", "wb") as f:
+            f.write(content)
+        os.replace(f"{local_path}.tmp", local_path)
+
+    def write(self, path: str, content: bytes) -> None:
+        self.write_local(path, content)
+        if self.bucket:
+            self.client.storage.from_(self.bucket).upload(
+                path=path,
+                file=content,
+                file_options={"upsert": "true", "content-type": "application/vnd.apache.parquet"},
+            )
+
+
+def to_parquet_bytes(data: pd.DataFrame) -> bytes:
+    """Compressed Parquet, with row groups small enough for min/max pruning."""
+    buffer = io.BytesIO()
+    data.to_parquet(buffer, index=False, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    return buffer.getvalue()
+
+
+def archive_expired_days(
+    days: int = 61,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    date_column: str = "datetime_from",
+    key: str = UNIQUE_MEASUREMENT,
+    archive_dir: str = ARCHIVE_DIR,
+    bucket: str = ARCHIVE_BUCKET,
+) -> List[str]:
+    """
+    Exports the rows a `days`-day retention is about to delete as one
+    compressed Parquet file per day, before `delete_old_measurements` runs.
+
+    Rows are read up to one day past the retention cutoff, so nothing is
+    deleted unarchived even if the delete runs later than the export. A day
+    exported twice is merged with its existing partition (deduplicated on
+    `key`), so re-runs are idempotent. Rows are sorted by the key columns,
+    which keeps the Parquet min/max statistics selective (e.g. on 'sensor_id').
+
+    Args:
+        days (int): Retention of the table, in days.
+        table_name (str): Table to archive.
+        date_column (str): Timestamp column the retention applies to.
+        key (str): Comma-separated unique key of the table.
+        archive_dir (str): Local archive root.
+        bucket (str): Supabase Storage bucket the partitions are also uploaded to.
+
+    Returns:
+        List[str]: Partition paths written (relative to the archive root).
+
+    Raises:
+        RuntimeError: If a partition does not read back with the expected row count
+            (the retention delete must not run then).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days - 1)
+    rows = read_db_between_dates(
+        table_name, date_column, "1970-01-01 00:00:00", cutoff.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    if rows.empty:
+        logger.info(f"Nothing to archive in '{table_name}' (cutoff {cutoff:%Y-%m-%d %H:%M}).")
+        return []
+
+    storage = _Storage(archive_dir, bucket)
+    key_columns = key.split(",")
+    timestamps = pd.to_datetime(rows[date_column], utc=True, format="ISO8601")
+    days_of_rows = timestamps.dt.strftime("%Y-%m-%d")
+    written = []
+    for day, group in rows.groupby(days_of_rows.to_numpy(), sort=True):
+        path = partition_path(table_name, day)
+        existing = storage.read(path)
+        if existing is not None:
+            group = pd.concat([existing, group], ignore_index=True)
+        group = group.drop_duplicates(key_columns, keep="last")
+        group = group.sort_values(key_columns, ignore_index=True)
+
+        storage.write(path, to_parquet_bytes(group))
+        if len(pd.read_parquet(storage.local(path), columns=key_columns[:1])) != len(group):
+            raise RuntimeError(f"Archive partition '{path}' did not read back correctly.")
+        written.append(path)
+
+    logger.info(
+        f"Archived {len(rows)} rows of '{table_name}' into {len(written)} day partitions"
+        f"{f' (bucket {bucket!r})' if bucket else ''}."
+    )
+    return written
+
+
+def sync_archive(
+    start_date: str,
+    end_date: str,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    archive_dir: str = ARCHIVE_DIR,
+    bucket: str = ARCHIVE_BUCKET,
+) -> int:
+    """Downloads the bucket's day partitions in [start_date, end_date] missing locally."""
+    if not bucket:
+        return 0
+    storage = _Storage(archive_dir, bucket)
+    downloaded = 0
+    for day in pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d"):
+        path = partition_path(table_name, day)
+        if os.path.exists(storage.local(path)):
+            continue
+        content = storage.download(path)
+        if content is not None:
+            storage.write_local(path, content)
+            downloaded += 1
+    return downloaded
+
+
+def scan_archive(
+    start_date: str,
+    end_date: str,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    columns: Optional[List[str]] = None,
+    filters: Optional[dict] = None,
+    archive_dir: str = ARCHIVE_DIR,
+) -> pd.DataFrame:
+    """
+    Reads archived rows of days in [start_date, end_date] (inclusive, 'YYYY-MM-DD').
+
+    Runs in-process on the Parquet files, never on Postgres: DuckDB (or pyarrow
+    if DuckDB is not installed) prunes day partitions from the directory names,
+    reads only `columns` and skips row groups whose min/max statistics exclude
+    the `filters`. With a bucket, call `sync_archive` first.
+
+    Args:
+        start_date (str): First day.
+        end_date (str): Last day.
+        table_name (str): Archived table.
+        columns (List[str], optional): Columns to read (default: all).
+        filters (dict, optional): Equality (scalar) or membership (list) filters,
+            e.g. {"sensor_id": [101, 102], "parameter_name": "no2"}.
+        archive_dir (str): Local archive root.
+
+    Returns:
+        pd.DataFrame: Matching rows (with the partition 'day' column when
+            `columns` is not given).
+    """
+    files = glob.glob(os.path.join(archive_dir, table_name, "day=*", "*.parquet"))
+    if not files:
+        return pd.DataFrame(columns=columns or [])
+    filters = filters or {}
+
+    if duckdb is not None:
+        conditions, params = ["day BETWEEN ? AND ?"], [start_date, end_date]
+        for column, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            conditions.append(f'"{column}" IN ({", ".join("?" for _ in values)})')
+            params.extend(values)
+        selected = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        source = os.path.join(archive_dir, table_name, "*", "*.parquet")
+        query = (
+            f"SELECT {selected} FROM read_parquet("
+            f"?, hive_partitioning = true, hive_types = {{'day': VARCHAR}}) "
+            f"WHERE {' AND '.join(conditions)}"
+        )
+        with duckdb.connect() as con:
+            return con.execute(query, [source] + params).df()
+
+    predicates = [("day", ">=", start_date), ("day", "<=", end_date)]
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            predicates.append((column, "in", list(value)))
+        else:
+            predicates.append((column, "==", value))
+    return pd.read_parquet(
+        os.path.join(archive_dir, table_name), columns=columns, filters=predicates
+    )
@@ -1,3 +1,5 @@
+import os
+
 from dotenv import load_dotenv
 from smartcity.utils import get_secret
 
@@ -11,7 +13,56 @@ load_dotenv()
 OPENAQ_API_KEY = get_secret("openaq-api-key", "OPENAQ_API_KEY")
 SUPABASE_URL = get_secret("supabase-url", "SUPABASE_URL")
 SUPABASE_KEY = get_secret("supabase-key", "SUPABASE_KEY")
+# Optional direct Postgres connection string, used for bulk COPY loads
+SUPABASE_DB_URL = get_secret("supabase-db-url", "SUPABASE_DB_URL", required=False)
 
 TABLE_NAME_LOCATIONS = "openaq_locations"
 TABLE_NAME_MEASUREMENTS = "openaq_measurements"
+TABLE_NAME_QUARANTINE = "openaq_measurements_quarantine"
+TABLE_NAME_ANOMALY_STATE = "openaq_anomaly_state"
+TABLE_NAME_ANOMALIES = "openaq_anomalies"
+TABLE_NAME_SHARDS = "openaq_ingestion_shards"
+TABLE_NAME_WEATHER = "weather_hourly"
+TABLE_NAME_DATA_VERSIONS = "smartcity_data_versions"
+
+# Gzip JSON request bodies sent to PostgREST (the API gateway must accept
+# `Content-Encoding: gzip`)
+GZIP_REQUESTS = os.getenv("SMARTCITY_GZIP_REQUESTS", "").lower() in ("1", "true", "yes")
+
+# Streaming ETL: memory budget (MB) of the rows buffered between fetch and upsert
+STREAM_MEMORY_BUDGET_MB = float(os.getenv("SMARTCITY_STREAM_MEMORY_MB", "32"))
+
+# Open-Meteo forecast endpoint (override to point the weather ETL at another server)
+OPEN_METEO_URL = os.getenv("SMARTCITY_OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Local cache directory (location catalogue, API responses, ...)
+CACHE_DIR = os.getenv("SMARTCITY_CACHE_DIR", ".cache")
+
+# On-disk insight index (RAG): append-only, memory-mapped segments
+INSIGHT_INDEX_DIR = os.getenv("SMARTCITY_INSIGHT_INDEX_DIR", os.path.join(CACHE_DIR, "insights"))
+
+# Columnar archive of expired days (Parquet): local directory, and optional
+# Supabase Storage bucket the partitions are uploaded to
+ARCHIVE_DIR = os.getenv("SMARTCITY_ARCHIVE_DIR", os.path.join(CACHE_DIR, "archive"))
+ARCHIVE_BUCKET = os.getenv("SMARTCITY_ARCHIVE_BUCKET", "")
+
+# Shared cache of `smartcity.database` reads: memory bound (MB, 0 disables it)
+# and time-to-live per table, in seconds (tables not listed are never cached:
+# the location catalogue and the flow state tables have their own versioning)
+QUERY_CACHE_MB = float(os.getenv("SMARTCITY_QUERY_CACHE_MB", "64"))
+QUERY_CACHE_TTLS = {
+    TABLE_NAME_MEASUREMENTS: float(os.getenv("SMARTCITY_QUERY_CACHE_TTL", "300")),
+    TABLE_NAME_WEATHER: float(os.getenv("SMARTCITY_QUERY_CACHE_TTL_WEATHER", "900")),
+}
+
+# Profiling of the hot paths (`smartcity.profiling`): "" (off), "timing",
+# "cprofile" or "sampling"; dumps are written next to the logs and uploaded with them
+PROFILE_MODE = os.getenv("SMARTCITY_PROFILE", "").lower()
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("SMARTCITY_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("SMARTCITY_PROFILE_DIR", os.path.join("logs", "profiles"))
+
+# Dashboard: seconds between two polls of the ETL's data-version markers
+DATASET_REFRESH_INTERVAL = float(os.getenv("SMARTCITY_DATASET_REFRESH_SECONDS", "60"))
 
+# Dashboard: request only server-side aggregates (see sql/measurement_aggregates.sql)
+DASHBOARD_AGGREGATED = os.getenv("SMARTCITY_DASHBOARD_AGGREGATED", "").lower() in ("1", "true", "yes")
@@ -1,16 +1,236 @@
+import functools
+import gzip
+import io
+import json
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
 import pandas as pd
-from datetime import datetime, timedelta
+import requests
+from datetime import datetime, timedelta, timezone
+from postgrest import APIError as PostgrestAPIError
 from supabase import create_client, Client
-from smartcity.config import SUPABASE_URL, SUPABASE_KEY, TABLE_NAME_MEASUREMENTS
-from smartcity import logger, LOG_FILE_PATH
+from smartcity.config import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    SUPABASE_DB_URL,
+    TABLE_NAME_MEASUREMENTS,
+    TABLE_NAME_DATA_VERSIONS,
+    GZIP_REQUESTS,
+    QUERY_CACHE_MB,
+    QUERY_CACHE_TTLS,
+)
+from smartcity import logger, flush_logs, LOG_FILE_PATH
+from smartcity.profiling import profiled
+
+try:  # Optional: direct Postgres connection for bulk loads
+    import psycopg
+    from psycopg import sql
+except ImportError:  # pragma: no cover
+    psycopg = None
 
 UNIQUE_MEASUREMENT = (
     "parameter_name,parameter_units,datetime_from,datetime_to,sensor_id"
 )
 
 
+class QueryCache:
+    """
+    Result cache of the read functions, shared by every caller of the process.
+
+    Entries are keyed by table, columns, filters and range, expire after the
+    table's time-to-live, and the least recently used ones are evicted past
+    `max_bytes` (DataFrame deep memory usage). Writes through this module
+    invalidate the table they touch; call `invalidate` after writing by other
+    means. Frames are copied in and out, so callers may modify them.
+
+    Args:
+        max_bytes (int): Memory bound of the cached frames.
+        ttls (dict): Table → time-to-live in seconds.
+        default_ttl (float): Time-to-live of the other tables (0: not cached).
+    """
+
+    def __init__(self, max_bytes: int, ttls: Optional[dict] = None, default_ttl: float = 0):
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires at, size, frame)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(table: str, columns: str = "*", filters: Optional[dict] = None, range_=None) -> tuple:
+        """Hashable key of a query; list filter values are order-insensitive."""
+        items = []
+        for column, value in sorted((filters or {}).items()):
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(sorted(value, key=str))
+            items.append((column, value))
+        return (table, columns, tuple(items), range_)
+
+    def ttl(self, table: str) -> float:
+        return self.ttls.get(table, self.default_ttl)
+
+    def _drop(self, key: tuple) -> None:
+        self._bytes -= self._entries.pop(key)[1]
+
+    def get(self, key: tuple) -> Optional[pd.DataFrame]:
+        """A copy of the cached result, or None (miss, expired or table not cached)."""
+        if self.ttl(key[0]) <= 0 or self.max_bytes <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2].copy()
+
+    def put(self, key: tuple, data: pd.DataFrame) -> None:
+        ttl = self.ttl(key[0])
+        size = int(data.memory_usage(deep=True).sum())
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, data.copy())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, table: Optional[str] = None) -> int:
+        """Drops the entries of `table` (all entries if None); returns how many."""
+        with self._lock:
+            keys = [k for k in self._entries if table is None or k[0] == table]
+            for key in keys:
+                self._drop(key)
+        if keys:
+            logger.debug("Query cache: %d entries of '%s' invalidated.", len(keys), table or "*")
+        return len(keys)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+query_cache = QueryCache(int(QUERY_CACHE_MB * 1024 * 1024), QUERY_CACHE_TTLS)
+
+
+def cached_query(key: Callable[..., tuple]):
+    """
+    Serves a read function from `query_cache`; `key` maps the function's
+    arguments to a `QueryCache.key`.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query = key(*args, **kwargs)
+            cached = query_cache.get(query)
+            if cached is not None:
+                logger.debug("Query cache hit on '%s'.", query[0])
+                return cached
+            data = func(*args, **kwargs)
+            query_cache.put(query, data)
+            return data
+
+        return wrapper
+
+    return decorator
+
+
+def encode_records(data: pd.DataFrame, compress: bool = False) -> bytes:
+    """
+    Serializes a DataFrame to a JSON array of records, ready to be sent as a request body.
+
+    pandas' C JSON encoder reads the columns directly, so no intermediate
+    per-row dicts are built (unlike `to_dict(orient="records")` + `json.dumps`).
+    NaN/None become null and datetimes ISO-8601 strings.
+
+    Args:
+        data (pd.DataFrame): Rows to encode.
+        compress (bool): Gzip the encoded body.
+
+    Returns:
+        bytes: The (optionally gzip-compressed) UTF-8 JSON body.
+    """
+    body = data.to_json(
+        orient="records", date_format="iso", date_unit="s", force_ascii=False
+    ).encode("utf-8")
+    if compress:
+        body = gzip.compress(body, compresslevel=5)
+    return body
+
+
+def _post_records(
+    table_name: str,
+    data: pd.DataFrame,
+    on_conflict: str = "",
+    return_records: bool = True,
+    compress: Optional[bool] = None,
+    timeout: float = 120,
+) -> list[dict]:
+    """
+    Inserts (or upserts, if `on_conflict` is set) rows through the PostgREST
+    endpoint with a pre-encoded body (see `encode_records`).
+    The body is gzipped when `compress` is True (default: `GZIP_REQUESTS`).
+
+    Returns:
+        list[dict]: The rows returned by PostgREST, or [] if `return_records` is False.
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("Supabase credentials not found in environment variables.")
+
+    if compress is None:
+        compress = GZIP_REQUESTS
+    prefer = ["return=representation" if return_records else "return=minimal"]
+    params = {}
+    if on_conflict:
+        prefer.append("resolution=merge-duplicates")
+        params["on_conflict"] = on_conflict
+    headers = {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Content-Type": "application/json",
+        "Prefer": ",".join(prefer),
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    response = requests.post(
+        f"{SUPABASE_URL.rstrip('/')}/rest/v1/{table_name}",
+        params=params,
+        headers=headers,
+        data=encode_records(data, compress=compress),
+        timeout=timeout,
+    )
+    query_cache.invalidate(table_name)
+    if not response.ok:
+        raise requests.HTTPError(
+            f"{response.status_code} from '{table_name}': {response.text}", response=response
+        )
+    return response.json() if return_records else []
+
+
 def load_to_supabase(df: pd.DataFrame, table_name: str) -> None:
     """
     Loads a pandas DataFrame into a specified Supabase table.
@@ -28,28 +248,31 @@ def load_to_supabase(df: pd.DataFrame, table_name: str) -> None:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credentials not found in environment variables.")
 
-        # Initialize the Supabase client
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-        # Convert the DataFrame to a list of dictionaries, which is the format
-        # required by Supabase's insert method.
-        data = df.to_dict(orient="records")
-        response = supabase.table(table_name).insert(data).execute()
-        logger.info(
-            f"Successfully loaded {len(response.data)} records into '{table_name}'."
-        )
+        # The body is encoded straight from the columns (no per-row dicts).
+        _post_records(table_name, df, return_records=False)
+        logger.info(f"Successfully loaded {len(df)} records into '{table_name}'.")
 
     except Exception as e:
         logger.error(f"Error loading data to Supabase: {e}")
         raise e
 
 
+# Postgres "undefined table", and PostgREST's "table not in the schema cache"
+MISSING_TABLE_CODES = ("42P01", "PGRST205")
+
+
+def is_missing_table(error: Exception) -> bool:
+    """True if `error` is the Supabase answer for a table that does not exist."""
+    return isinstance(error, PostgrestAPIError) and error.code in MISSING_TABLE_CODES
+
+
+@cached_query(lambda table_name: QueryCache.key(table_name))
 def read_db(table_name: str) -> pd.DataFrame:
     """ "Retrieves all records from a specified Supabase table and returns them as a pandas DataFrame."""
     try:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credentials not found in environment variables.")
-        logger.debug(f"Retrieving all data from Supabase table '{table_name}' ...")
+        logger.debug("Retrieving all data from Supabase table '%s' ...", table_name)
 
         supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         logger.debug(">>> Supabase client initialized.")
@@ -68,7 +291,134 @@ def read_db(table_name: str) -> pd.DataFrame:
         raise e
 
 
-def upsert_measurements(data: pd.DataFrame) -> list[dict]:
+@cached_query(lambda table_name, filters, batch_size=1000: QueryCache.key(table_name, filters=filters))
+def read_db_where(table_name: str, filters: dict, batch_size: int = 1000) -> pd.DataFrame:
+    """
+    Retrieves the rows of a table matching equality filters, page by page.
+
+    Args:
+        table_name (str): Table to read.
+        filters (dict): Column → value; a list or tuple value matches any of its items.
+        batch_size (int): Rows per request.
+
+    Returns:
+        pd.DataFrame: Matching rows (empty if none).
+    """
+    try:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("Supabase credentials not found in environment variables.")
+
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        rows = []
+        start = 0
+        while True:
+            query = supabase.table(table_name).select("*")
+            for column, value in filters.items():
+                if isinstance(value, (list, tuple)):
+                    query = query.in_(column, list(value))
+                else:
+                    query = query.eq(column, value)
+            response = query.range(start, start + batch_size - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < batch_size:
+                break
+            start += batch_size
+
+        logger.debug("Retrieved '%d' rows from '%s' where %s.", len(rows), table_name, filters)
+        return pd.DataFrame(rows)
+
+    except Exception as e:
+        logger.error(f"Error retrieving filtered data from '{table_name}': {e}")
+        raise e
+
+
+def read_table_version(table_name: str, version_column: str = "updated_at") -> str:
+    """
+    Returns a cheap version tag for a table: its row count and latest `version_column`.
+
+    Only one row is transferred, so callers can poll it to decide whether a
+    cached copy of the table is still current.
+
+    Args:
+        table_name (str): The Supabase table.
+        version_column (str): A timestamp column bumped on every write.
+
+    Returns:
+        str: A tag of the form "<row count>:<max version_column>".
+    """
+    try:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("Supabase credentials not found in environment variables.")
+
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        response = (
+            supabase.table(table_name)
+            .select(version_column, count="exact")  # type: ignore
+            .order(version_column, desc=True)
+            .limit(1)
+            .execute()
+        )
+        latest = response.data[0][version_column] if response.data else None
+        version = f"{response.count}:{latest}"
+        logger.debug("Table '%s' version: %s", table_name, version)
+        return version
+
+    except Exception as e:
+        logger.error(f"Error retrieving version of '{table_name}': {e}")
+        raise e
+
+
+def publish_data_version(dataset: str, version: str = "") -> str:
+    """
+    Records that `dataset` (usually a table name) changed, for caches to pick up.
+
+    The ETL flows call it once their writes are done; the dashboard polls the
+    markers with `read_data_versions` and reloads only the datasets whose
+    version moved.
+
+    Args:
+        dataset (str): Name of the dataset that changed.
+        version (str): New version tag (default: the current UTC time).
+
+    Returns:
+        str: The published version.
+    """
+    version = version or datetime.now(timezone.utc).isoformat()
+    marker = pd.DataFrame(
+        [{"dataset": dataset, "version": version, "updated_at": datetime.now(timezone.utc).isoformat()}]
+    )
+    upsert_rows(marker, TABLE_NAME_DATA_VERSIONS, on_conflict="dataset")
+    return version
+
+
+def read_data_versions() -> dict:
+    """
+    Current data-version markers (see `publish_data_version`).
+
+    Returns:
+        dict: dataset → version.
+    """
+    try:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("Supabase credentials not found in environment variables.")
+
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        response = supabase.table(TABLE_NAME_DATA_VERSIONS).select("dataset,version").execute()
+        return {row["dataset"]: row["version"] for row in response.data}
+
+    except Exception as e:
+        logger.error(f"Error retrieving data versions: {e}")
+        raise e
+
+
+@profiled()
+def upsert_measurements(
+    data: pd.DataFrame,
+    chunk_size: int = 0,
+    return_records: bool = True,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    on_conflict: str = UNIQUE_MEASUREMENT,
+) -> list[dict]:
     """
     Upserts air quality measurements into the Supabase table.
 
@@ -82,6 +432,12 @@ def upsert_measurements(data: pd.DataFrame) -> list[dict]:
                 'datetime_from', 'datetime_to', 'period',
                 'summary', 'percent_coverage', 'sensor_id', 'updated_at'
             ]
+        chunk_size (int): If > 0, rows are sent in requests of at most
+            `chunk_size` records instead of a single request.
+        return_records (bool): If False, Supabase does not echo the rows back
+            (smaller responses) and an empty list is returned.
+        table_name (str): Target table (other measurement tables, e.g. weather).
+        on_conflict (str): Comma-separated unique key of `table_name`.
 
     Returns:
         list[dict]: List of records returned by Supabase after the upsert
@@ -89,31 +445,174 @@ def upsert_measurements(data: pd.DataFrame) -> list[dict]:
     Raises:
         Exception: If the Supabase upsert request fails.
     """
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)  # type: ignore
-    logger.debug(">>> Supabase client initialized.")
-    measurements = data.to_dict(orient="records")
+    step = chunk_size if chunk_size > 0 else max(len(data), 1)
 
     try:
-        response = (
-            supabase.table(TABLE_NAME_MEASUREMENTS)
-            .upsert(
-                measurements,
-                on_conflict=UNIQUE_MEASUREMENT,
+        upserted = []
+        for start in range(0, len(data), step):
+            upserted.extend(
+                _post_records(
+                    table_name,
+                    data.iloc[start : start + step],
+                    on_conflict=on_conflict,
+                    return_records=return_records,
+                )
             )
-            .execute()
-        )
 
         logger.info(
-            f"> Upserted '{len(response.data)}' new records into '{TABLE_NAME_MEASUREMENTS}'."
+            f"> Upserted '{len(upserted) if return_records else len(data)}' records "
+            f"into '{table_name}'."
         )
 
-        return response.data
+        return upserted
 
     except Exception as e:
         logger.error(f"Error upserting measurements to Supabase: {e}")
         raise e
 
 
+def upsert_rows(data: pd.DataFrame, table_name: str, on_conflict: str) -> None:
+    """
+    Upserts rows into any table, on the unique columns `on_conflict`
+    (comma-separated). Nothing is returned by Supabase.
+
+    Raises:
+        Exception: If the Supabase upsert request fails.
+    """
+    try:
+        if data.empty:
+            return
+        _post_records(table_name, data, on_conflict=on_conflict, return_records=False)
+        logger.info(f"> Upserted '{len(data)}' records into '{table_name}'.")
+    except Exception as e:
+        logger.error(f"Error upserting into '{table_name}': {e}")
+        raise e
+
+
+def bulk_load_available(db_url: Optional[str] = None) -> bool:
+    """True if a Postgres URL is configured and psycopg is installed."""
+    return psycopg is not None and bool(db_url or SUPABASE_DB_URL)
+
+
+def encode_copy_csv(data: pd.DataFrame) -> str:
+    """
+    Serializes a DataFrame to CSV rows for `COPY ... FROM STDIN WITH (FORMAT csv)`.
+
+    Dict and list cells (json/jsonb columns) are written as JSON rather than
+    their Python repr, and NaN/None as empty unquoted fields, which COPY reads
+    as NULL.
+
+    Args:
+        data (pd.DataFrame): Rows to encode, in the order of the COPY column list.
+
+    Returns:
+        str: The CSV rows, without header.
+    """
+    nested = {
+        column: data[column].map(
+            lambda v: json.dumps(v, default=str) if isinstance(v, (dict, list)) else v
+        )
+        for column in data.columns[data.dtypes == object]
+        if data[column].map(lambda v: isinstance(v, (dict, list))).any()
+    }
+    buffer = io.StringIO()
+    data.assign(**nested).to_csv(buffer, index=False, header=False, na_rep="")
+    return buffer.getvalue()
+
+
+def bulk_upsert(
+    data: pd.DataFrame,
+    table_name: str = TABLE_NAME_MEASUREMENTS,
+    on_conflict: str = UNIQUE_MEASUREMENT,
+    db_url: Optional[str] = None,
+    copy_chunk_bytes: int = 8 * 1024 * 1024,
+) -> int:
+    """
+    Upserts a DataFrame through a direct Postgres connection using COPY.
+
+    Rows are streamed as CSV with `COPY ... FROM STDIN` into a temporary
+    staging table, then merged with a single
+    `INSERT ... SELECT DISTINCT ON (<key>) ... ON CONFLICT (<key>) DO UPDATE`.
+    When a key appears several times in `data`, its last row wins.
+    This skips PostgREST and per-row JSON entirely and is meant for large
+    loads (backfills, catalogue refreshes).
+
+    Args:
+        data (pd.DataFrame): Rows to upsert; columns must exist in the table.
+        table_name (str): Target table.
+        on_conflict (str): Comma-separated unique key (default: `UNIQUE_MEASUREMENT`).
+        db_url (str, optional): Postgres URL; defaults to `SUPABASE_DB_URL`.
+        copy_chunk_bytes (int): Size of the CSV blocks written to COPY.
+
+    Returns:
+        int: Number of rows inserted or updated.
+
+    Raises:
+        ImportError: If psycopg is not installed.
+        ValueError: If no database URL is configured.
+    """
+    if psycopg is None:
+        raise ImportError("Bulk loads require psycopg: pip install 'psycopg[binary]'")
+    db_url = db_url or SUPABASE_DB_URL
+    if not db_url:
+        raise ValueError("No Postgres URL configured (SUPABASE_DB_URL).")
+    if data.empty:
+        return 0
+
+    columns = list(data.columns)
+    keys = on_conflict.split(",")
+    updates = [c for c in columns if c not in keys]
+    table = sql.Identifier(*table_name.split("."))
+    staging = sql.Identifier(f"_staging_{table_name.split('.')[-1]}")
+    cols = sql.SQL(", ").join(map(sql.Identifier, columns))
+    key_cols = sql.SQL(", ").join(map(sql.Identifier, keys))
+    if updates:
+        action = sql.SQL("DO UPDATE SET ") + sql.SQL(", ").join(
+            sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in updates
+        )
+    else:
+        action = sql.SQL("DO NOTHING")
+
+    payload = encode_copy_csv(data)
+
+    logger.info(f"Bulk loading {len(data)} rows into '{table_name}' via COPY ...")
+    try:
+        with psycopg.connect(db_url) as conn, conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                    "SELECT {cols} FROM {table} WITH NO DATA"
+                ).format(staging=staging, cols=cols, table=table)
+            )
+            # COPY order of the rows, so duplicates resolve deterministically
+            cur.execute(
+                sql.SQL("ALTER TABLE {staging} ADD COLUMN _copy_row bigserial").format(
+                    staging=staging
+                )
+            )
+            copy_stmt = sql.SQL("COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv)")
+            with cur.copy(copy_stmt.format(staging=staging, cols=cols)) as copy:
+                for start in range(0, len(payload), copy_chunk_bytes):
+                    copy.write(payload[start : start + copy_chunk_bytes])
+
+            cur.execute(
+                sql.SQL(
+                    "INSERT INTO {table} ({cols}) "
+                    "SELECT DISTINCT ON ({keys}) {cols} FROM {staging} "
+                    "ORDER BY {keys}, _copy_row DESC "
+                    "ON CONFLICT ({keys}) {action}"
+                ).format(table=table, cols=cols, keys=key_cols, staging=staging, action=action)
+            )
+            count = cur.rowcount
+        query_cache.invalidate(table_name)
+        logger.info(f"> Bulk upserted '{count}' records into '{table_name}'.")
+        return count
+
+    except Exception as e:
+        logger.error(f"Error bulk loading into '{table_name}': {e}")
+        raise e
+
+
 def upload_logs_to_supabase(
     log_file: str = "",
     bucket_name: str = "data",
@@ -136,6 +635,7 @@ def upload_logs_to_supabase(
     """
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)  # type: ignore
     src_file = log_file or LOG_FILE_PATH
+    flush_logs()
 
     if not os.path.exists(src_file):
         raise FileNotFoundError(f"Log file not found: {src_file}")
@@ -217,11 +717,17 @@ def rotate_logs_supabase(
 
     for f in to_delete:
         supabase.storage.from_(bucket_name).remove([f"{remote_dir}/{f.get('name')}"])
-        logger.debug(f"Deleted old log file: {f.get('name')}")
+        logger.debug("Deleted old log file: %s", f.get("name"))
 
     logger.info(f"Rotation done. Kept '{keep_last}', deleted {len(to_delete)}.")
 
 
+@cached_query(
+    lambda table_name, date_column, start_date, end_date, batch_size=1000: QueryCache.key(
+        table_name, range_=(date_column, start_date, end_date)
+    )
+)
+@profiled()
 def read_db_between_dates(
     table_name: str,
     date_column: str,
@@ -283,17 +789,91 @@ def read_db_between_dates(
         raise e
 
 
-def delete_old_measurements(days: int = 30, table_name: str = "measurements"):
-    """Delete records older than `days` days in Supabase."""
+@cached_query(
+    lambda start_date, end_date, batch_size=1000: QueryCache.key(
+        TABLE_NAME_MEASUREMENTS, "measurements_daily_stats", range_=(start_date, end_date)
+    )
+)
+def read_daily_stats(
+    start_date: str,
+    end_date: str,
+    batch_size: int = 1000,
+) -> pd.DataFrame:
+    """
+    Retrieves day × sensor × parameter aggregates of the measurements table,
+    computed in Postgres by the `measurements_daily_stats` SQL function
+    (see `sql/measurement_aggregates.sql`).
+
+    Only the aggregated rows cross the wire (a few hundred for a month of data),
+    instead of every raw measurement.
+
+    Args:
+        start_date (str): Inclusive lower bound on `datetime_from`.
+        end_date (str): Inclusive upper bound on `datetime_from`.
+        batch_size (int): Page size for the RPC results.
+
+    Returns:
+        pd.DataFrame: Columns [day, sensor_id, parameter_name, value_sum,
+            value_count, value_min, value_max]; empty if no rows match.
+    """
+    try:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("Supabase credentials not found in environment variables.")
+
+        logger.debug("Retrieving daily stats between %s and %s ...", start_date, end_date)
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        logger.debug(">>> Supabase client initialized.")
+
+        all_rows = []
+        start = 0
+        while True:
+            response = (
+                supabase.rpc(
+                    "measurements_daily_stats",
+                    {"start_date": start_date, "end_date": end_date},
+                )
+                .range(start, start + batch_size - 1)
+                .execute()
+            )
+            all_rows.extend(response.data)
+            if not response.data or len(response.data) < batch_size:
+                break
+            start += batch_size
+
+        if not all_rows:
+            logger.warning(f"No daily stats found between {start_date} and {end_date}.")
+            return pd.DataFrame()
+
+        df = pd.DataFrame(all_rows)
+        logger.info(
+            f"Retrieved {len(df)} daily stats rows between {start_date} and {end_date}."
+        )
+        return df
+
+    except Exception as e:
+        logger.error(f"Error retrieving daily stats from Supabase: {e}")
+        raise e
+
+
+def delete_old_measurements(
+    days: int = 30,
+    table_name: str = "measurements",
+    function_name: str = "delete_old_measurements",
+):
+    """
+    Delete records older than `days` days in Supabase, through the
+    `function_name` SQL function of the table (e.g. `delete_old_weather`).
+    """
     try:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase credentials not found in environment variables.")
 
-        logger.debug(f"Deleting records older than {days} days from '{table_name}' ...")
+        logger.debug("Deleting records older than %d days from '%s' ...", days, table_name)
         supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         logger.debug(">>> Supabase client initialized.")
 
-        response = supabase.rpc("delete_old_measurements", {"days": days}).execute()
+        response = supabase.rpc(function_name, {"days": days}).execute()
+        query_cache.invalidate(table_name)
         deleted_count = response.data
         logger.info(f"Deleted '{deleted_count}' records older than '{days}' days.")
     except Exception as e:
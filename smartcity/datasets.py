@@ -0,0 +1,310 @@
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import (
+    CACHE_DIR,
+    DASHBOARD_AGGREGATED,
+    DATASET_REFRESH_INTERVAL,
+    TABLE_NAME_MEASUREMENTS,
+    TABLE_NAME_WEATHER,
+)
+from smartcity.database import (
+    query_cache,
+    read_daily_stats,
+    read_data_versions,
+    read_db_between_dates,
+)
+from smartcity.utils import get_dates_range, sort_by_time
+from smartcity.weather.open_meteo import read_weather
+
+MEASUREMENT_DAYS = 31  # history of the air quality page
+WEATHER_DAYS = 7  # history of the weather page
+FORECAST_DAYS = 2
+MAX_AGE = 6 * 3600  # reload even without a new version, so date windows move on
+
+
+class Dataset:
+    """
+    One dashboard dataset: its loader, the table whose version marker it
+    follows, and the copy currently served.
+
+    A dataset registered with `preload=False` is only loaded by its first
+    `get()`, then refreshed like the others.
+
+    Attributes:
+        data (pd.DataFrame): The copy served (None until loaded).
+        version (str): Marker version the copy was loaded at.
+        key (str): Changes on every reload; use it as a cache key of anything
+            derived from `data`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], pd.DataFrame],
+        source: str,
+        max_age: float,
+        preload: bool = True,
+    ):
+        self.name = name
+        self.loader = loader
+        self.source = source
+        self.max_age = max_age
+        self.preload = preload
+        self.data: Optional[pd.DataFrame] = None
+        self.version = ""
+        self.loaded_at = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.version}@{self.loaded_at:.0f}"
+
+    def is_stale(self, versions: dict) -> bool:
+        if self.data is None or time.time() - self.loaded_at >= self.max_age:
+            return True
+        return versions.get(self.source, self.version) != self.version
+
+
+class DatasetCache:
+    """
+    Process-wide dashboard datasets, preloaded and refreshed in the background.
+
+    `start()` loads every preloaded dataset from its on-disk copy (then from
+    the database if it is missing or stale), and keeps polling the ETL's
+    data-version markers (`read_data_versions`) every `interval` seconds. A
+    dataset whose marker moved is reloaded by the background thread and then
+    swapped in, so readers keep getting the previous copy until the new one is
+    ready: only the first `get()` of a dataset not loaded yet by this process
+    (a lazy one, or a request arriving before the warm-up got to it) blocks.
+
+    Served frames are shared by every session and must not be modified.
+
+    Args:
+        cache_dir (str): Directory of the on-disk copies.
+        interval (float): Seconds between two version polls.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, interval: float = DATASET_REFRESH_INTERVAL):
+        self.cache_dir = os.path.join(cache_dir, "datasets")
+        self.interval = interval
+        self._datasets: Dict[str, Dataset] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.RLock] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.versions: dict = {}  # last polled markers: table → version
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], pd.DataFrame],
+        source: str,
+        max_age: float = MAX_AGE,
+        preload: bool = True,
+    ) -> None:
+        """
+        Adds a dataset, loaded by `loader` and following the marker of table `source`.
+        With `preload=False`, it is only loaded (and then refreshed) once requested.
+        """
+        self._datasets[name] = Dataset(name, loader, source, max_age, preload)
+        self._load_locks[name] = threading.RLock()
+
+    def names(self) -> List[str]:
+        return list(self._datasets)
+
+    # --- Local persistence ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def _save(self, dataset: Dataset) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(dataset.name)
+        payload = {"version": dataset.version, "loaded_at": dataset.loaded_at, "data": dataset.data}
+        pd.to_pickle(payload, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    def _restore(self, dataset: Dataset) -> bool:
+        path = self._path(dataset.name)
+        if dataset.data is not None or not os.path.exists(path):
+            return False
+        try:
+            payload = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable dataset copy '{path}': {e}")
+            return False
+        with self._lock:
+            dataset.data, dataset.version = payload["data"], payload["version"]
+            dataset.loaded_at = payload["loaded_at"]
+        return True
+
+    # --- Loading ---
+
+    def _load(self, dataset: Dataset, version: str) -> None:
+        with self._load_locks[dataset.name]:
+            started = time.monotonic()
+            query_cache.invalidate(dataset.source)  # the flow wrote from another process
+            data = dataset.loader()
+            with self._lock:  # swap: readers never see a partial reload
+                dataset.data, dataset.version, dataset.loaded_at = data, version, time.time()
+            logger.info(
+                f"Dataset '{dataset.name}' loaded: {len(data)} rows (version {version or 'n/a'}, "
+                f"{time.monotonic() - started:.1f}s)."
+            )
+            try:
+                self._save(dataset)
+            except Exception as e:
+                logger.warning(f"Could not save dataset copy '{dataset.name}': {e}")
+
+    def _versions(self) -> dict:
+        try:
+            self.versions = read_data_versions()
+        except Exception as e:
+            logger.warning(f"Data versions unavailable, datasets only expire by age: {e}")
+        return self.versions
+
+    def marker(self, source: str) -> str:
+        """Last polled data version of table `source` ("" if unknown), without loading anything."""
+        return self.versions.get(source, "")
+
+    def refresh(self, names: Optional[List[str]] = None) -> List[str]:
+        """
+        Reloads the datasets whose version marker moved (or that are missing or
+        older than their `max_age`), in the calling thread. Lazy datasets are
+        left alone until their first `get()`.
+
+        Returns:
+            List[str]: Names of the reloaded datasets.
+        """
+        versions = self._versions()
+        reloaded = []
+        for name in names or self.names():
+            dataset = self._datasets[name]
+            if dataset.data is None and not dataset.preload:
+                continue
+            if not dataset.is_stale(versions):
+                continue
+            try:
+                self._load(dataset, versions.get(dataset.source, ""))
+                reloaded.append(name)
+            except Exception as e:  # keep serving the previous copy
+                logger.error(f"Error reloading dataset '{name}': {e}")
+        return reloaded
+
+    def warm_up(self) -> List[str]:
+        """Restores the on-disk copies of the preloaded datasets, then reloads the stale ones."""
+        for dataset in self._datasets.values():
+            if dataset.preload:
+                self._restore(dataset)
+        return self.refresh()
+
+    def start(self) -> None:
+        """
+        Warms up then refreshes the datasets in a daemon thread; later calls are
+        no-ops while it runs.
+
+        Streamlit has no server startup hook: the dashboard calls this on every
+        page run, so the warm-up starts with the first page view of the process
+        (which waits only for the datasets it reads itself). Restarts are cheap
+        thanks to the on-disk copies.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dataset-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        self.warm_up()
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def get(self, name: str) -> Tuple[pd.DataFrame, str]:
+        """
+        The current copy of a dataset and its key.
+
+        Only blocks if the dataset was never loaded by this process and has no
+        on-disk copy (e.g. a request arrives before the warm-up got to it).
+        """
+        dataset = self._datasets[name]
+        if dataset.data is None and not self._restore(dataset):
+            with self._load_locks[name]:  # or wait for the load already running
+                if dataset.data is None:
+                    self._load(dataset, self._versions().get(dataset.source, ""))
+        with self._lock:
+            return dataset.data, dataset.key  # type: ignore
+
+
+# --- Dashboard datasets ---
+
+
+def load_recent_measurements(history_days: int = MEASUREMENT_DAYS) -> pd.DataFrame:
+    """Raw measurements of the last days, with parsed timestamps, sorted by time."""
+    start_date, end_date = get_dates_range(history_days=history_days)
+    data = read_db_between_dates(
+        TABLE_NAME_MEASUREMENTS,
+        date_column="datetime_from",
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if data.empty:
+        return data
+    data["datetime_from"] = pd.to_datetime(data["datetime_from"])
+    data["datetime_to"] = pd.to_datetime(data["datetime_to"])
+    return sort_by_time(data, "datetime_from")
+
+
+def load_recent_daily_stats(history_days: int = MEASUREMENT_DAYS) -> pd.DataFrame:
+    """Day × sensor × parameter aggregates of the last days, computed in Postgres."""
+    start_date, end_date = get_dates_range(history_days=history_days)
+    return read_daily_stats(start_date=start_date, end_date=end_date)
+
+
+def load_recent_weather(
+    history_days: int = WEATHER_DAYS, forecast_days: int = FORECAST_DAYS
+) -> pd.DataFrame:
+    """Last days of hourly weather and the stored forecasts, for every location."""
+    start_date, end_date = get_dates_range(history_days=history_days)
+    end_date = (pd.Timestamp(end_date) + timedelta(days=forecast_days + 1)).strftime("%Y-%m-%d")
+    return read_weather(start_date, end_date)
+
+
+_cache: Optional[DatasetCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_dataset_cache() -> DatasetCache:
+    """
+    The process-wide cache of the dashboard datasets ('measurements',
+    'daily_stats', 'weather'), all preloaded except raw 'measurements' when the
+    air quality page defaults to its aggregated mode (`SMARTCITY_DASHBOARD_AGGREGATED`):
+    they are then only loaded if a visitor switches to hourly data.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DatasetCache()
+            _cache.register(
+                "measurements",
+                load_recent_measurements,
+                TABLE_NAME_MEASUREMENTS,
+                preload=not DASHBOARD_AGGREGATED,  # the default view reads them
+            )
+            _cache.register("daily_stats", load_recent_daily_stats, TABLE_NAME_MEASUREMENTS)
+            _cache.register("weather", load_recent_weather, TABLE_NAME_WEATHER)
+        return _cache
+
+
+def get_dataset(name: str) -> Tuple[pd.DataFrame, str]:
+    """Current copy and key of a dashboard dataset (see `DatasetCache.get`)."""
+    return get_dataset_cache().get(name)
@@ -0,0 +1,303 @@
+import glob
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import INSIGHT_INDEX_DIR
+from smartcity.air_quality.aqi import EAQI_BANDS, level_name, sub_index
+
+try:
+    import faiss
+except ImportError:  # optional: pip install "smartcity[rag]"
+    faiss = None
+
+EMBEDDING_DIM = 512
+DOCUMENT_KEY = ["sensor_id", "parameter_name", "day"]
+_TOKEN = re.compile(r"[a-z0-9.]+")
+
+
+# --- Embedding ---
+
+
+def _tokens(text: str) -> List[str]:
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def embed_texts(texts: Iterable[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Local, deterministic text embedding (signed hashing trick).
+
+    Words and word bigrams are hashed with CRC32 into `dim` buckets with a
+    hash-derived sign, counts are damped with log(1 + tf) and vectors are
+    L2-normalised, so inner products are cosine similarities. No model,
+    vocabulary or network is needed: documents embedded by different runs
+    stay comparable.
+
+    Returns:
+        np.ndarray: float32 array of shape (n_texts, dim).
+    """
+    texts = list(texts)
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode()) for token in _tokens(text)), dtype=np.uint32
+        )
+        if not len(hashes):
+            continue
+        signs = np.where((hashes >> 31) & 1, -1.0, 1.0)
+        counts = np.bincount(hashes % dim, weights=signs, minlength=dim)
+        vectors[row] = np.sign(counts) * np.log1p(np.abs(counts))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+# --- Daily summaries ---
+
+
+def daily_summaries(stats: pd.DataFrame, locations: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    One short text per day, sensor and pollutant, from daily aggregates.
+
+    Args:
+        stats (pd.DataFrame): Output of `read_daily_stats` (day, sensor_id,
+            parameter_name, value_sum, value_count, value_min, value_max).
+            Include the day before the first one to get day-over-day trends.
+        locations (pd.DataFrame, optional): Catalogue rows (sensor_id, name, locality).
+
+    Returns:
+        pd.DataFrame: `DOCUMENT_KEY` columns ('day' as 'YYYY-MM-DD') and 'text'.
+    """
+    if stats.empty:
+        return pd.DataFrame(columns=DOCUMENT_KEY + ["text"])
+    stats = stats.assign(
+        day=pd.to_datetime(stats["day"]).dt.strftime("%Y-%m-%d"),
+        mean=stats["value_sum"] / stats["value_count"],
+    ).sort_values(["sensor_id", "parameter_name", "day"], ignore_index=True)
+    previous = stats.groupby(["sensor_id", "parameter_name"])["mean"].shift()
+    change = (stats["mean"] - previous) / previous.abs()
+
+    names = {}
+    if locations is not None and not locations.empty:
+        located = locations.drop_duplicates("sensor_id").set_index("sensor_id")
+        for column in ("locality", "name"):
+            if column in located.columns:
+                names = located[column].dropna().astype(str).to_dict() | names
+
+    texts = []
+    for row, delta in zip(stats.itertuples(index=False), change.to_numpy()):
+        parts = [
+            f"{row.day} {names.get(row.sensor_id, '')} sensor {row.sensor_id} {row.parameter_name}:",
+            f"daily mean {row.mean:.1f}, min {row.value_min:.1f}, max {row.value_max:.1f}",
+            f"over {int(row.value_count)} measurements.",
+        ]
+        if row.parameter_name in EAQI_BANDS:
+            level = int(sub_index(row.mean, row.parameter_name))
+            parts.append(f"Air quality {level_name(level).lower()}.")
+        if not np.isnan(delta):
+            trend = "rising" if delta > 0.1 else "falling" if delta < -0.1 else "stable"
+            parts.append(f"Trend {trend} ({delta:+.0%} vs previous day).")
+        texts.append(" ".join(parts))
+    return stats[DOCUMENT_KEY].assign(text=texts)
+
+
+# --- Index ---
+
+
+class InsightIndex:
+    """
+    Append-only, memory-mapped vector index of insight documents.
+
+    The index is a directory of immutable segments plus a JSON-lines document
+    store. `append()` embeds the new documents and writes them as a new segment
+    (a FAISS `IndexFlatIP`, or a `.npy` array without FAISS): existing segments
+    are never rewritten, so a flow run only pays for its own documents.
+    Segments are opened memory-mapped (FAISS `IO_FLAG_MMAP_IFC` / NumPy
+    `mmap_mode="r"`) and kept open, so queries read vectors straight from the
+    page cache. A document re-indexed later (same `DOCUMENT_KEY`) supersedes
+    the previous one; `compact()` merges segments and drops superseded vectors.
+
+    Args:
+        directory (str): Index directory (created if missing).
+        dim (int): Embedding size.
+    """
+
+    def __init__(self, directory: str = INSIGHT_INDEX_DIR, dim: int = EMBEDDING_DIM):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._segments = {}  # path -> (first id, index or array)
+        self.documents = {}  # id -> document
+        self._latest = {}  # document key -> id
+        self._superseded = set()  # ids of documents re-indexed since
+        os.makedirs(directory, exist_ok=True)
+        self._load_documents()
+
+    @property
+    def _documents_path(self) -> str:
+        return os.path.join(self.directory, "documents.jsonl")
+
+    def _load_documents(self) -> None:
+        if not os.path.exists(self._documents_path):
+            return
+        with open(self._documents_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._register(json.loads(line))
+
+    def _register(self, document: dict) -> None:
+        key = tuple(document[k] for k in DOCUMENT_KEY)
+        if key in self._latest:
+            self._superseded.add(self._latest[key])
+        self.documents[document["id"]] = document
+        self._latest[key] = document["id"]
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def _segment_paths(self) -> List[str]:
+        paths = glob.glob(os.path.join(self.directory, "segment-*"))
+        return sorted(p for p in paths if p.endswith((".faiss", ".npy")))
+
+    def _open_segment(self, path: str):
+        first_id = int(os.path.basename(path).split("-")[1].split(".")[0])
+        if path.endswith(".faiss"):
+            if faiss is None:
+                raise ImportError("faiss is required to read this index: pip install '.[rag]'")
+            return first_id, faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC)
+        return first_id, np.load(path, mmap_mode="r")
+
+    def _write_segment(self, first_id: int, vectors: np.ndarray) -> str:
+        name = os.path.join(self.directory, f"segment-{first_id:010d}")
+        if faiss is not None:
+            index = faiss.IndexFlatIP(self.dim)
+            index.add(vectors)
+            path = f"{name}.faiss"
+            faiss.write_index(index, f"{path}.tmp")
+        else:
+            path = f"{name}.npy"
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, vectors)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    def append(self, documents: pd.DataFrame) -> int:
+        """
+        Embeds and appends documents (`DOCUMENT_KEY` columns and 'text').
+
+        Documents whose key and text are already indexed are skipped; a changed
+        text for a known key is appended and supersedes the old one.
+
+        Returns:
+            int: Number of documents appended.
+        """
+        records = []
+        for record in documents[DOCUMENT_KEY + ["text"]].to_dict("records"):
+            known = self._latest.get(tuple(record[k] for k in DOCUMENT_KEY))
+            if known is None or self.documents[known]["text"] != record["text"]:
+                records.append(record)
+        if not records:
+            return 0
+
+        vectors = embed_texts([r["text"] for r in records], self.dim)
+        with self._lock:
+            first_id = max(self.documents, default=-1) + 1
+            path = self._write_segment(first_id, vectors)
+            with open(self._documents_path, "a", encoding="utf-8") as f:
+                for offset, record in enumerate(records):
+                    record = {"id": first_id + offset, **record}
+                    f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+                    self._register(record)
+            self._segments[path] = self._open_segment(path)
+        logger.info(f"Appended {len(records)} insights to '{self.directory}' ({len(self)} indexed).")
+        return len(records)
+
+    def _search_segments(self, query: np.ndarray, k: int):
+        with self._lock:
+            for path in self._segment_paths():
+                if path not in self._segments:
+                    self._segments[path] = self._open_segment(path)
+            segments = list(self._segments.values())
+
+        scores, ids = [], []
+        for first_id, segment in segments:
+            if isinstance(segment, np.ndarray):
+                sims = segment @ query[0]
+                top = np.argpartition(-sims, k - 1)[:k] if len(sims) > k else np.arange(len(sims))
+                scores.append(sims[top])
+                ids.append(top + first_id)
+            else:
+                distances, positions = segment.search(query, min(k, segment.ntotal))
+                valid = positions[0] >= 0
+                scores.append(distances[0][valid])
+                ids.append(positions[0][valid] + first_id)
+        if not scores:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        return np.concatenate(scores), np.concatenate(ids)
+
+    def search(self, query: str, k: int = 5) -> pd.DataFrame:
+        """
+        Top-`k` documents by cosine similarity to `query`.
+
+        Returns:
+            pd.DataFrame: 'score', 'id', `DOCUMENT_KEY` columns and 'text',
+                best first (superseded documents excluded).
+        """
+        columns = ["score", "id"] + DOCUMENT_KEY + ["text"]
+        if not self._latest:
+            return pd.DataFrame(columns=columns)
+        # Over-fetch: superseded vectors are filtered after the search
+        fetch = k + len(self._superseded)
+        scores, ids = self._search_segments(embed_texts([query], self.dim), fetch)
+
+        rows = []
+        for position in np.argsort(-scores, kind="stable"):
+            doc_id = int(ids[position])
+            if doc_id not in self._superseded:
+                rows.append({"score": float(scores[position]), **self.documents[doc_id]})
+                if len(rows) == k:
+                    break
+        return pd.DataFrame(rows, columns=columns)
+
+    def compact(self) -> None:
+        """Rewrites the index as a single segment of the current documents (offline maintenance)."""
+        with self._lock:
+            records = [self.documents[i] for i in sorted(self._latest.values())]
+            old_paths = self._segment_paths()
+            self._segments.clear()
+            for path in old_paths + [self._documents_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.documents, self._latest, self._superseded = {}, {}, set()
+        if records:
+            self.append(pd.DataFrame(records))
+
+
+def index_daily_insights(
+    stats: pd.DataFrame,
+    locations: Optional[pd.DataFrame] = None,
+    directory: str = INSIGHT_INDEX_DIR,
+    first_day: Optional[str] = None,
+    end_day: Optional[str] = None,
+) -> int:
+    """
+    Builds the daily summaries of `stats` and appends the new ones to the index.
+
+    Only the days in [`first_day`, `end_day`) are indexed: `stats` may start
+    with a context day (read for the trend of the first day, so indexing it
+    would overwrite its summary with a trend-less one) and end with the
+    current, still incomplete day.
+    """
+    summaries = daily_summaries(stats, locations)
+    if first_day:
+        summaries = summaries[summaries["day"] >= first_day[:10]]
+    if end_day:
+        summaries = summaries[summaries["day"] < end_day[:10]]
+    return InsightIndex(directory).append(summaries)
@@ -0,0 +1,289 @@
+import bisect
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from supabase import Client, create_client
+
+from smartcity import logger
+from smartcity.config import (
+    PROFILE_DIR,
+    PROFILE_MODE,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+)
+
+MODES = ("", "timing", "cprofile", "sampling")
+# Upper bounds of the timing histogram buckets, in milliseconds (last one: +inf)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 30_000, 60_000)
+
+
+class TimingHistogram:
+    """Call durations of one hook, in log-spaced buckets (`BUCKETS_MS`)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the `q` quantile."""
+        rank, seen = q * self.count, 0
+        for bound, count in zip(BUCKETS_MS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max * 1000)
+        return 0.0
+
+    def summary(self) -> dict:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.count,
+            "total_s": round(self.total, 3),
+            "mean_ms": round(1000 * self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max * 1000, 2),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class Profiler:
+    """
+    Process-wide collector behind the `profiled` hooks.
+
+    Modes (`SMARTCITY_PROFILE`):
+        - "" (default): hooks call straight through.
+        - "timing": per-call duration histograms only.
+        - "cprofile": histograms, plus a deterministic cProfile of each
+          outermost hooked call, aggregated per hook (`.prof`, for pstats/snakeviz).
+        - "sampling": histograms, plus stacks sampled every
+          `SMARTCITY_PROFILE_INTERVAL_MS` from the threads inside a hook,
+          as folded stacks (`.folded`, for flamegraph.pl/speedscope). Much
+          cheaper than cProfile on long runs.
+
+    Args:
+        mode (str): One of `MODES`.
+        interval (float): Sampling interval, in seconds.
+    """
+
+    def __init__(self, mode: str = PROFILE_MODE, interval: float = PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        if mode not in MODES:
+            logger.warning(f"Unknown profiling mode '{mode}', profiling disabled.")
+            mode = ""
+        self.mode = mode
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.timings: Dict[str, TimingHistogram] = {}
+        self.stats: Dict[str, pstats.Stats] = {}
+        self.samples: Dict[str, Counter] = {}
+        self._active: Dict[int, str] = {}  # thread id -> outermost hook name
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.mode)
+
+    # --- Collection ---
+
+    @contextmanager
+    def profile(self, name: str):
+        """Times (and profiles, depending on the mode) the enclosed block as hook `name`."""
+        if not self.mode:
+            yield
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        outermost = depth == 0
+        profile = self._start(name) if outermost else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._local.depth = depth
+            if outermost:
+                self._stop(name, profile)
+            with self._lock:
+                self.timings.setdefault(name, TimingHistogram()).record(elapsed)
+
+    def _start(self, name: str) -> Optional[cProfile.Profile]:
+        if self.mode == "sampling":
+            with self._lock:
+                self._active[threading.get_ident()] = name
+                if self._sampler is None or not self._sampler.is_alive():
+                    self._sampler = threading.Thread(
+                        target=self._sample, name="profile-sampler", daemon=True
+                    )
+                    self._sampler.start()
+        elif self.mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active: time only
+                return None
+            return profile
+        return None
+
+    def _stop(self, name: str, profile: Optional[cProfile.Profile]) -> None:
+        if self.mode == "sampling":
+            with self._lock:
+                self._active.pop(threading.get_ident(), None)
+        elif profile is not None:
+            profile.disable()
+            with self._lock:
+                if name in self.stats:
+                    self.stats[name].add(profile)
+                else:
+                    self.stats[name] = pstats.Stats(profile)
+
+    def _sample(self) -> None:
+        """Sampler thread: runs while some thread is inside a hook."""
+        me = threading.get_ident()
+        tick = threading.Event()  # never set: an interruptible sleep
+        while True:
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._sampler = None
+                    return
+            frames = sys._current_frames()
+            for thread_id, name in active.items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno}"
+                    stack.append(f"{code.co_name} ({location})")
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                with self._lock:
+                    self.samples.setdefault(name, Counter())[folded] += 1
+            tick.wait(self.interval)
+
+    # --- Reports ---
+
+    def timing_summary(self) -> dict:
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.timings.items())}
+
+    def dump(self, directory: str = PROFILE_DIR) -> List[str]:
+        """
+        Writes the collected profiles to `directory`.
+
+        Returns:
+            List[str]: Paths written: `timings.json`, and one `<hook>.prof`
+                (cProfile) or `<hook>.folded` (sampling) per hook.
+        """
+        if not self.mode:
+            return []
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, "timings.json")]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            json.dump({"mode": self.mode, "hooks": self.timing_summary()}, f, indent=2)
+        with self._lock:
+            for name, stats in self.stats.items():
+                paths.append(os.path.join(directory, f"{name}.prof"))
+                stats.dump_stats(paths[-1])
+            for name, samples in self.samples.items():
+                paths.append(os.path.join(directory, f"{name}.folded"))
+                with open(paths[-1], "w", encoding="utf-8") as f:
+                    f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        return paths
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timings.clear()
+            self.stats.clear()
+            self.samples.clear()
+
+
+profiler = Profiler()
+
+
+def profiled(name: str = ""):
+    """
+    Decorator hooking a function into the `profiler` (a no-op unless
+    `SMARTCITY_PROFILE` is set). Nested hooked calls are timed on their own
+    but profiled as part of the outermost one.
+
+    Args:
+        name (str): Hook name (default: the function's name).
+    """
+
+    def decorator(func):
+        hook = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.mode:
+                return func(*args, **kwargs)
+            with profiler.profile(hook):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profile(name: str):
+    """Context manager form of `profiled`, for any block of code."""
+    return profiler.profile(name)
+
+
+def upload_profiles(
+    bucket_name: str = "data",
+    remote_dir: str = "smartcity-logs",
+    directory: str = PROFILE_DIR,
+) -> List[str]:
+    """
+    Dumps the collected profiles and uploads them to Supabase Storage, next to
+    the run logs (see `upload_logs_to_supabase`), under
+    `<remote_dir>/profiles/<timestamp>/`.
+
+    Returns:
+        List[str]: Remote paths of the uploaded files (empty if profiling is off).
+    """
+    paths = profiler.dump(directory)
+    if not paths:
+        return []
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)  # type: ignore
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    uploaded = []
+    for path in paths:
+        remote_path = f"{remote_dir}/profiles/{timestamp}/{os.path.basename(path)}"
+        try:
+            with open(path, "rb") as f:
+                supabase.storage.from_(bucket_name).upload(
+                    path=remote_path, file=f, file_options={"upsert": "true"}
+                )
+            uploaded.append(remote_path)
+        except Exception as e:
+            logger.error(f"Failed to upload profile '{path}' → {e}")
+            raise e
+    logger.info(
+        f"{len(uploaded)} profile files uploaded to '{bucket_name}/{remote_dir}/profiles/{timestamp}'."
+    )
+    return uploaded
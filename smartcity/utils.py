@@ -6,10 +6,14 @@ import pendulum
 from prefect.blocks.system import Secret
 
 
-def get_secret(name: str, env_var: str):
+def get_secret(name: str, env_var: str, required: bool = True):
     env = os.getenv("ENV")
     if env == "prod" or os.getenv("PREFECT__FLOW_RUN_ID"):
-        return Secret.load(name).get()  # type: ignore
+        try:
+            return Secret.load(name).get()  # type: ignore
+        except Exception:
+            if required:
+                raise
     return os.getenv(env_var)
 
 
@@ -99,3 +103,42 @@ def flatten_and_transform(
         flattened_data.append(row_data)
 
     return pd.DataFrame(flattened_data)
+
+
+def sort_by_time(data: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Sorts a DataFrame on a timestamp column and indexes it by that column.
+
+    The returned frame has a monotonic DatetimeIndex (the column itself is kept),
+    which is what `slice_time_range` expects.
+    """
+    data = data.sort_values(column, kind="stable", ignore_index=True)
+    data.index = pd.DatetimeIndex(data[column], name=None)
+    return data
+
+
+def slice_time_range(data: pd.DataFrame, start: Any, end: Any) -> pd.DataFrame:
+    """
+    Returns the rows of a time-sorted DataFrame with `start <= index < end`.
+
+    Both bounds are located by binary search on the DatetimeIndex (see
+    `sort_by_time`), so the cost is O(log n) and the result is a positional
+    slice of `data` rather than a boolean-mask copy. Naive bounds are
+    interpreted in the index timezone.
+    """
+    index = data.index
+    if not isinstance(index, pd.DatetimeIndex):
+        raise TypeError("slice_time_range expects a DatetimeIndex (see sort_by_time).")
+
+    bounds = []
+    for value in (start, end):
+        ts = pd.Timestamp(value)
+        if index.tz is not None and ts.tzinfo is None:
+            ts = ts.tz_localize(index.tz)
+        elif index.tz is None and ts.tzinfo is not None:
+            ts = ts.tz_convert(None)
+        bounds.append(ts)
+
+    lo = index.searchsorted(bounds[0], side="left")
+    hi = index.searchsorted(bounds[1], side="left")
+    return data.iloc[lo:hi]
@@ -0,0 +1,295 @@
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from smartcity import logger
+from smartcity.config import CACHE_DIR
+
+DEFAULT_LAGS = [0, 1, 2, 3, 6, 12, 24]  # hours the weather leads the pollution
+TOLERANCE = pd.Timedelta(minutes=30)
+WINDOW_DAYS = 14
+MIN_PAIRS = 24
+MAX_DAYS = 62  # buckets kept (the tables' retention)
+
+STATS_KEY = ["sensor_id", "parameter_name", "variable", "lag", "day"]
+SUMS = ["n", "sx", "sy", "sxx", "syy", "sxy"]
+
+
+def weather_wide(weather: pd.DataFrame) -> pd.DataFrame:
+    """Long weather rows → one row per location and hour, one column per variable."""
+    wide = weather.pivot_table(
+        index=["location_id", "datetime_from"], columns="parameter_name", values="value"
+    )
+    wide.columns.name = None
+    wide = wide.reset_index()
+    wide["location_id"] = wide["location_id"].astype("int64")
+    wide["datetime_from"] = pd.to_datetime(wide["datetime_from"], utc=True)
+    return wide
+
+
+def align_measurements_weather(
+    measurements: pd.DataFrame,
+    weather: pd.DataFrame,
+    locations: pd.DataFrame,
+    lag: int = 0,
+    tolerance: pd.Timedelta = TOLERANCE,
+) -> pd.DataFrame:
+    """
+    Attaches to each measurement the weather of its station `lag` hours before.
+
+    Both sides are sorted by time and joined with `pd.merge_asof` per location
+    (the nearest weather hour within `tolerance`), so irregular or shifted
+    timestamps still match without resampling either series.
+
+    Args:
+        measurements (pd.DataFrame): 'sensor_id', 'parameter_name', 'datetime_from', 'value'.
+        weather (pd.DataFrame): Long weather rows, or the output of `weather_wide`.
+        locations (pd.DataFrame): Catalogue rows mapping 'sensor_id' to its location 'id'.
+        lag (int): Hours the weather is taken before the measurement.
+        tolerance (pd.Timedelta): Largest time gap of a match.
+
+    Returns:
+        pd.DataFrame: The measurement columns plus 'location_id' and one column
+            per weather variable (NaN when no weather hour is close enough).
+    """
+    wide = weather if "parameter_name" not in weather.columns else weather_wide(weather)
+    sensor_locations = (
+        locations[["sensor_id", "id"]]
+        .drop_duplicates("sensor_id")
+        .rename(columns={"id": "location_id"})
+        .astype({"location_id": "int64"})
+    )
+    left = measurements[["sensor_id", "parameter_name", "datetime_from", "value"]].merge(
+        sensor_locations, on="sensor_id"
+    )
+    left["datetime_from"] = pd.to_datetime(left["datetime_from"], utc=True, format="ISO8601")
+    left = left.dropna(subset=["value"]).sort_values("datetime_from", ignore_index=True)
+
+    right = wide.assign(datetime_from=wide["datetime_from"] + pd.Timedelta(hours=lag))
+    return pd.merge_asof(
+        left,
+        right.sort_values("datetime_from"),
+        on="datetime_from",
+        by="location_id",
+        tolerance=tolerance,
+        direction="nearest",
+    )
+
+
+def daily_sums(aligned: pd.DataFrame, variables: List[str], lag: int) -> pd.DataFrame:
+    """
+    Sufficient statistics of the (weather, pollution) pairs per series and day:
+    pair count and sums of x, y, x², y², xy, from which any window's Pearson
+    correlation is rebuilt by adding days.
+    """
+    pairs = aligned.melt(
+        id_vars=["sensor_id", "parameter_name", "datetime_from", "value"],
+        value_vars=variables,
+        var_name="variable",
+        value_name="x",
+    ).dropna(subset=["x"])
+    x, y = pairs["x"].to_numpy(float), pairs["value"].to_numpy(float)
+    pairs = pd.DataFrame(
+        {
+            "sensor_id": pairs["sensor_id"].to_numpy(),
+            "parameter_name": pairs["parameter_name"].to_numpy(),
+            "variable": pairs["variable"].to_numpy(),
+            "lag": lag,
+            "day": pairs["datetime_from"].dt.floor("D").array,
+            "n": 1,
+            "sx": x,
+            "sy": y,
+            "sxx": x * x,
+            "syy": y * y,
+            "sxy": x * y,
+        }
+    )
+    return pairs.groupby(STATS_KEY, as_index=False)[SUMS].sum()
+
+
+def pearson(stats: pd.DataFrame, min_pairs: int = MIN_PAIRS) -> np.ndarray:
+    """Pearson correlation of summed statistics; NaN below `min_pairs` or without variance."""
+    n = stats["n"].to_numpy(float)
+    cov = n * stats["sxy"].to_numpy() - stats["sx"].to_numpy() * stats["sy"].to_numpy()
+    var_x = n * stats["sxx"].to_numpy() - stats["sx"].to_numpy() ** 2
+    var_y = n * stats["syy"].to_numpy() - stats["sy"].to_numpy() ** 2
+    denominator = np.sqrt(np.clip(var_x, 0, None) * np.clip(var_y, 0, None))
+    valid = (n >= min_pairs) & (denominator > 0)
+    r = np.divide(cov, denominator, out=np.full(len(n), np.nan), where=valid)
+    return np.clip(r, -1.0, 1.0)
+
+
+class CorrelationEngine:
+    """
+    Incremental pollution ↔ weather correlations, per sensor, variable and lag.
+
+    Only additive daily sums are stored (see `daily_sums`), so:
+
+    - `update()` recomputes the days present in the new data and replaces their
+      buckets; its cost depends on the new days, not on the history;
+    - a window's correlation (or the lag matrix, or a rolling series) is the
+      sum of its day buckets, computed on demand in a few vectorised steps.
+
+    Args:
+        lags (List[int]): Weather lead times (hours) tracked.
+        tolerance (pd.Timedelta): As-of join tolerance.
+        max_days (int): Day buckets kept.
+
+    Attributes:
+        revision (int): Incremented by every `update()` that changed the
+            statistics; a cache key of anything derived from them.
+    """
+
+    def __init__(
+        self,
+        lags: Optional[List[int]] = None,
+        tolerance: pd.Timedelta = TOLERANCE,
+        max_days: int = MAX_DAYS,
+    ):
+        self.lags = list(lags) if lags is not None else list(DEFAULT_LAGS)
+        self.tolerance = tolerance
+        self.max_days = max_days
+        self.stats = pd.DataFrame(columns=STATS_KEY + SUMS)
+        self.revision = 0
+
+    @property
+    def last_day(self) -> Optional[pd.Timestamp]:
+        """Most recent day with statistics (it may have been incomplete when computed)."""
+        return None if self.stats.empty else self.stats["day"].max()
+
+    def update(
+        self, measurements: pd.DataFrame, weather: pd.DataFrame, locations: pd.DataFrame
+    ) -> int:
+        """
+        Adds (or recomputes) the days covered by `measurements`.
+
+        Pass whole days: the buckets of every day present in `measurements` are
+        replaced by the statistics of the rows given. Weather rows should cover
+        the same days plus the largest lag before them.
+
+        Returns:
+            int: Number of days updated.
+        """
+        if measurements.empty or weather.empty:
+            return 0
+        wide = weather_wide(weather)
+        variables = [c for c in wide.columns if c not in ("location_id", "datetime_from")]
+
+        buckets = [
+            daily_sums(
+                align_measurements_weather(measurements, wide, locations, lag, self.tolerance),
+                variables,
+                lag,
+            )
+            for lag in self.lags
+        ]
+        fresh = pd.concat(buckets, ignore_index=True)
+        days = (
+            pd.to_datetime(measurements["datetime_from"], utc=True, format="ISO8601")
+            .dt.floor("D")
+            .unique()
+        )
+
+        kept = self.stats[~self.stats["day"].isin(days)] if not self.stats.empty else None
+        self.stats = pd.concat([kept, fresh], ignore_index=True) if kept is not None else fresh
+        if not self.stats.empty:
+            oldest = self.stats["day"].max() - pd.Timedelta(days=self.max_days - 1)
+            self.stats = self.stats[self.stats["day"] >= oldest].reset_index(drop=True)
+        self.revision += 1
+        logger.info(f"Correlation stats updated for {len(days)} days ({len(self.stats)} buckets).")
+        return len(days)
+
+    def window(
+        self, window_days: int = WINDOW_DAYS, end: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """Day buckets of the `window_days` days up to `end` (default: the last day)."""
+        if self.stats.empty:
+            return self.stats
+        end = self.last_day if end is None else end
+        start = end - pd.Timedelta(days=window_days - 1)
+        return self.stats[(self.stats["day"] >= start) & (self.stats["day"] <= end)]
+
+    def correlations(
+        self,
+        window_days: int = WINDOW_DAYS,
+        by_sensor: bool = True,
+        min_pairs: int = MIN_PAIRS,
+    ) -> pd.DataFrame:
+        """
+        Correlation of every pollutant with every weather variable and lag over
+        the last `window_days` days, per sensor or pooled over all sensors.
+
+        Returns:
+            pd.DataFrame: Key columns, 'n' (pairs) and 'r'.
+        """
+        key = ["parameter_name", "variable", "lag"]
+        key = ["sensor_id"] + key if by_sensor else key
+        stats = self.window(window_days)
+        if stats.empty:
+            return pd.DataFrame(columns=key + ["n", "r"])
+        sums = stats.groupby(key, as_index=False)[SUMS].sum()
+        return sums[key + ["n"]].assign(r=pearson(sums, min_pairs))
+
+    def lag_matrix(
+        self, parameter: str, window_days: int = WINDOW_DAYS, min_pairs: int = MIN_PAIRS
+    ) -> pd.DataFrame:
+        """Pooled correlations of a pollutant: weather variables × lags (hours)."""
+        pooled = self.correlations(window_days, by_sensor=False, min_pairs=min_pairs)
+        pooled = pooled[pooled["parameter_name"] == parameter]
+        return pooled.pivot(index="variable", columns="lag", values="r")
+
+    def rolling_correlation(
+        self,
+        parameter: str,
+        variable: str,
+        lag: int = 0,
+        window_days: int = 7,
+        min_pairs: int = MIN_PAIRS,
+    ) -> pd.Series:
+        """Pooled correlation over a trailing `window_days` window, for every day."""
+        stats = self.stats
+        if stats.empty:
+            return pd.Series(dtype=float)
+        rows = stats[
+            (stats["parameter_name"] == parameter)
+            & (stats["variable"] == variable)
+            & (stats["lag"] == lag)
+        ]
+        if rows.empty:
+            return pd.Series(dtype=float)
+        daily = rows.groupby("day")[SUMS].sum()
+        all_days = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+        daily = daily.reindex(all_days, fill_value=0)
+        rolled = daily.rolling(window_days, min_periods=1).sum()
+        return pd.Series(pearson(rolled, min_pairs), index=rolled.index, name="r")
+
+    # --- Local persistence ---
+
+    @staticmethod
+    def cache_path(cache_dir: str = CACHE_DIR) -> str:
+        return os.path.join(cache_dir, "correlation_stats.pkl")
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.cache_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pd.to_pickle({"lags": self.lags, "stats": self.stats}, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, **kwargs) -> "CorrelationEngine":
+        """Engine resumed from its local cache (empty if absent or unreadable)."""
+        engine = cls(**kwargs)
+        path = path or cls.cache_path()
+        try:
+            cached = pd.read_pickle(path)
+        except FileNotFoundError:
+            return engine
+        except Exception as e:
+            logger.warning(f"Correlation cache '{path}' unreadable ({e}), starting fresh.")
+            return engine
+        if cached["lags"] == engine.lags:
+            engine.stats = cached["stats"]
+        return engine
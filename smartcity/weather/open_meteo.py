@@ -0,0 +1,247 @@
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from smartcity import logger
+from smartcity.config import OPEN_METEO_URL, TABLE_NAME_WEATHER
+from smartcity.database import (
+    delete_old_measurements,
+    read_db_between_dates,
+    upsert_measurements,
+)
+from smartcity.air_quality.rate_limit import backoff_delay
+
+# Hourly variables requested from Open-Meteo (units are read from the response)
+HOURLY_VARIABLES = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "precipitation",
+    "surface_pressure",
+    "wind_speed_10m",
+    "wind_direction_10m",
+    "cloud_cover",
+    "shortwave_radiation",
+    "boundary_layer_height",
+]
+UNIQUE_WEATHER = "location_id,parameter_name,datetime_from"
+
+MAX_COORDINATES_PER_REQUEST = 100
+# Coordinates are rounded to ~1 km (finer than the weather models' grids):
+# stations sharing a rounded point are requested once.
+COORDINATE_DECIMALS = 2
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+
+
+def weather_points(locations: pd.DataFrame) -> pd.DataFrame:
+    """
+    Unique locations of the catalogue and the rounded point each one is fetched at.
+
+    Args:
+        locations (pd.DataFrame): Catalogue rows with 'id', 'latitude' and 'longitude'
+            (one row per sensor is fine).
+
+    Returns:
+        pd.DataFrame: Columns 'location_id', 'point_latitude', 'point_longitude'.
+    """
+    located = locations.dropna(subset=["latitude", "longitude"]).drop_duplicates("id")
+    return pd.DataFrame(
+        {
+            "location_id": located["id"].to_numpy(),
+            "point_latitude": located["latitude"].astype(float).round(COORDINATE_DECIMALS).to_numpy(),
+            "point_longitude": located["longitude"].astype(float).round(COORDINATE_DECIMALS).to_numpy(),
+        }
+    )
+
+
+def fetch_weather_batch(
+    session: requests.Session,
+    latitudes: List[float],
+    longitudes: List[float],
+    past_days: int = 2,
+    forecast_days: int = 2,
+    variables: List[str] = HOURLY_VARIABLES,
+    url: str = OPEN_METEO_URL,
+    max_retries: int = MAX_RETRIES,
+    timeout: float = 60,
+) -> List[dict]:
+    """
+    Hourly weather of many coordinates in a single Open-Meteo request.
+
+    Throttling and server errors are retried with jittered exponential backoff.
+
+    Returns:
+        List[dict]: One response object per coordinate, in request order.
+
+    Raises:
+        requests.HTTPError: If the request still fails after `max_retries` retries.
+    """
+    params = {
+        "latitude": ",".join(f"{lat:g}" for lat in latitudes),
+        "longitude": ",".join(f"{lon:g}" for lon in longitudes),
+        "hourly": ",".join(variables),
+        "past_days": past_days,
+        "forecast_days": forecast_days,
+        "timezone": "GMT",
+        "timeformat": "unixtime",
+    }
+    attempt = 0
+    while True:
+        response = session.get(url, params=params, timeout=timeout)
+        if response.status_code in RETRYABLE_STATUS and attempt < max_retries:
+            retry_after = response.headers.get("Retry-After")
+            delay = backoff_delay(attempt, retry_after=float(retry_after) if retry_after else None)
+            logger.warning(
+                "> Open-Meteo returned %d (attempt %d/%d), retrying in %.1fs ...",
+                response.status_code,
+                attempt + 1,
+                max_retries + 1,
+                delay,
+            )
+            time.sleep(delay)
+            attempt += 1
+            continue
+        response.raise_for_status()
+        payload = response.json()
+        # A single coordinate gives an object, several give a list
+        return payload if isinstance(payload, list) else [payload]
+
+
+def flatten_weather(responses: List[dict], points: pd.DataFrame) -> pd.DataFrame:
+    """
+    Long-format rows ('point_latitude', 'point_longitude', 'parameter_name',
+    'value', 'parameter_units', 'datetime_from') of Open-Meteo responses, the
+    i-th response belonging to the i-th row of `points`.
+    """
+    frames = []
+    for (lat, lon), response in zip(points.itertuples(index=False), responses):
+        hourly = response.get("hourly", {})
+        units = response.get("hourly_units", {})
+        times = np.asarray(hourly.get("time", []), dtype="int64")
+        for variable, values in hourly.items():
+            if variable == "time":
+                continue
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "point_latitude": lat,
+                        "point_longitude": lon,
+                        "parameter_name": variable,
+                        "value": np.asarray(values, dtype=float),  # nulls → NaN
+                        "parameter_units": units.get(variable, ""),
+                        "datetime_from": pd.to_datetime(times, unit="s", utc=True),
+                    }
+                )
+            )
+    if not frames:
+        return pd.DataFrame(
+            columns=[
+                "point_latitude",
+                "point_longitude",
+                "parameter_name",
+                "value",
+                "parameter_units",
+                "datetime_from",
+            ]
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def fetch_weather(
+    locations: pd.DataFrame,
+    past_days: int = 2,
+    forecast_days: int = 2,
+    variables: List[str] = HOURLY_VARIABLES,
+    batch_size: int = MAX_COORDINATES_PER_REQUEST,
+    url: str = OPEN_METEO_URL,
+    now: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Hourly observations (past days) and forecasts of every location.
+
+    Locations are reduced to unique rounded points, which are requested
+    `batch_size` at a time: the number of HTTP calls is
+    ceil(points / batch_size), not one per station.
+
+    Args:
+        locations (pd.DataFrame): Catalogue rows ('id', 'latitude', 'longitude').
+        past_days (int): Days of recent hours (model analysis) to fetch.
+        forecast_days (int): Days of forecast to fetch, today included.
+        variables (List[str]): Open-Meteo hourly variables.
+        batch_size (int): Coordinates per request.
+        url (str): Forecast endpoint (default: `OPEN_METEO_URL`).
+        now (pd.Timestamp, optional): Reference time of the forecast flag.
+
+    Returns:
+        pd.DataFrame: Rows ready for `upsert_weather`: 'location_id',
+            'parameter_name', 'value', 'parameter_units', 'datetime_from'
+            (ISO, UTC), 'is_forecast' and 'updated_at'. Missing values are dropped.
+    """
+    points = weather_points(locations)
+    unique_points = points[["point_latitude", "point_longitude"]].drop_duplicates(ignore_index=True)
+    logger.info(
+        f"Fetching weather of '{len(points)}' locations ({len(unique_points)} points, "
+        f"{-(-len(unique_points) // batch_size)} requests) ..."
+    )
+
+    frames = []
+    with requests.Session() as session:
+        for start in range(0, len(unique_points), batch_size):
+            batch = unique_points.iloc[start : start + batch_size]
+            responses = fetch_weather_batch(
+                session,
+                batch["point_latitude"].tolist(),
+                batch["point_longitude"].tolist(),
+                past_days=past_days,
+                forecast_days=forecast_days,
+                variables=variables,
+                url=url,
+            )
+            frames.append(flatten_weather(responses, batch))
+
+    if not frames:
+        return pd.DataFrame()
+    data = pd.concat(frames, ignore_index=True).dropna(subset=["value"])
+    data = points.merge(data, on=["point_latitude", "point_longitude"])
+
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    data["is_forecast"] = data["datetime_from"] > now
+    data["datetime_from"] = data["datetime_from"].map(lambda ts: ts.isoformat())
+    data["updated_at"] = datetime.now().isoformat()
+    data = data.drop(columns=["point_latitude", "point_longitude"])
+    logger.info(f"Fetched '{len(data)}' weather values.")
+    return data
+
+
+def upsert_weather(data: pd.DataFrame, chunk_size: int = 1000) -> None:
+    """
+    Upserts weather rows with the measurement machinery (chunked PostgREST
+    upserts on `UNIQUE_WEATHER`). A forecast hour is overwritten by later
+    runs, and by the analysis value once it is in the past.
+    """
+    upsert_measurements(
+        data,
+        chunk_size=chunk_size,
+        return_records=False,
+        table_name=TABLE_NAME_WEATHER,
+        on_conflict=UNIQUE_WEATHER,
+    )
+
+
+def delete_old_weather(days: int = 61) -> None:
+    """Retention of the weather table (SQL function `delete_old_weather`)."""
+    delete_old_measurements(days=days, table_name=TABLE_NAME_WEATHER, function_name="delete_old_weather")
+
+
+def read_weather(start_date: str, end_date: str) -> pd.DataFrame:
+    """Weather rows between two dates, with 'datetime_from' parsed (UTC)."""
+    data = read_db_between_dates(
+        TABLE_NAME_WEATHER, date_column="datetime_from", start_date=start_date, end_date=end_date
+    )
+    if not data.empty:
+        data["datetime_from"] = pd.to_datetime(data["datetime_from"], utc=True, format="ISO8601")
+    return data
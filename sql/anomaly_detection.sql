@@ -0,0 +1,34 @@
+-- SmartCity — online anomaly detection.
+--
+-- `smartcity.air_quality.anomalies.AnomalyDetector` keeps one row of state
+-- per sensor and parameter (EWMA mean / variance, last value and timestamp,
+-- current run of identical values). Each `workflow_openaq` run resumes it,
+-- feeds it only the new rows and upserts it back, together with the flagged
+-- anomalies ("spike" or "stuck").
+
+create table if not exists public.openaq_anomaly_state (
+    sensor_id bigint not null,
+    parameter_name text not null,
+    count bigint not null default 0,
+    mean double precision not null default 0,
+    var double precision not null default 0,
+    last_value double precision,
+    last_datetime timestamptz,
+    stuck_run integer not null default 0,
+    primary key (sensor_id, parameter_name)
+);
+
+create table if not exists public.openaq_anomalies (
+    id bigint generated always as identity primary key,
+    sensor_id bigint not null,
+    parameter_name text not null,
+    datetime_from timestamptz not null,
+    value double precision,
+    kind text not null,
+    score double precision,
+    detected_at timestamptz not null default now(),
+    unique (sensor_id, parameter_name, datetime_from, kind)
+);
+
+create index if not exists openaq_anomalies_detected_at_idx
+    on public.openaq_anomalies (detected_at desc);
@@ -0,0 +1,12 @@
+-- SmartCity — data-version markers published by the ETL flows.
+--
+-- Each flow upserts one row per dataset it changed (`publish_data_version`)
+-- once its writes are done. The dashboard polls this small table
+-- (`smartcity.datasets`) and reloads a cached dataset only when its version
+-- moved, in the background, so visitors never wait on a cold load.
+
+create table if not exists public.smartcity_data_versions (
+    dataset text primary key,
+    version text not null,
+    updated_at timestamptz not null default now()
+);
@@ -0,0 +1,19 @@
+-- SmartCity — state of sharded OpenAQ ingestion runs.
+--
+-- `workflow_openaq_sharded` splits the location catalogue into shards; each
+-- shard (`smartcity.air_quality.shards.run_shard`) upserts its state here
+-- ('running', 'done' or 'failed', with row counts). The merge step reads the
+-- states of its run and fails if a shard is not done.
+
+create table if not exists public.openaq_ingestion_shards (
+    run_id text not null,
+    shard_id text not null,
+    status text not null,
+    sensors integer not null default 0,
+    rows bigint not null default 0,
+    rejected bigint not null default 0,
+    anomalies bigint not null default 0,
+    error text not null default '',
+    updated_at timestamptz not null default now(),
+    primary key (run_id, shard_id)
+);
@@ -0,0 +1,27 @@
+-- SmartCity — version column for the location catalogue.
+--
+-- `smartcity.air_quality.locations.LocationCatalogue` polls
+-- `count(*)` + `max(updated_at)` of `openaq_locations` and only re-reads the
+-- table when that tag changes. Without this column it falls back to reading
+-- the whole table and hashing it.
+
+alter table public.openaq_locations
+    add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists openaq_locations_touch_updated_at on public.openaq_locations;
+create trigger openaq_locations_touch_updated_at
+    before insert or update on public.openaq_locations
+    for each row execute function public.touch_updated_at();
+
+create index if not exists openaq_locations_updated_at_idx
+    on public.openaq_locations (updated_at desc);
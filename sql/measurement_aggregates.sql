@@ -0,0 +1,46 @@
+-- SmartCity — server-side aggregates for the Air Pollution dashboard.
+--
+-- Run once in the Supabase SQL editor (or `psql -f`). The dashboard calls the
+-- function through PostgREST (`supabase.rpc("measurements_daily_stats", ...)`)
+-- via `smartcity.database.read_daily_stats`.
+--
+-- One row per day × sensor × parameter with sum / count / min / max is enough
+-- to rebuild every dashboard aggregation (daily means per pollutant, averages
+-- per sensor and per weekday), so a 31-day window is a few hundred rows
+-- instead of tens of thousands of raw measurements.
+
+create or replace function public.measurements_daily_stats(
+    start_date timestamptz,
+    end_date timestamptz
+)
+returns table (
+    day date,
+    sensor_id bigint,
+    parameter_name text,
+    value_sum double precision,
+    value_count bigint,
+    value_min double precision,
+    value_max double precision
+)
+language sql
+stable
+as $$
+    select
+        m.datetime_from::date as day,
+        m.sensor_id::bigint,
+        m.parameter_name::text,
+        sum(m.value)::double precision,
+        count(m.value),
+        min(m.value)::double precision,
+        max(m.value)::double precision
+    from public.openaq_measurements m
+    where m.datetime_from >= start_date
+      and m.datetime_from <= end_date
+      and m.value is not null
+    group by 1, 2, 3
+    order by 1, 2, 3;
+$$;
+
+-- Range scans on datetime_from back both this function and read_db_between_dates.
+create index if not exists openaq_measurements_datetime_from_idx
+    on public.openaq_measurements (datetime_from);
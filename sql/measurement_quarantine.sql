@@ -0,0 +1,18 @@
+-- SmartCity — quarantine of rejected measurements.
+--
+-- `smartcity.air_quality.validation.validate_and_quarantine` diverts rows
+-- that would make an upsert fail (missing value, unknown unit, reversed
+-- period, ...) to this table instead of `openaq_measurements`. `record` holds
+-- the raw row, `reason` the failed checks. When the table is missing, rows
+-- are appended to `.cache/quarantine/openaq_measurements_quarantine.jsonl`.
+
+create table if not exists public.openaq_measurements_quarantine (
+    id bigint generated always as identity primary key,
+    sensor_id bigint,
+    reason text not null,
+    record jsonb not null,
+    quarantined_at timestamptz not null default now()
+);
+
+create index if not exists openaq_measurements_quarantine_sensor_idx
+    on public.openaq_measurements_quarantine (sensor_id, quarantined_at desc);
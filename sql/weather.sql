@@ -0,0 +1,35 @@
+-- SmartCity — hourly weather of the sensor locations (Open-Meteo).
+--
+-- `smartcity.weather.open_meteo` upserts one row per location, variable and
+-- hour: recent hours (model analysis) and forecasts, flagged by `is_forecast`.
+-- A forecast hour is overwritten by later runs. Retention mirrors
+-- `openaq_measurements`: `delete_old_weather(days)` is called by the flow.
+
+create table if not exists public.weather_hourly (
+    id bigint generated always as identity primary key,
+    location_id bigint not null,
+    parameter_name text not null,
+    value double precision,
+    parameter_units text,
+    datetime_from timestamptz not null,
+    is_forecast boolean not null default false,
+    updated_at timestamptz not null default now(),
+    unique (location_id, parameter_name, datetime_from)
+);
+
+create index if not exists weather_hourly_datetime_from_idx
+    on public.weather_hourly (datetime_from);
+
+create or replace function public.delete_old_weather(days integer)
+returns integer
+language plpgsql
+as $$
+declare
+    deleted integer;
+begin
+    delete from public.weather_hourly
+    where datetime_from < now() - make_interval(days => days);
+    get diagnostics deleted = row_count;
+    return deleted;
+end;
+$$;
@@ -5,6 +5,7 @@ import streamlit as st
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from smartcity.datasets import get_dataset_cache
 from smartcity.st_ui import add_sidebar_title
 
 
@@ -34,6 +35,7 @@ def run():
         page_icon="🏙️",
     )
     add_sidebar_title(title='SmartCity')
+    get_dataset_cache().start()  # warm up the dashboard datasets on the first visit
 
     # set_background("streamlit_app/assets/Background-clf.jpg")
     st.write(
@@ -1,61 +1,43 @@
 from datetime import datetime, timedelta, date
+from typing import Optional
 import pydeck as pdk
 
 import pandas as pd
 import numpy as np
 import streamlit as st
 import altair as alt
-from smartcity.database import read_db_between_dates, read_db
-from smartcity.config import TABLE_NAME_MEASUREMENTS, TABLE_NAME_LOCATIONS
-from smartcity.utils import get_dates_range
+from smartcity.config import DASHBOARD_AGGREGATED
+from smartcity.datasets import get_dataset, get_dataset_cache
+from smartcity.utils import slice_time_range
 from smartcity.st_ui import POLLUTANTS_INFO, POLLUTANTS_LIMITS, add_sidebar_title
+from smartcity.air_quality.aqi import (
+    EAQI_BANDS,
+    air_quality_index,
+    latest_index,
+    level_name,
+    rolling_sub_indices,
+    sub_index,
+)
+from smartcity.air_quality.cube import MeasurementCube, WEEKDAYS
+from smartcity.air_quality.locations import get_location_catalogue
+from smartcity.air_quality.map_layer import build_station_layer
+from smartcity.air_quality.spatial import GRID_RESOLUTION, SpatialIndex
 
-HIST_DAYS = 31  # 2 * 7 + 1
-
-
-def show_sensor_map(sensors: pd.DataFrame):
-    st.markdown("#### 🌍 Sensor Locations")
-    st.caption(
-        "Interactive map showing the location and characteristics of monitoring stations around Clermont-Ferrand."
-    )
-    grouped = (
-        sensors.groupby(
-            [
-                "id",
-                "name",
-                "locality",
-                "owner_name",
-                "provider_name",
-                "latitude",
-                "longitude",
-                "is_monitor",
-                "is_mobile",
-            ]
-        )
-        .agg(
-            {
-                "parameter_name": lambda x: ", ".join(sorted(set(x))),
-                "sensor_id": lambda x: ", ".join(map(str, sorted(set(x)))),
-            }
-        )
-        .reset_index()
-    )
-
-    grouped["color"] = grouped.apply(
-        lambda row: [0, 200, 100] if "no" in row["parameter_name"] else [255, 100, 50],
-        axis=1,
-    )
+@st.cache_resource(max_entries=2)
+def load_station_deck(version: str, _sensors: pd.DataFrame) -> pdk.Deck:
+    """Station layer for the map, built once per location catalogue version."""
+    stations = build_station_layer(_sensors)
 
     view_state = pdk.ViewState(
-        latitude=grouped["latitude"].mean(),
-        longitude=grouped["longitude"].mean(),
+        latitude=stations["latitude"].mean(),
+        longitude=stations["longitude"].mean(),
         zoom=12,
         pitch=0,
     )
 
     layer = pdk.Layer(
         "ScatterplotLayer",
-        data=grouped,
+        data=stations,
         get_position=["longitude", "latitude"],
         get_color="color",
         get_radius=150,
@@ -76,24 +58,113 @@ def show_sensor_map(sensors: pd.DataFrame):
         "style": {"backgroundColor": "white", "color": "black", "font-size": "13px"},
     }
 
+    return pdk.Deck(
+        map_style="road",
+        initial_view_state=view_state,
+        layers=[layer],
+        tooltip=tooltip,  # type: ignore
+    )
+
+
+def show_sensor_map(sensors: pd.DataFrame, version: str):
+    st.markdown("#### 🌍 Sensor Locations")
+    st.caption(
+        "Interactive map showing the location and characteristics of monitoring stations around Clermont-Ferrand."
+    )
+    st.pydeck_chart(load_station_deck(version, sensors))
+
+
+@st.cache_resource(max_entries=8)
+def load_spatial_index(version: str, parameter: str, _sensors: pd.DataFrame) -> SpatialIndex:
+    """KD-tree over a pollutant's sensors, built once per catalogue version (it also caches grids)."""
+    return SpatialIndex.from_catalogue(_sensors, parameter)
+
+
+@st.cache_data(max_entries=16)
+def load_hourly_means(data_version: str, parameter: str) -> pd.DataFrame:
+    """Hour × sensor mean values of a pollutant."""
+    data = load_data()
+    data = data[data["parameter_name"] == parameter]
+    hours = pd.to_datetime(data["datetime_from"], utc=True).dt.floor("h")
+    return data.groupby([hours, "sensor_id"])["value"].mean().unstack()
+
+
+def _value_colors(values: pd.Series, vmax: float) -> list:
+    """Green → red ramp, as [r, g, b, a] rows."""
+    t = np.clip(values.to_numpy() / vmax, 0, 1) if vmax > 0 else np.zeros(len(values))
+    return np.column_stack(
+        [255 * t, 200 * (1 - t) + 40, np.full(len(t), 60), np.full(len(t), 140)]
+    ).astype(int).tolist()
+
+
+@st.fragment
+def show_pollution_grid(
+    sensors: pd.DataFrame, version: str, pollutants: list, selected_days: tuple, data_version: str
+):
+    st.markdown("#### 🗺️ Interpolated Concentration")
+    st.caption(
+        "Hourly inverse-distance-weighted interpolation between the sensors, over Clermont-Ferrand."
+    )
+    if not pollutants:
+        return
+    pollutant = st.selectbox("Pollutant", pollutants, key="grid_pollutant")
+
+    s_date, e_date = selected_days
+    hourly = load_hourly_means(data_version, pollutant)
+    hourly = hourly[(hourly.index.date >= s_date) & (hourly.index.date <= e_date)]
+    if hourly.empty:
+        st.info("No hourly measurements for this pollutant in the selected range.")
+        return
+
+    hour = st.select_slider(
+        "Hour (UTC)",
+        options=list(hourly.index),
+        value=hourly.index[-1],
+        format_func=lambda h: f"{h:%d/%m %H:00}",
+        key="grid_hour",
+    )
+
+    index = load_spatial_index(version, pollutant, sensors)
+    if len(index) == 0:
+        st.info("No located sensor measures this pollutant.")
+        return
+    # Neighbour searches are done once per resolution; grids are cached per
+    # data load and hour (a reload may complete the last hour)
+    cells = index.grid_frame(index.grid((data_version, hour), hourly.loc[hour]))
+    cells["color"] = _value_colors(cells["value"], float(np.nanmax(hourly.to_numpy())))
+
+    layer = pdk.Layer(
+        "GridCellLayer",
+        data=cells,
+        get_position=["longitude", "latitude"],
+        get_fill_color="color",
+        cell_size=GRID_RESOLUTION,
+        extruded=False,
+        pickable=True,
+    )
     st.pydeck_chart(
         pdk.Deck(
             map_style="road",
-            initial_view_state=view_state,
+            initial_view_state=pdk.ViewState(
+                latitude=cells["latitude"].mean(), longitude=cells["longitude"].mean(), zoom=11
+            ),
             layers=[layer],
-            tooltip=tooltip,  # type: ignore
+            tooltip={"text": "{value} µg/m³"},  # type: ignore
         )
     )
 
 
-def show_sensor_distribution(data: pd.DataFrame, sensors: pd.DataFrame):
+def _sensor_counts_with_names(cube: MeasurementCube, sensors: pd.DataFrame) -> pd.DataFrame:
+    names = sensors[["sensor_id", "name"]].drop_duplicates("sensor_id")
+    counts = cube.sensor_counts().merge(names, on="sensor_id", how="left")
+    counts["sensor_id"] = counts["sensor_id"].astype(str) + " - " + counts["name"]
+    return counts
+
+
+def show_sensor_distribution(cube: MeasurementCube, sensors: pd.DataFrame):
     st.markdown("#### Sensor Distribution")
     st.caption("Distribution of measurements across different sensors/stations.")
-    data = data.merge(sensors[["sensor_id", "name"]], on="sensor_id", how="left")
-    data["sensor_id"] = data["sensor_id"].astype(str) + " - " + data["name"]
-
-    sensor_counts = data["sensor_id"].value_counts().reset_index()
-    sensor_counts.columns = ["sensor_id", "count"]
+    sensor_counts = _sensor_counts_with_names(cube, sensors)[["sensor_id", "count"]]
     # sensor_counts = sensor_counts.sort_values(by="count", ascending=False)
 
     bar_chart = (
@@ -110,15 +181,14 @@ def show_sensor_distribution(data: pd.DataFrame, sensors: pd.DataFrame):
     st.altair_chart(bar_chart, use_container_width=True)
 
 
-def show_station_distribution(data: pd.DataFrame, sensors: pd.DataFrame):
-    data = data.merge(sensors[["sensor_id", "name"]], on="sensor_id", how="left")
-    data["sensor_id"] = data["sensor_id"].astype(str) + " - " + data["name"]
+def show_station_distribution(cube: MeasurementCube, sensors: pd.DataFrame):
+    data = _sensor_counts_with_names(cube, sensors)
 
     st.altair_chart(
         alt.Chart(data)
         .mark_arc()
         .encode(
-            alt.Theta("count()"),
+            alt.Theta("sum(count):Q"),
             alt.Color(
                 "name:N",
                 scale=alt.Scale(
@@ -131,78 +201,164 @@ def show_station_distribution(data: pd.DataFrame, sensors: pd.DataFrame):
     )
 
 
-@st.cache_data
-def load_data():
-    start_date, end_date = get_dates_range(history_days=HIST_DAYS)
-    data = read_db_between_dates(
-        TABLE_NAME_MEASUREMENTS,
-        date_column="datetime_from",
-        start_date=start_date,
-        end_date=end_date,
-    )
-    data["datetime_from"] = pd.to_datetime(data["datetime_from"])
-    data["datetime_to"] = pd.to_datetime(data["datetime_to"])
-    data["date"] = data["datetime_from"].dt.date
-    return data
+def load_data() -> pd.DataFrame:
+    # Preloaded and refreshed in the background (shared frame: do not modify)
+    return get_dataset("measurements")[0]
+
+
+def data_version(aggregated: bool = False) -> str:
+    """Key of the dataset currently served, for the caches derived from it."""
+    return get_dataset("daily_stats" if aggregated else "measurements")[1]
+
+
+@st.cache_data(max_entries=2)
+def load_cube(data_version: str) -> MeasurementCube:
+    """Day × sensor × parameter aggregates, built once per data load."""
+    return MeasurementCube.from_measurements(load_data())
+
+
+@st.cache_data(max_entries=2)
+def load_aggregated_cube(data_version: str) -> MeasurementCube:
+    """Same cube, built from day × sensor × parameter stats computed in Postgres."""
+    return MeasurementCube.from_daily_stats(get_dataset("daily_stats")[0])
+
+
+@st.cache_data(max_entries=2)
+def load_aqi(data_version: str) -> pd.DataFrame:
+    """Hourly European AQI per station, computed once per data load."""
+    stations = load_sensors()[0][["sensor_id", "id"]].drop_duplicates("sensor_id")
+    sub_indices = rolling_sub_indices(load_data()).merge(stations, on="sensor_id")
+    return air_quality_index(sub_indices, by="id")
 
 
-@st.cache_data
 def load_sensors():
-    data = read_db(TABLE_NAME_LOCATIONS)
-    return data
+    # Shared, versioned catalogue: the table is only re-read when it changes.
+    catalogue = get_location_catalogue()
+    return catalogue.data, catalogue.version
+
+
+@st.cache_data(max_entries=32)
+def load_selection(
+    data_version: str,
+    s_date: date,
+    e_date: date,
+    aggregated: bool,
+    pollutants: Optional[tuple] = None,
+) -> MeasurementCube:
+    """Cube restricted to the selected days (and pollutants), cached per selection."""
+    cube = load_aggregated_cube(data_version) if aggregated else load_cube(data_version)
+    selection = cube.select(s_date, e_date)
+    if pollutants is None:
+        return selection
+    return selection.select(parameters=list(pollutants))
+
+
+@st.cache_data(max_entries=32)
+def load_trend_data(
+    data_version: str, s_date: date, e_date: date, aggregated: bool, pollutants: tuple
+) -> pd.DataFrame:
+    """Rows of the trend chart for a selection (raw measurements or daily means)."""
+    if aggregated:
+        return _daily_trend_data(
+            load_selection(data_version, s_date, e_date, aggregated, pollutants)
+        )
+    data = slice_time_range(load_data(), s_date, e_date + timedelta(days=1))
+    return data[data["parameter_name"].isin(pollutants)]
+
+
+@st.cache_data(max_entries=32)
+def load_aqi_range(data_version: str, s_date: date, e_date: date) -> pd.DataFrame:
+    """Hourly European AQI of the selected days."""
+    aqi = load_aqi(data_version)
+    in_range = (aqi["hour"] >= pd.Timestamp(s_date, tz="UTC")) & (
+        aqi["hour"] < pd.Timestamp(e_date + timedelta(days=1), tz="UTC")
+    )
+    return aqi[in_range]
 
 
-def show_pollution_page(selected_days: tuple):
-    df = load_data()
-    sensors = load_sensors()
+def show_pollution_page(selected_days: tuple, aggregated: bool = False):
+    # Sections only rebuild when their own inputs change: the pollutant pills
+    # rerun `show_pollutant_sections` alone, the grid sliders `show_pollution_grid`
+    # alone, while the KPIs and the station map only follow the sidebar.
+    s_date, e_date = selected_days
+    version = data_version(aggregated)
+    selection = load_selection(version, s_date, e_date, aggregated)
+    sensors, sensors_version = load_sensors()
 
-    if df.empty:
+    if selection.is_empty:
         st.warning("No air quality data available")
         return
 
-    s_date, e_date = selected_days
-    data = df[(df["date"] >= s_date) & (df["date"] <= e_date)].copy()
-
     # --- KPI Cards ---
-    show_kpis(data)
+    show_kpis(selection, None if aggregated else load_aqi_range(version, s_date, e_date))
 
     # plot_pollutants_over_time(data)
 
     # --- Air Quality Trends ---
+    list_pollutants = selection.available_parameters()
+    show_pollutant_sections(version, selected_days, aggregated, list_pollutants, sensors)
+
+    with st.container(border=True):  # ---- Sensor map ----
+        show_sensor_map(sensors, sensors_version)
+
+    if not aggregated:  # ---- Interpolated pollutant grid (hourly data only) ----
+        with st.container(border=True):
+            show_pollution_grid(
+                sensors, sensors_version, list_pollutants, selected_days, version
+            )
+
+
+@st.fragment
+def show_pollutant_sections(
+    data_version: str,
+    selected_days: tuple,
+    aggregated: bool,
+    list_pollutants: list,
+    sensors: pd.DataFrame,
+):
+    """Pollutant picker and the sections that depend on it, rerun on their own."""
     title = "Air Quality Trends"
     st.write(f"### {title}")
-    list_pollutants = data.parameter_name.unique()
     pollutants = st.pills(
         "Select pollutant(s)",
         list_pollutants,
         default=list_pollutants,
         selection_mode="multi",
+        key="pollutants",
     )
     if not pollutants:
         st.error("Please select at least one pollutant.")
 
-    filtered_data = data[data["parameter_name"].isin(pollutants)]
+    s_date, e_date = selected_days
+    key = tuple(sorted(pollutants))
+    filtered_cube = load_selection(data_version, s_date, e_date, aggregated, key)
+    filtered_data = load_trend_data(data_version, s_date, e_date, aggregated, key)
 
-    cols = st.columns([3, 1])  # ---- Pollutant trends + sensor distribution ----
+    cols = st.columns([3, 1])  # ---- Pollutant trends + station distribution ----
     with cols[0].container(border=True, height="stretch"):
         plot_pollutant_trends(filtered_data, pollutants)
 
     with cols[1].container(border=True, height="stretch"):
-        show_station_distribution(filtered_data, sensors)
+        show_station_distribution(filtered_cube, sensors)
 
-    cols = st.columns([1, 3])  #  --- Sensor map + sensor distribution ----
+    cols = st.columns([1, 3])  # ---- Sensor distribution + weekday heatmap ----
     with cols[0].container(border=True, height="stretch"):
-        show_sensor_distribution(filtered_data, sensors)
+        show_sensor_distribution(filtered_cube, sensors)
 
     with cols[1].container(border=True, height="stretch"):
-        show_sensor_map(sensors)
+        heatmap_pollutant_weekday(filtered_cube)
 
-    cols = st.columns(2)  # ---- Heatmaps: pollutant by weekday + by sensor ----
-    with cols[0].container(border=True, height="stretch"):
-        heatmap_pollutant_weekday(filtered_data)
+    with st.container(border=True):  # ---- Heatmap: pollutant by sensor ----
+        heatmap_pollutant_sensor(filtered_cube)
 
-    with cols[1].container(border=True, height="stretch"):
-        heatmap_pollutant_sensor(filtered_data)
+
+def _daily_trend_data(cube: MeasurementCube) -> pd.DataFrame:
+    """Daily means shaped like raw rows, for the trend chart in aggregated mode."""
+    daily = cube.daily_means().rename(columns={"date": "datetime_from"})
+    daily["parameter_units"] = daily["parameter_name"].map(
+        lambda pol: POLLUTANTS_INFO.get(pol, {}).get("unit", "")
+    )
+    return daily
 
 
 def plot_pollutant_trends(data: pd.DataFrame, pollutants: list):
@@ -226,17 +382,19 @@ def plot_pollutant_trends(data: pd.DataFrame, pollutants: list):
     st.altair_chart(chart, use_container_width=True)
 
 
-def show_kpis(data: pd.DataFrame):
+AQI_EMOJIS = ["🔵", "🟢", "🟡", "🟠", "🔴", "🟣"]
+
+
+def show_kpis(cube: MeasurementCube, aqi: Optional[pd.DataFrame] = None):
     st.markdown("### Air Quality Key Indicators")
     st.caption(
         "Daily average values for each selected pollutant, compared with EU thresholds."
     )
 
-    pollutants = data.parameter_name.unique()
-    daily_means = data.groupby(["date", "parameter_name"])["value"].mean().reset_index()
+    pollutants = cube.available_parameters()
+    daily_means = cube.daily_means()
 
     cols = st.columns(len(pollutants) + 1)
-    ratios = []
 
     for i, pol in enumerate(pollutants):
         pol_data = daily_means[daily_means["parameter_name"] == pol]
@@ -253,11 +411,8 @@ def show_kpis(data: pd.DataFrame):
         latest_value = pol_data["value"].iloc[-1]
 
         if limit and limit > 0:
-            ratio = latest_value / limit
-            ratios.append(ratio)
             status = "✅ Within limit" if latest_value <= limit else "⚠️ Above limit"
         else:
-            ratio = np.nan
             status = "ℹ️ No defined threshold"
 
         cols[i].metric(
@@ -266,37 +421,34 @@ def show_kpis(data: pd.DataFrame):
             delta=status,
         )
 
-    # --- Global AQI-like based on ALL pollutants (average ratio) ---
-    if ratios:
-        mean_ratio = np.nanmean(ratios)
-        aqi_score = round(mean_ratio * 100)
-
-        if aqi_score < 50:
-            aqi_label = "🟢 Good"
-        elif aqi_score < 100:
-            aqi_label = "🟠 Moderate"
-        else:
-            aqi_label = "🔴 Unhealthy"
+    # --- European AQI: worst station at the latest hour ---
+    if aqi is not None and not aqi.empty:
+        latest = latest_index(aqi)
+        worst = latest.loc[latest["index"].idxmax()]
+        level, dominant = int(worst["index"]), worst["dominant"]
+        detail = f"{latest['hour'].iat[0]:%d/%m %H:00} UTC · {len(latest)} stations"
     else:
-        aqi_label = "N/A"
-        aqi_score = None
+        # Daily aggregates only: index of the latest daily means
+        latest = daily_means.groupby("parameter_name")["value"].last()
+        levels = {p: int(sub_index(v, p)) for p, v in latest.items() if p in EAQI_BANDS}
+        dominant = max(levels, key=levels.get) if levels else None
+        level = levels[dominant] if levels else 0
+        detail = "latest daily means"
 
-    # KPI global AQI-like
     cols[len(pollutants)].metric(
-        "Global AQI-like",
-        f"{aqi_label}",
-        f"{'' if aqi_score is None else aqi_score}%",
+        "European AQI",
+        f"{AQI_EMOJIS[level - 1]} {level_name(level)}" if level else "N/A",
+        f"{POLLUTANTS_INFO.get(dominant, {}).get('nice_name', dominant)} · {detail}" if level else None,
+        delta_color="off",
+        help="European Air Quality Index (EEA): rolling 24h PM, 8h O₃ and hourly NO₂ means, worst pollutant of the worst station.",
     )
 
 
-def heatmap_pollutant_sensor(data: pd.DataFrame):
+def heatmap_pollutant_sensor(cube: MeasurementCube):
     """
     Display a heatmap of average pollutant concentration per sensor/station.
     """
-    # Group by sensor and pollutant
-    sensor_mean = (
-        data.groupby(["sensor_id", "parameter_name"])["value"].mean().reset_index()
-    )
+    sensor_mean = cube.sensor_means()
 
     heatmap_sensor = (
         alt.Chart(sensor_mean)
@@ -315,35 +467,17 @@ def heatmap_pollutant_sensor(data: pd.DataFrame):
     st.altair_chart(heatmap_sensor, use_container_width=True)
 
 
-def heatmap_pollutant_weekday(data: pd.DataFrame):
+def heatmap_pollutant_weekday(cube: MeasurementCube):
     """
     Display a heatmap of average pollutant concentration by day of the week.
     """
-    data["weekday"] = data["datetime_from"].dt.day_name()  # Monday, Tuesday, ...
-
-    weekday_mean = (
-        data.groupby(["weekday", "parameter_name"])["value"].mean().reset_index()
-    )
-
-    # Option pour ordonner les jours correctement
-    days_order = [
-        "Monday",
-        "Tuesday",
-        "Wednesday",
-        "Thursday",
-        "Friday",
-        "Saturday",
-        "Sunday",
-    ]
-    weekday_mean["weekday"] = pd.Categorical(
-        weekday_mean["weekday"], categories=days_order, ordered=True
-    )
+    weekday_mean = cube.weekday_means()
 
     heatmap_weekday = (
         alt.Chart(weekday_mean)
         .mark_rect()
         .encode(
-            x=alt.X("weekday:N", title="Day of Week"),
+            x=alt.X("weekday:N", title="Day of Week", sort=WEEKDAYS),
             y=alt.Y("parameter_name:N", title="Pollutant"),
             color=alt.Color("value:Q", title="Avg. Concentration (µg/m³)"),
             tooltip=["weekday:N", "parameter_name:N", "value:Q"],
@@ -392,7 +526,13 @@ def _prepare_sidebar():
     # st.sidebar.write(f"Showing data from **{filtered_start}** to **{filtered_end}**")
     # st.sidebar.write(f"Showing data from **{selected_days}**.")
 
-    return filtered_start, filtered_end
+    aggregated = st.sidebar.toggle(
+        "Daily aggregates only",
+        value=DASHBOARD_AGGREGATED,
+        help="Load daily statistics computed in the database instead of every raw measurement.",
+    )
+
+    return (filtered_start, filtered_end), aggregated
 
 # ------- main --------
 st.set_page_config(
@@ -415,6 +555,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-selected_days = _prepare_sidebar()
+get_dataset_cache().start()
+selected_days, aggregated = _prepare_sidebar()
 
-show_pollution_page(selected_days)
+show_pollution_page(selected_days, aggregated=aggregated)
@@ -1,5 +1,223 @@
+from datetime import timedelta
+
+import altair as alt
+import pandas as pd
 import streamlit as st
-from smartcity.st_ui import coming_soon, add_sidebar_title
+
+from smartcity.config import TABLE_NAME_MEASUREMENTS
+from smartcity.database import read_db_between_dates
+from smartcity.datasets import FORECAST_DAYS, WEATHER_DAYS, get_dataset, get_dataset_cache
+from smartcity.st_ui import POLLUTANTS_INFO, add_sidebar_title
+from smartcity.air_quality.locations import get_location_catalogue
+from smartcity.weather.correlation import CorrelationEngine
+from smartcity.weather.open_meteo import read_weather
+
+HIST_DAYS = WEATHER_DAYS
+CORRELATION_DAYS = 28  # history fed to an empty correlation engine
+
+WEATHER_INFO = {
+    "temperature_2m": {"nice_name": "Temperature", "emoji": "🌡️"},
+    "relative_humidity_2m": {"nice_name": "Humidity", "emoji": "💧"},
+    "precipitation": {"nice_name": "Precipitation", "emoji": "🌧️"},
+    "surface_pressure": {"nice_name": "Pressure", "emoji": "🧭"},
+    "wind_speed_10m": {"nice_name": "Wind speed", "emoji": "💨"},
+    "wind_direction_10m": {"nice_name": "Wind direction", "emoji": "🧭"},
+    "cloud_cover": {"nice_name": "Cloud cover", "emoji": "☁️"},
+    "shortwave_radiation": {"nice_name": "Solar radiation", "emoji": "☀️"},
+    "boundary_layer_height": {"nice_name": "Boundary layer height", "emoji": "🌫️"},
+}
+KPI_VARIABLES = ["temperature_2m", "relative_humidity_2m", "wind_speed_10m", "precipitation"]
+
+
+def _nice_name(variable: str) -> str:
+    return WEATHER_INFO.get(variable, {}).get("nice_name", variable)
+
+
+def load_weather() -> pd.DataFrame:
+    """Last days of hourly weather and the stored forecasts, for every location."""
+    # Preloaded and refreshed in the background (shared frame: do not modify)
+    return get_dataset("weather")[0]
+
+
+def load_stations() -> pd.DataFrame:
+    catalogue = get_location_catalogue().data
+    return catalogue[["id", "name"]].drop_duplicates("id").rename(columns={"id": "location_id"})
+
+
+def show_kpis(data: pd.DataFrame):
+    st.markdown("### Current Conditions")
+    observed = data[~data["is_forecast"]]
+    if observed.empty:
+        st.info("No observed hours yet.")
+        return
+    latest_hour = observed["datetime_from"].max()
+    st.caption(f"Mean over the selected stations at {latest_hour:%d/%m %H:00} UTC.")
+
+    cols = st.columns(len(KPI_VARIABLES))
+    for col, variable in zip(cols, KPI_VARIABLES):
+        rows = observed[observed["parameter_name"] == variable]
+        info = WEATHER_INFO[variable]
+        label = f"{info['emoji']} {info['nice_name']}"
+        if rows.empty:
+            col.metric(label, "N/A")
+            continue
+        unit = rows["parameter_units"].iat[0]
+        if variable == "precipitation":
+            # Cumulated over the last 24 hours
+            last_day = rows[rows["datetime_from"] > latest_hour - timedelta(hours=24)]
+            value = last_day.groupby("location_id")["value"].sum().mean()
+            col.metric(label, f"{value:.1f} {unit}", "last 24h", delta_color="off")
+            continue
+        now = rows[rows["datetime_from"] == latest_hour]["value"].mean()
+        day_before = rows[rows["datetime_from"] == latest_hour - timedelta(hours=24)]["value"].mean()
+        delta = None if pd.isna(day_before) else f"{now - day_before:+.1f} vs 24h ago"
+        col.metric(label, f"{now:.1f} {unit}", delta, delta_color="off")
+
+
+def plot_weather(data: pd.DataFrame, variable: str):
+    rows = data[data["parameter_name"] == variable]
+    if rows.empty:
+        st.info(f"No data for {_nice_name(variable)}.")
+        return
+    unit = rows["parameter_units"].iat[0]
+    hourly = (
+        rows.groupby(["datetime_from", "is_forecast"])["value"]
+        .agg(["mean", "min", "max"])
+        .reset_index()
+    )
+    hourly["series"] = hourly["is_forecast"].map({False: "Observed", True: "Forecast"})
+
+    base = alt.Chart(hourly).encode(x=alt.X("datetime_from:T", title="Time (UTC)"))
+    band = base.mark_area(opacity=0.2).encode(y="min:Q", y2="max:Q")
+    line = base.mark_line().encode(
+        y=alt.Y("mean:Q", title=f"{_nice_name(variable)} ({unit})"),
+        strokeDash=alt.StrokeDash("series:N", title=""),
+        tooltip=["datetime_from:T", "series:N", alt.Tooltip("mean:Q", format=".1f")],
+    )
+    now_rule = alt.Chart(pd.DataFrame({"now": [pd.Timestamp.now(tz="UTC")]})).mark_rule(
+        color="gray"
+    ).encode(x="now:T")
+    st.altair_chart((band + line + now_rule).properties(height=320), use_container_width=True)
+    st.caption("Line: mean over the selected stations; band: min–max between stations.")
+
+
+@st.cache_resource
+def load_correlation_engine() -> CorrelationEngine:
+    """Correlation statistics, resumed from the local cache and shared by all sessions."""
+    return CorrelationEngine.load()
+
+
+@st.cache_data(ttl=3600, max_entries=1)
+def refresh_correlations(data_version: str) -> str:
+    """
+    Feeds the correlation engine the days since its last one (the first time,
+    `CORRELATION_DAYS` days), so only new measurements are read and aligned.
+    Runs again when the flow publishes a new measurements version (or hourly).
+    Returns a key of the engine's statistics (changes on every update, even of
+    the current day), for the caches of the charts.
+    """
+    engine = load_correlation_engine()
+    now = pd.Timestamp.now(tz="UTC")
+    since = engine.last_day
+    if since is None:
+        since = (now - timedelta(days=CORRELATION_DAYS)).floor("D")
+    start, end = since.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y-%m-%d %H:%M:%S")
+    # Weather also covers the largest lag before the first measurement
+    weather_start = (since - timedelta(hours=max(engine.lags) + 1)).strftime("%Y-%m-%d %H:%M:%S")
+
+    measurements = read_db_between_dates(
+        TABLE_NAME_MEASUREMENTS, date_column="datetime_from", start_date=start, end_date=end
+    )
+    weather = read_weather(weather_start, end)
+    if engine.update(measurements, weather, get_location_catalogue().data):
+        engine.save()
+    return f"{engine.last_day}#{engine.revision}"
+
+
+@st.cache_data(max_entries=32)
+def load_lag_matrix(version: str, parameter: str, window_days: int) -> pd.DataFrame:
+    return load_correlation_engine().lag_matrix(parameter, window_days=window_days)
+
+
+def show_correlations():
+    st.markdown("### Pollution ↔ Weather")
+    st.caption(
+        "Pearson correlation between hourly pollutant concentrations and the weather "
+        "at the station a few hours before (pooled over all sensors)."
+    )
+    version = refresh_correlations(get_dataset_cache().marker(TABLE_NAME_MEASUREMENTS))
+    engine = load_correlation_engine()
+    pooled = engine.correlations(by_sensor=False)
+    if pooled.empty:
+        st.info("Not enough overlapping pollution and weather data yet.")
+        return
+
+    pollutants = sorted(pooled["parameter_name"].unique())
+    col_pol, col_window = st.columns(2)
+    parameter = col_pol.selectbox(
+        "Pollutant",
+        pollutants,
+        format_func=lambda p: POLLUTANTS_INFO.get(p, {}).get("nice_name", p),
+        key="corr_pollutant",
+    )
+    window_days = col_window.slider("Window (days)", 3, CORRELATION_DAYS, 14, key="corr_window")
+
+    matrix = load_lag_matrix(version, parameter, window_days)
+    cells = matrix.stack(future_stack=True).rename("r").reset_index()
+    cells["variable"] = cells["variable"].map(_nice_name)
+    heatmap = (
+        alt.Chart(cells)
+        .mark_rect()
+        .encode(
+            x=alt.X("lag:O", title="Weather lead (hours)"),
+            y=alt.Y("variable:N", title=None),
+            color=alt.Color("r:Q", scale=alt.Scale(scheme="redblue", domain=[-1, 1], reverse=True)),
+            tooltip=["variable:N", "lag:O", alt.Tooltip("r:Q", format=".2f")],
+        )
+        .properties(height=280)
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+
+    col_var, col_lag = st.columns(2)
+    variable = col_var.selectbox(
+        "Weather variable", list(matrix.index), format_func=_nice_name, key="corr_variable"
+    )
+    lag = col_lag.selectbox("Lead (hours)", engine.lags, key="corr_lag")
+    rolling = engine.rolling_correlation(parameter, variable, lag=lag, window_days=7)
+    if rolling.dropna().empty:
+        st.info("Not enough pairs for a rolling correlation.")
+        return
+    st.line_chart(rolling.rename("7-day correlation"), height=220)
+
+
+def show_weather_page():
+    data = load_weather()
+    if data.empty:
+        st.warning("No weather data available yet: run the `workflow_weather` flow.")
+        return
+
+    stations = load_stations()
+    names = stations.set_index("location_id")["name"]
+    available = sorted(data["location_id"].unique())
+    selected = st.sidebar.multiselect(
+        "Stations",
+        available,
+        format_func=lambda location_id: names.get(location_id, str(location_id)),
+        help="Weather at the air quality stations (all of them when empty).",
+    )
+    if selected:
+        data = data[data["location_id"].isin(selected)]
+
+    show_kpis(data)
+    st.divider()
+
+    st.markdown("### Hourly Weather & Forecast")
+    variables = [v for v in WEATHER_INFO if v in set(data["parameter_name"])]
+    variable = st.selectbox("Variable", variables, format_func=_nice_name)
+    plot_weather(data, variable)
+    st.divider()
+
+    show_correlations()
 
 
 # ------- main --------
@@ -9,5 +227,10 @@ st.set_page_config(
     layout="wide",
 )
 add_sidebar_title(title="SmartCity")
-coming_soon("Clermont-Ferrand Weather 🌦️", "Live climate and weather insights will be available here. This page is under construction.")
-st.caption("Stay tuned for live climate and weather insights across Clermont-Ferrand.")
\ No newline at end of file
+get_dataset_cache().start()
+st.markdown("## Clermont-Ferrand Weather 🌦️")
+st.caption(
+    f"Hourly weather at the air quality stations from **Open-Meteo**: last {HIST_DAYS} days "
+    f"and {FORECAST_DAYS}-day forecasts, refreshed by the weather ETL."
+)
+show_weather_page()
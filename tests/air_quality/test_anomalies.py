@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from postgrest import APIError
+from unittest.mock import patch
+
+from smartcity.air_quality.anomalies import AnomalyDetector, detect_anomalies
+
+
+def _series(sensor_id, values, start="2025-01-01T00:00:00+00:00", parameter="no2"):
+    hours = pd.date_range(start, periods=len(values), freq="h")
+    return pd.DataFrame(
+        {
+            "sensor_id": sensor_id,
+            "parameter_name": parameter,
+            "datetime_from": hours.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            "value": values,
+        }
+    )
+
+
+def test_flags_spike_and_stuck_sensor():
+    rng = np.random.default_rng(1)
+    noisy = rng.normal(30, 3, 72)
+    noisy[60] = 120.0
+    stuck = np.concatenate([rng.normal(20, 2, 30), np.full(20, 7.0)])
+
+    detector = AnomalyDetector()
+    anomalies = detector.update(pd.concat([_series(1, noisy), _series(2, stuck)]))
+
+    spikes = anomalies[anomalies["kind"] == "spike"]
+    assert 120.0 in spikes[spikes["sensor_id"] == 1]["value"].tolist()
+    assert spikes[spikes["sensor_id"] == 2]["value"].tolist() == [7.0]  # level drop
+    stuck_rows = anomalies[anomalies["kind"] == "stuck"]
+    assert stuck_rows["sensor_id"].tolist() == [2]
+    assert stuck_rows["datetime_from"].iat[0] == pd.Timestamp("2025-01-02T17:00:00Z")
+
+
+def test_incremental_updates_match_single_pass():
+    values = np.random.default_rng(2).normal(50, 5, 100)
+    data = _series(1, values)
+
+    whole = AnomalyDetector()
+    whole.update(data)
+
+    incremental = AnomalyDetector()
+    incremental.update(data.iloc[:40])
+    # Overlapping re-fetch: already seen rows are skipped
+    incremental.update(data.iloc[20:70])
+    resumed = AnomalyDetector(incremental.state_frame())
+    resumed.update(data.iloc[60:])
+
+    pd.testing.assert_frame_equal(resumed.state, whole.state, check_dtype=False)
+    assert resumed.state["count"].iat[0] == 100
+    assert np.isclose(resumed.state["mean"].iat[0], 50, atol=5)
+
+
+@patch("smartcity.air_quality.anomalies.upsert_rows")
+@patch("smartcity.air_quality.anomalies.read_db")
+def test_detect_anomalies_saves_state_and_anomalies(mock_read, mock_upsert):
+    mock_read.side_effect = APIError({"code": "PGRST205", "message": "Could not find the table"})
+    values = np.full(30, 5.0)
+
+    assert detect_anomalies(_series(3, values)) == 1
+
+    tables = [call.args[1] for call in mock_upsert.call_args_list]
+    assert tables == ["openaq_anomalies", "openaq_anomaly_state"]
+    state = mock_upsert.call_args_list[1].args[0]
+    assert state[["sensor_id", "parameter_name", "count"]].values.tolist() == [[3, "no2", 30]]
+
+
+@patch("smartcity.air_quality.anomalies.upsert_rows")
+@patch("smartcity.air_quality.anomalies.read_db", side_effect=ConnectionError("timed out"))
+def test_unreadable_state_is_not_overwritten(mock_read, mock_upsert):
+    with pytest.raises(ConnectionError):
+        detect_anomalies(_series(3, np.full(30, 5.0)))
+    mock_upsert.assert_not_called()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from smartcity.air_quality.aqi import (
+    air_quality_index,
+    latest_index,
+    rolling_sub_indices,
+    sub_index,
+)
+
+
+def _hourly(sensor_id, parameter, values, start="2025-01-01T00:00:00+01:00"):
+    hours = pd.date_range(start, periods=len(values), freq="h")
+    return pd.DataFrame(
+        {
+            "sensor_id": sensor_id,
+            "parameter_name": parameter,
+            "datetime_from": hours.astype(str),
+            "value": values,
+        }
+    )
+
+
+def test_sub_index_bands():
+    assert sub_index([5, 10, 10.5, 25, 60, 900, np.nan], "pm25").tolist() == [1, 1, 2, 3, 5, 6, 0]
+
+
+def test_rolling_means_match_pandas():
+    rng = np.random.default_rng(0)
+    pm = rng.uniform(0, 60, 48)
+    pm[[5, 30]] = np.nan  # gaps
+    o3 = rng.uniform(20, 150, 48)
+    data = pd.concat([_hourly(1, "pm25", pm), _hourly(2, "o3", o3), _hourly(3, "co", o3)])
+
+    result = rolling_sub_indices(data)
+
+    assert set(result["parameter_name"]) == {"pm25", "o3"}
+    expected_pm = pd.Series(pm).rolling(24, min_periods=18).mean().dropna()
+    got_pm = result[result["sensor_id"] == 1]["concentration"].to_numpy()
+    np.testing.assert_allclose(got_pm, expected_pm.to_numpy())
+    expected_o3 = pd.Series(o3).rolling(8, min_periods=6).mean().dropna()
+    got_o3 = result[result["sensor_id"] == 2]
+    np.testing.assert_allclose(got_o3["concentration"].to_numpy(), expected_o3.to_numpy())
+    assert got_o3["hour"].iloc[0] == pd.Timestamp("2024-12-31T23:00:00Z") + pd.Timedelta(hours=5)
+    np.testing.assert_array_equal(got_o3["sub_index"], sub_index(expected_o3, "o3"))
+
+
+def test_air_quality_index_takes_worst_pollutant_per_station():
+    data = pd.concat([_hourly(1, "pm25", [5.0] * 24), _hourly(2, "no2", [100.0] * 24)])
+    sub_indices = rolling_sub_indices(data)
+    sub_indices["id"] = 10  # both sensors belong to the same station
+
+    aqi = air_quality_index(sub_indices, by="id")
+    latest = latest_index(aqi)
+
+    assert len(latest) == 1
+    assert latest["index"].iat[0] == 3
+    assert latest["dominant"].iat[0] == "no2"
+    assert str(latest["level"].iat[0]) == "Moderate"
@@ -0,0 +1,80 @@
+import time
+
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from smartcity.air_quality.backfill import Checkpoint, plan_work_units, run_backfill
+from smartcity.air_quality.rate_limit import RateLimiter
+
+
+def test_plan_work_units_covers_range():
+    units = plan_work_units([1, 2], "2025-01-01", "2025-01-20", window_days=7)
+
+    assert len(units) == 6
+    assert [u.date_from for u in units if u.sensor_id == 1] == [
+        "2025-01-01 00:00:00",
+        "2025-01-08 00:00:00",
+        "2025-01-15 00:00:00",
+    ]
+    assert units[-1].date_to == "2025-01-20 00:00:00"
+
+    with pytest.raises(ValueError):
+        plan_work_units([1], "2025-01-20", "2025-01-01")
+
+
+def _window(sensor_id, date_from, **kwargs):
+    return pd.DataFrame(
+        {
+            "parameter_name": ["no2"],
+            "value": [float(sensor_id)],
+            "parameter_units": ["µg/m³"],
+            "datetime_from": [date_from],
+            "datetime_to": [date_from],
+        }
+    )
+
+
+@patch("smartcity.air_quality.backfill.make_client")
+@patch("smartcity.air_quality.backfill.upsert_measurements")
+@patch("smartcity.air_quality.streaming.iter_sensor_pages")
+def test_backfill_resumes_from_checkpoint(mock_fetch, mock_upsert, _client, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    calls = []
+    interrupted = {"sensor": 2}
+
+    def flaky(client, sensor_id, date_from, date_to, **kwargs):
+        calls.append((sensor_id, date_from))
+        if sensor_id == interrupted["sensor"]:
+            raise RuntimeError("interrupted")
+        return iter([_window(sensor_id, date_from)])
+
+    mock_fetch.side_effect = flaky
+    kwargs = dict(
+        start_date="2025-01-01",
+        end_date="2025-01-15",
+        sensor_ids=[1, 2],
+        max_workers=1,
+        requests_per_minute=6000,
+        checkpoint_path=checkpoint,
+    )
+
+    first = run_backfill(**kwargs)
+    assert first["failed"] == 2
+    assert len(Checkpoint(checkpoint).done) == 2
+
+    calls.clear()
+    interrupted["sensor"] = None
+    second = run_backfill(**kwargs)
+    assert second["skipped"] == 2
+    assert second["completed"] == 2
+    assert sorted(c[0] for c in calls) == [2, 2]
+    assert mock_upsert.call_count == 4
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=20, period=1.0)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.14
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date
+
+from smartcity.air_quality.cube import MeasurementCube
+
+
+@pytest.fixture
+def measurements():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "datetime_from": pd.Timestamp("2025-10-01T00:00:00+02:00")
+            + pd.to_timedelta(rng.integers(0, 14 * 24, n), unit="h"),
+            "sensor_id": rng.choice([11, 22, 33], n),
+            "parameter_name": rng.choice(["no2", "o3", "pm10"], n),
+            "value": rng.uniform(0, 80, n),
+        }
+    )
+    df["date"] = df["datetime_from"].dt.date
+    return df
+
+
+def test_daily_means_match_groupby(measurements):
+    cube = MeasurementCube.from_measurements(measurements)
+    expected = (
+        measurements.groupby(["date", "parameter_name"])["value"].mean().reset_index()
+    )
+    result = cube.daily_means()
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True), expected, check_dtype=False
+    )
+
+
+def test_select_range_and_parameters(measurements):
+    cube = MeasurementCube.from_measurements(measurements)
+    start, end = date(2025, 10, 3), date(2025, 10, 9)
+    subset = measurements[
+        (measurements["date"] >= start)
+        & (measurements["date"] <= end)
+        & (measurements["parameter_name"].isin(["no2"]))
+    ]
+
+    selection = cube.select(start, end, parameters=["no2"])
+    assert selection.available_parameters() == ["no2"]
+
+    expected = subset.groupby("sensor_id")["value"].mean().to_numpy()
+    np.testing.assert_allclose(selection.sensor_means()["value"], expected)
+
+    counts = selection.sensor_counts()
+    assert counts["count"].sum() == len(subset)
+
+
+def test_weekday_means_and_stats(measurements):
+    cube = MeasurementCube.from_measurements(measurements)
+    weekday = measurements["datetime_from"].dt.day_name()
+    expected = measurements.groupby([weekday, "parameter_name"])["value"].mean()
+
+    result = cube.weekday_means()
+    for row in result.itertuples():
+        assert row.value == pytest.approx(expected[(row.weekday, row.parameter_name)])
+
+    stats = cube.daily_stats()
+    grouped = measurements.groupby(["date", "parameter_name"])["value"]
+    np.testing.assert_allclose(stats["min"], grouped.min().to_numpy())
+    np.testing.assert_allclose(stats["max"], grouped.max().to_numpy())
+
+
+def test_empty_cube():
+    cube = MeasurementCube.from_measurements(pd.DataFrame())
+    assert cube.is_empty
+    assert cube.daily_means().empty
+
+
+def test_from_daily_stats_matches_raw_build(measurements):
+    raw = MeasurementCube.from_measurements(measurements)
+    grouped = measurements.groupby(["date", "sensor_id", "parameter_name"])["value"]
+    stats = pd.DataFrame(
+        {
+            "value_sum": grouped.sum(),
+            "value_count": grouped.count(),
+            "value_min": grouped.min(),
+            "value_max": grouped.max(),
+        }
+    ).reset_index().rename(columns={"date": "day"})
+
+    cube = MeasurementCube.from_daily_stats(stats)
+
+    np.testing.assert_array_equal(cube.days, raw.days)
+    np.testing.assert_array_equal(cube.count, raw.count)
+    np.testing.assert_allclose(cube.sum, raw.sum)
+    pd.testing.assert_frame_equal(cube.daily_stats(), raw.daily_stats())
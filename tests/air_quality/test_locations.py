@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from smartcity.air_quality.locations import LocationCatalogue
+
+
+@pytest.fixture
+def locations():
+    return pd.DataFrame(
+        {
+            "id": [1, 1, 2],
+            "name": ["Jardin Lecoq", "Jardin Lecoq", "Montferrand"],
+            "sensor_id": [101, 102, 201],
+            "parameter_name": ["no2", "pm10", "o3"],
+        }
+    )
+
+
+def test_indexed_lookups(locations):
+    catalogue = LocationCatalogue(locations, version="3:v1")
+
+    assert catalogue.sensor_ids() == [101, 102, 201]
+    assert catalogue.location_ids() == [1, 2]
+    assert catalogue.by_sensor(201)["name"] == "Montferrand"
+    assert catalogue.by_sensor(999) is None
+    assert catalogue.by_location(1)["sensor_id"].tolist() == [101, 102]
+    assert catalogue.by_location(999).empty
+
+
+@patch("smartcity.air_quality.locations.read_db")
+@patch("smartcity.air_quality.locations.read_table_version")
+def test_load_reads_table_only_when_version_changes(
+    mock_version, mock_read_db, locations, tmp_path
+):
+    mock_version.return_value = "3:v1"
+    mock_read_db.return_value = locations
+
+    first = LocationCatalogue.load(cache_dir=str(tmp_path))
+    second = LocationCatalogue.load(cache_dir=str(tmp_path))  # served from disk
+    assert mock_read_db.call_count == 1
+    assert second.version == first.version == "3:v1"
+    assert second.sensor_ids() == first.sensor_ids()
+
+    mock_version.return_value = "4:v2"
+    third = LocationCatalogue.load(cache_dir=str(tmp_path), cached=second)
+    assert mock_read_db.call_count == 2
+    assert third.version == "4:v2"
+
+
+@patch("smartcity.air_quality.locations.read_db")
+@patch("smartcity.air_quality.locations.read_table_version")
+def test_load_falls_back_to_content_hash(mock_version, mock_read_db, locations, tmp_path):
+    mock_version.side_effect = Exception("column updated_at does not exist")
+    mock_read_db.return_value = locations
+
+    catalogue = LocationCatalogue.load(cache_dir=str(tmp_path))
+
+    assert len(catalogue.version) == 40
+    assert catalogue.by_sensor(101)["parameter_name"] == "no2"
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from smartcity.air_quality.map_layer import STATION_COLUMNS, build_station_layer
+
+
+def test_build_station_layer_matches_groupby():
+    sensors = pd.DataFrame(
+        {
+            "id": [2, 1, 1, 2, 3],
+            "name": ["B", "A", "A", "B", "C"],
+            "locality": ["x", "y", "y", "x", "z"],
+            "owner_name": "owner",
+            "provider_name": "EEA",
+            "latitude": [45.78, 45.77, 45.77, 45.78, 45.79],
+            "longitude": [3.08, 3.09, 3.09, 3.08, 3.10],
+            "is_monitor": True,
+            "is_mobile": False,
+            "parameter_name": ["pm10", "o3", "no2", "o3", "pm25"],
+            "sensor_id": [21, 12, 11, 22, 31],
+        }
+    )
+
+    expected = (
+        sensors.groupby(STATION_COLUMNS)
+        .agg(
+            {
+                "parameter_name": lambda x: ", ".join(sorted(set(x))),
+                "sensor_id": lambda x: ", ".join(map(str, sorted(set(x)))),
+            }
+        )
+        .reset_index()
+    )
+    expected["color"] = expected.apply(
+        lambda row: [0, 200, 100] if "no" in row["parameter_name"] else [255, 100, 50],
+        axis=1,
+    )
+
+    result = build_station_layer(sensors).sort_values("id", ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_build_station_layer_empty():
+    assert build_station_layer(pd.DataFrame()).empty
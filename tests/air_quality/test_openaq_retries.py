@@ -0,0 +1,87 @@
+import http.client
+import io
+
+import openaq
+import pytest
+from openaq.core.transport import Response, Transport
+from unittest.mock import MagicMock, patch
+
+from smartcity.air_quality.openaq_api import _list_measurements, make_client
+from smartcity.air_quality.rate_limit import AdaptiveRateLimiter, backoff_delay
+
+
+def _response():
+    response = MagicMock()
+    response.headers.x_ratelimit_limit = 60
+    response.headers.x_ratelimit_remaining = 30
+    response.headers.x_ratelimit_reset = 20
+    return response
+
+
+@patch("smartcity.air_quality.openaq_api.time.sleep")
+def test_throttled_requests_are_retried(mock_sleep):
+    client = MagicMock()
+    response = _response()
+    client.measurements.list.side_effect = [
+        openaq.HTTPRateLimitError("429"),
+        openaq.ServiceUnavailableError("503"),
+        response,
+    ]
+    limiter = AdaptiveRateLimiter(6000)
+    limiter.acquire = MagicMock(return_value=0.0)
+
+    result = _list_measurements(client, limiter, sensors_id=1, page=1)
+
+    assert result is response
+    assert client.measurements.list.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert limiter.rate == 3000 + 1  # halved once on the 429, +1 on success
+
+
+@patch("smartcity.air_quality.openaq_api.time.sleep")
+def test_client_errors_are_not_retried(mock_sleep):
+    client = MagicMock()
+    client.measurements.list.side_effect = openaq.BadRequestError("400")
+
+    with pytest.raises(openaq.BadRequestError):
+        _list_measurements(client, None, sensors_id=1)
+    assert client.measurements.list.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+@patch("smartcity.air_quality.openaq_api.time.sleep")
+def test_retries_are_bounded(mock_sleep):
+    client = MagicMock()
+    client.measurements.list.side_effect = openaq.HTTPRateLimitError("429")
+
+    with pytest.raises(openaq.HTTPRateLimitError):
+        _list_measurements(client, None, max_retries=2, sensors_id=1)
+    assert client.measurements.list.call_count == 3
+
+
+@patch("smartcity.air_quality.openaq_api.time.sleep")
+def test_retry_after_header_sets_the_delay(mock_sleep):
+    headers = http.client.parse_headers(io.BytesIO(b"Retry-After: 7\r\n\r\n"))
+    throttled = Response(429, b'{"detail": "Too many requests"}', headers)
+    client = make_client(api_key="0" * 64)
+    limiter = AdaptiveRateLimiter(6000)
+    limiter.acquire = MagicMock(return_value=0.0)
+
+    with patch.object(Transport, "_raw_request", return_value=throttled):
+        with pytest.raises(openaq.HTTPRateLimitError) as error:
+            _list_measurements(client, limiter, max_retries=1, sensors_id=1, data="hours")
+
+    assert error.value.status_code == 429
+    mock_sleep.assert_called_once_with(7.0)
+
+
+def test_backoff_delay_respects_bounds():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base_delay=1, max_delay=8) <= 8
+    assert backoff_delay(0, retry_after=12) >= 12
+
+
+def test_limiter_pauses_when_quota_exhausted():
+    limiter = AdaptiveRateLimiter(60)
+    limiter.on_success(remaining=0, reset=30)
+    assert limiter._blocked_until > 0
@@ -0,0 +1,77 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from smartcity.air_quality.response_cache import ResponseCache
+
+
+@pytest.fixture
+def page():
+    return pd.DataFrame({"parameter_name": ["no2"] * 24, "value": range(24)})
+
+
+def test_roundtrip_and_stats(tmp_path, page):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get(1, "2024-01-01", "2024-01-02") is None
+
+    cache.set(1, "2024-01-01", "2024-01-02", 1, page)
+
+    pd.testing.assert_frame_equal(cache.get(1, "2024-01-01", "2024-01-02"), page)
+    assert cache.get(1, "2024-01-01", "2024-01-02", page=2) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_ttl_depends_on_window_age(tmp_path):
+    cache = ResponseCache(str(tmp_path), closed_ttl=100, open_ttl=1)
+    recent = pd.Timestamp.now(tz="UTC").isoformat()
+    assert cache.ttl_for("2024-01-02 00:00:00") == 100
+    assert cache.ttl_for(recent) == 1
+
+
+def test_expired_entries_are_dropped(tmp_path, page):
+    cache = ResponseCache(str(tmp_path), open_ttl=-1)
+    now = pd.Timestamp.now(tz="UTC").isoformat()
+    cache.set(1, now, now, 1, page)
+    assert cache.get(1, now, now) is None
+    assert not os.listdir(tmp_path)
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path, page):
+    cache = ResponseCache(str(tmp_path))
+    cache.set(1, "2024-01-01", "2024-01-02", 1, page)
+    entry_size = os.path.getsize(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    cache.max_bytes = 2 * entry_size
+
+    cache.set(2, "2024-01-01", "2024-01-02", 1, page)
+    old = time.time() - 60
+    for name in os.listdir(tmp_path):
+        os.utime(os.path.join(tmp_path, name), (old, old))
+    cache.get(1, "2024-01-01", "2024-01-02")  # sensor 1 becomes most recent
+
+    cache.set(3, "2024-01-01", "2024-01-02", 1, page)
+
+    assert cache.get(1, "2024-01-01", "2024-01-02") is not None
+    assert cache.get(2, "2024-01-01", "2024-01-02") is None
+    assert cache.get(3, "2024-01-01", "2024-01-02") is not None
+
+
+def test_page_size_is_part_of_the_key(tmp_path, page):
+    cache = ResponseCache(str(tmp_path))
+    cache.set(1, "2024-01-01", "2024-01-02", 1, page, limit=24)
+    assert cache.get(1, "2024-01-01", "2024-01-02", limit=100) is None
+    pd.testing.assert_frame_equal(cache.get(1, "2024-01-01", "2024-01-02", limit=24), page)
+
+
+def test_overwrite_and_expiry_keep_the_size_total(tmp_path, page):
+    cache = ResponseCache(str(tmp_path), open_ttl=-1)
+    for _ in range(3):  # overwrites of the same entry
+        cache.set(1, "2024-01-01", "2024-01-02", 1, page)
+    entry_size = os.path.getsize(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    assert cache._bytes == entry_size
+
+    now = pd.Timestamp.now(tz="UTC").isoformat()
+    cache.set(2, now, now, 1, page)
+    assert cache.get(2, now, now) is None  # expired: removed from disk and from the total
+    assert cache._bytes == entry_size
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from smartcity.air_quality.shards import (
+    Shard,
+    merge_shard_states,
+    plan_shards,
+    run_shard,
+    shard_request_budget,
+)
+
+
+def _catalogue():
+    rows = []
+    for sensor_id in range(1, 8):
+        rows.append({"sensor_id": sensor_id, "id": 100, "locality": "Clermont-Ferrand"})
+    for sensor_id in range(8, 10):
+        rows.append({"sensor_id": sensor_id, "id": 200, "locality": "Aubière"})
+    rows.append({"sensor_id": 10, "id": 300, "locality": None})
+    rows.append({"sensor_id": 10, "id": 300, "locality": None})  # duplicate row
+    return pd.DataFrame(rows)
+
+
+def test_plan_shards_packs_and_splits_groups():
+    shards = plan_shards(_catalogue(), max_sensors=4)
+
+    assert [s.shard_id for s in shards] == [
+        "000-aubiere",
+        "001-clermont-ferrand",
+        "002-clermont-ferrand",
+    ]
+    assert shards[0].sensor_ids == (8, 9)
+    assert shards[1].sensor_ids == (1, 2, 3, 4)
+    assert shards[2].sensor_ids == (5, 6, 7, 10)
+    assert shards[2].groups == ("Clermont-Ferrand", "location-300")
+    covered = sorted(i for s in shards for i in s.sensor_ids)
+    assert covered == list(range(1, 11))
+    assert plan_shards(_catalogue(), max_sensors=4) == shards
+
+
+@patch("smartcity.air_quality.shards.read_db_where", return_value=pd.DataFrame())
+@patch("smartcity.air_quality.shards.record_shard_state")
+@patch("smartcity.air_quality.shards.stream_openaq_data")
+@patch("smartcity.air_quality.shards.AnomalyDetector")
+def test_run_shard_records_states(mock_detector, mock_stream, mock_record, mock_read):
+    mock_stream.side_effect = [{"rows": 10, "rejected": 1, "batches": 1}, RuntimeError("boom")]
+    mock_detector.load.return_value.save.return_value = 2
+    shard = Shard("000-a", (1, 2), ("a",))
+
+    summary = run_shard("run-1", shard, "2025-01-01", "2025-01-02", requests_per_minute=15)
+
+    assert summary["anomalies"] == 2
+    assert mock_stream.call_args.kwargs["requests_per_minute"] == 15
+    mock_detector.load.assert_called_with(sensor_ids=[1, 2])
+    assert [c.args[2] for c in mock_record.call_args_list] == ["running", "done"]
+
+    with pytest.raises(RuntimeError):
+        run_shard("run-1", shard, "2025-01-01", "2025-01-02")
+    assert mock_record.call_args.args[2] == "failed"
+    assert mock_record.call_args.kwargs["error"] == "boom"
+
+    # Retried run: a shard already done is not ingested again
+    mock_read.return_value = pd.DataFrame(
+        [{"status": "done", "rows": 10, "rejected": 1, "anomalies": 2}]
+    )
+    assert run_shard("run-1", shard, "2025-01-01", "2025-01-02")["rows"] == 10
+    assert mock_stream.call_count == 2
+
+
+@patch("smartcity.air_quality.shards.read_db_where")
+def test_merge_shard_states(mock_read):
+    mock_read.return_value = pd.DataFrame(
+        {
+            "shard_id": ["a", "b", "c"],
+            "status": ["done", "done", "failed"],
+            "rows": [10, 5, 0],
+            "rejected": [1, 0, 0],
+            "anomalies": [0, 2, 0],
+        }
+    )
+
+    assert merge_shard_states("run-1", ["a", "b"]) == {
+        "shards": 2,
+        "done": 2,
+        "rows": 15,
+        "rejected": 1,
+        "anomalies": 2,
+    }
+    with pytest.raises(RuntimeError, match=r"\['c', 'd'\]"):
+        merge_shard_states("run-1", ["a", "b", "c", "d"])
+
+
+def test_shards_split_the_request_budget():
+    assert shard_request_budget(4, requests_per_minute=60) == 15
+    assert shard_request_budget(0, requests_per_minute=60) == 60
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartcity.air_quality import spatial
+from smartcity.air_quality.spatial import SpatialIndex
+
+SENSORS = pd.DataFrame(
+    {
+        "sensor_id": [1, 2, 3, 4, 5],
+        "parameter_name": ["no2", "no2", "no2", "o3", "no2"],
+        "latitude": [45.77, 45.78, 45.76, 45.77, np.nan],
+        "longitude": [3.08, 3.10, 3.12, 3.09, 3.10],
+    }
+)
+
+
+def test_from_catalogue_filters_parameter_and_missing_coordinates():
+    index = SpatialIndex.from_catalogue(SENSORS, parameter="no2")
+    assert sorted(index.sensor_ids.tolist()) == [1, 2, 3]
+
+
+def test_nearest_station_lookup():
+    index = SpatialIndex.from_catalogue(SENSORS, parameter="no2")
+
+    ids, distances = index.nearest([45.7701, 45.761], [3.0801, 3.119], k=2)
+
+    assert ids[:, 0].tolist() == [1, 3]
+    assert distances[0, 0] < 20
+    assert (distances[:, 0] <= distances[:, 1]).all()
+
+
+def test_kdtree_matches_brute_force(monkeypatch):
+    values = pd.Series({1: 10.0, 2: 30.0, 3: 50.0})
+    grid = SpatialIndex.from_catalogue(SENSORS, "no2").interpolate(values, resolution=500)
+
+    monkeypatch.setattr(spatial, "cKDTree", None)
+    brute = SpatialIndex.from_catalogue(SENSORS, "no2").interpolate(values, resolution=500)
+
+    np.testing.assert_allclose(grid, brute)
+    assert np.nanmin(grid) >= 10 and np.nanmax(grid) <= 50
+
+
+def test_interpolation_skips_missing_sensors():
+    index = SpatialIndex.from_catalogue(SENSORS, "no2")
+    values = pd.Series({1: 10.0, 2: np.nan})
+
+    idw = index.interpolate(values, resolution=1000)
+    nearest = index.interpolate(values, resolution=1000, method="nearest")
+
+    np.testing.assert_allclose(idw, 10.0)
+    np.testing.assert_allclose(nearest, 10.0)
+    with pytest.raises(ValueError):
+        index.interpolate(values, method="kriging")
+
+
+def test_grids_are_cached_by_timestamp_and_resolution():
+    index = SpatialIndex.from_catalogue(SENSORS, "no2")
+    hour = pd.Timestamp("2025-01-01T10:00Z")
+
+    first = index.grid(hour, pd.Series({1: 1.0, 2: 2.0, 3: 3.0}))
+    again = index.grid(hour, pd.Series({1: 9.0}))
+    coarse = index.grid(hour, pd.Series({1: 9.0}), resolution=1000)
+
+    assert again is first
+    assert coarse.shape != first.shape
+    frame = index.grid_frame(coarse, resolution=1000)
+    assert len(frame) == coarse.size
+    np.testing.assert_allclose(frame["value"], 9.0)
+
+    reloaded = index.grid(("v2", hour), pd.Series({1: 9.0}))  # keyed by data version too
+    assert reloaded is not first
+
+
+def test_empty_index_gives_empty_grid():
+    index = SpatialIndex([], [], [])
+    grid = index.interpolate(pd.Series(dtype=float), resolution=1000)
+    assert grid.size and np.isnan(grid).all()
+    assert index.grid_frame(grid, resolution=1000).empty
@@ -0,0 +1,80 @@
+import pandas as pd
+from unittest.mock import MagicMock, patch
+
+from smartcity.air_quality.streaming import (
+    batch_by_memory,
+    drop_duplicate_measurements,
+    iter_measurement_pages,
+    load_stream,
+)
+
+
+def _page(sensor_id, hours, value=1.0):
+    dates = pd.date_range("2025-01-01", periods=24, freq="h")[hours]
+    return pd.DataFrame(
+        {
+            "parameter_name": "pm25",
+            "parameter_units": "µg/m³",
+            "value": value,
+            "datetime_from": dates.astype(str),
+            "datetime_to": (dates + pd.Timedelta(hours=1)).astype(str),
+            "sensor_id": sensor_id,
+        }
+    )
+
+
+def test_drop_duplicate_measurements_across_pages():
+    pages = [_page(1, [0, 1, 1]), _page(1, [1, 2]), _page(2, [0, 1]), _page(2, [1])]
+
+    out = list(drop_duplicate_measurements(pages))
+
+    assert [len(df) for df in out] == [2, 1, 2]
+    assert pd.concat(out).groupby("sensor_id").size().to_dict() == {1: 3, 2: 2}
+
+
+def test_batch_by_memory_respects_budget():
+    pages = [_page(1, list(range(24))) for _ in range(10)]
+    page_bytes = int(pages[0].memory_usage(index=False, deep=True).sum())
+
+    batches = list(batch_by_memory(pages, max_bytes=3 * page_bytes))
+
+    assert sum(len(b) for b in batches) == 240
+    assert max(len(b) for b in batches) == 72
+
+    # A single page above the budget is split
+    split = list(batch_by_memory(pages[:1], max_bytes=page_bytes // 4))
+    assert sum(len(b) for b in split) == 24
+    assert len(split) >= 4
+
+
+def test_load_stream_consumes_pages_lazily():
+    consumed = []
+
+    def pages():
+        for hour in range(6):
+            consumed.append(hour)
+            yield _page(1, [hour])
+
+    loaded = []
+    budget = int(_page(1, [1]).memory_usage(index=False, deep=True).sum()) * 2 + 10
+
+    def loader(batch):
+        # Only the pages of the current batch (+ the one read ahead) were pulled
+        assert len(consumed) <= sum(len(b) for b in loaded) + len(batch) + 1
+        loaded.append(batch)
+
+    summary = load_stream(pages(), max_bytes=budget, loader=loader)
+
+    assert summary == {"rows": 6, "rejected": 0, "batches": 3}
+
+
+@patch("smartcity.air_quality.streaming.iter_sensor_pages")
+def test_iter_measurement_pages_tags_sensor(mock_pages):
+    mock_pages.side_effect = lambda client, sensor_id, *args, **kwargs: iter(
+        [_page(0, [0, 1]).drop(columns="sensor_id")]
+    )
+
+    pages = list(iter_measurement_pages(MagicMock(), [7, 8], "2025-01-01", "2025-01-02"))
+
+    assert [df["sensor_id"].unique().tolist() for df in pages] == [[7], [8]]
+    assert "updated_at" in pages[0]
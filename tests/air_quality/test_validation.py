@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from smartcity.air_quality.validation import (
+    quarantine_measurements,
+    validate_and_quarantine,
+    validate_measurements,
+)
+
+
+def _measurements():
+    return pd.DataFrame(
+        {
+            "sensor_id": [1, 1, 2, 2, 3, None],
+            "parameter_name": ["pm25", "pm25", "no2", "no2", "o3", "o3"],
+            "parameter_units": ["µg/m³", "µg/m³", "furlongs", "µg/m³", "µg/m³", "µg/m³"],
+            "value": [12.0, np.nan, 5.0, -3.0, 40.0, 41.0],
+            "datetime_from": [
+                "2025-01-01T00:00:00+01:00",
+                "2025-01-01T01:00:00+01:00",
+                "2025-01-01T00:00:00+01:00",
+                "2025-01-01T00:00:00+01:00",
+                "2025-01-01T02:00:00+01:00",
+                "2025-01-01T00:00:00+01:00",
+            ],
+            "datetime_to": [
+                "2025-01-01T01:00:00+01:00",
+                "2025-01-01T02:00:00+01:00",
+                "2025-01-01T01:00:00+01:00",
+                "2025-01-01T01:00:00+01:00",
+                "2025-01-01T01:00:00+01:00",
+                "2025-01-01T01:00:00+01:00",
+            ],
+        }
+    )
+
+
+def test_validate_measurements_reasons():
+    clean, rejected = validate_measurements(_measurements())
+
+    assert clean.index.tolist() == [0]
+    assert rejected["reason"].to_dict() == {
+        1: "missing value",
+        2: "unknown unit",
+        3: "value out of range",
+        4: "datetime_from after datetime_to",
+        5: "missing sensor_id",
+    }
+
+
+def test_validate_measurements_requires_columns():
+    with pytest.raises(ValueError, match="missing columns"):
+        validate_measurements(_measurements().drop(columns="parameter_units"))
+
+
+def test_quarantine_falls_back_to_file(tmp_path):
+    _, rejected = validate_measurements(_measurements())
+
+    with patch("smartcity.air_quality.validation.load_to_supabase", side_effect=RuntimeError("no table")):
+        path = quarantine_measurements(rejected, fallback_dir=str(tmp_path))
+
+    lines = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert len(lines) == 5
+    assert lines[0]["reason"] == "missing value"
+    assert lines[0]["record"]["value"] is None
+
+
+@patch("smartcity.air_quality.validation.load_to_supabase")
+def test_validate_and_quarantine_returns_clean_rows(mock_load):
+    clean = validate_and_quarantine(_measurements())
+
+    assert len(clean) == 1
+    payload, table_name = mock_load.call_args.args
+    assert table_name == "openaq_measurements_quarantine"
+    assert payload["sensor_id"].tolist()[:4] == [1, 2, 2, 3]
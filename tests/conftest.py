@@ -0,0 +1,28 @@
+import pytest
+
+from smartcity import archive, config, database, profiling
+from smartcity.database import query_cache
+
+# Modules holding their own copy of the Supabase credentials (`from smartcity.config import ...`)
+CREDENTIAL_MODULES = (config, database, archive, profiling)
+
+
+@pytest.fixture(autouse=True)
+def supabase_credentials(monkeypatch):
+    """
+    Dummy Supabase credentials when none are configured, so the functions that
+    check them before creating a client reach the mocked `create_client`.
+    """
+    for module in CREDENTIAL_MODULES:
+        if not module.SUPABASE_URL:
+            monkeypatch.setattr(module, "SUPABASE_URL", "http://supabase.test")
+        if not module.SUPABASE_KEY:
+            monkeypatch.setattr(module, "SUPABASE_KEY", "test-key")
+
+
+@pytest.fixture(autouse=True)
+def empty_query_cache():
+    """Reads must not be served from another test's cached result."""
+    query_cache.invalidate()
+    yield
+    query_cache.invalidate()
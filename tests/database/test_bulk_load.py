@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+
+from smartcity.database import UNIQUE_MEASUREMENT, bulk_upsert
+
+psycopg = pytest.importorskip("psycopg")
+
+# Run against a local Postgres, e.g.:
+#   SMARTCITY_TEST_DB_URL=postgresql://postgres@localhost:5432/postgres pytest tests/database
+DB_URL = os.getenv("SMARTCITY_TEST_DB_URL")
+pytestmark = pytest.mark.skipif(not DB_URL, reason="SMARTCITY_TEST_DB_URL not set")
+
+TABLE = "test_bulk_openaq_measurements"
+
+
+@pytest.fixture
+def table():
+    with psycopg.connect(DB_URL, autocommit=True) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                parameter_name text NOT NULL,
+                value double precision,
+                parameter_units text NOT NULL,
+                datetime_from timestamptz NOT NULL,
+                datetime_to timestamptz NOT NULL,
+                period text,
+                summary text,
+                percent_coverage double precision,
+                sensor_id bigint NOT NULL,
+                updated_at timestamptz,
+                UNIQUE ({UNIQUE_MEASUREMENT})
+            )
+            """
+        )
+        yield conn
+        conn.execute(f"DROP TABLE {TABLE}")
+
+
+def _measurements(n: int, value: float) -> pd.DataFrame:
+    start = pd.Timestamp("2025-01-01T00:00:00+01:00")
+    return pd.DataFrame(
+        {
+            "parameter_name": "no2",
+            "value": value,
+            "parameter_units": "µg/m³",
+            "datetime_from": [(start + pd.Timedelta(hours=i)).isoformat() for i in range(n)],
+            "datetime_to": [(start + pd.Timedelta(hours=i + 1)).isoformat() for i in range(n)],
+            "period": "1h",
+            "summary": None,
+            "percent_coverage": 100.0,
+            "sensor_id": 42,
+            "updated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        }
+    )
+
+
+def test_bulk_upsert_inserts_then_updates(table):
+    assert bulk_upsert(_measurements(1000, 1.0), table_name=TABLE, db_url=DB_URL) == 1000
+
+    updated = pd.concat([_measurements(1200, 2.0), _measurements(10, 3.0)])  # with duplicates
+    assert bulk_upsert(updated, table_name=TABLE, db_url=DB_URL) == 1200
+
+    count, distinct_values = table.execute(
+        f"SELECT count(*), count(DISTINCT value) FROM {TABLE}"
+    ).fetchone()
+    assert count == 1200
+    assert distinct_values == 2
+    # Duplicated keys: the last row of the frame wins
+    first_hours = table.execute(
+        f"SELECT DISTINCT value FROM {TABLE} WHERE datetime_from < "
+        "'2025-01-01T10:00:00+01:00'"
+    ).fetchall()
+    assert first_hours == [(3.0,)]
+
+
+def test_bulk_upsert_empty_frame_is_noop(table):
+    assert bulk_upsert(pd.DataFrame(), table_name=TABLE, db_url=DB_URL) == 0
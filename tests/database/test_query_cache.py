@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from smartcity.database import (
+    QueryCache,
+    query_cache,
+    read_db_between_dates,
+    read_db_where,
+    upsert_rows,
+)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"sensor_id": range(100), "value": 1.0})
+
+
+def test_hit_miss_and_copies(frame):
+    cache = QueryCache(max_bytes=10**6, ttls={"measurements": 60})
+    key = cache.key("measurements", filters={"sensor_id": [2, 1]})
+    assert key == cache.key("measurements", filters={"sensor_id": (1, 2)})
+
+    assert cache.get(key) is None
+    cache.put(key, frame)
+    cached = cache.get(key)
+    pd.testing.assert_frame_equal(cached, frame)
+    cached["value"] = 0.0  # callers may modify what they get
+    assert (cache.get(key)["value"] == 1.0).all()
+    assert cache.stats() | {"bytes": 0} == {
+        "hits": 2, "misses": 1, "hit_rate": 0.667, "evictions": 0, "entries": 1, "bytes": 0
+    }
+
+    other = cache.key("locations")  # no TTL for this table: never cached
+    cache.put(other, frame)
+    assert cache.get(other) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_and_ttl(frame):
+    size = int(frame.memory_usage(deep=True).sum())
+    cache = QueryCache(max_bytes=2 * size, ttls={"a": 60, "b": 0.05})
+    first, second, third = (cache.key("a", range_=(i,)) for i in range(3))
+    cache.put(first, frame)
+    cache.put(second, frame)
+    cache.get(first)  # most recently used: `second` is evicted next
+    cache.put(third, frame)
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.stats()["evictions"] == 1
+
+    short = cache.key("b")
+    cache.put(short, frame)
+    with patch("smartcity.database.time.monotonic", return_value=float("inf")):
+        assert cache.get(short) is None
+
+
+@patch("smartcity.database.requests.post")
+@patch("smartcity.database.create_client")
+def test_reads_are_shared_until_a_write(mock_create_client, mock_post):
+    query = mock_create_client.return_value.table.return_value.select.return_value
+    query.gte.return_value.lte.return_value.range.return_value.execute.return_value.data = [
+        {"sensor_id": 1, "value": 2.0}
+    ]
+    read = lambda: read_db_between_dates(
+        "openaq_measurements", "datetime_from", "2025-01-01", "2025-01-02"
+    )
+    first = read()
+    pd.testing.assert_frame_equal(read(), first)
+    assert mock_create_client.call_count == 1  # second read served from the cache
+
+    mock_post.return_value = MagicMock(ok=True)
+    upsert_rows(first, "openaq_measurements", on_conflict="sensor_id")
+    read()
+    assert mock_create_client.call_count == 2
+
+
+@patch("smartcity.database.create_client")
+def test_state_tables_are_not_cached(mock_create_client):
+    query = mock_create_client.return_value.table.return_value.select.return_value
+    query.eq.return_value.range.return_value.execute.return_value.data = []
+    read_db_where("openaq_ingestion_shards", {"run_id": "r1"})
+    read_db_where("openaq_ingestion_shards", {"run_id": "r1"})
+    assert mock_create_client.call_count == 2
+    assert query_cache.stats()["entries"] == 0
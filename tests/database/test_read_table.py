@@ -2,7 +2,7 @@ from postgrest import APIError
 import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
-from smartcity.database import read_db, SUPABASE_URL, SUPABASE_KEY
+from smartcity.database import read_db, read_daily_stats, SUPABASE_URL, SUPABASE_KEY
 
 def test_missing_table(monkeypatch):
     with pytest.raises(APIError, match="Could not find the table"):
@@ -35,3 +35,22 @@ def test_read_db_returns_empty_dataframe(mock_create_client):
     
     assert isinstance(df, pd.DataFrame)
     assert df.empty
+
+
+@patch("smartcity.database.create_client")
+def test_read_daily_stats_calls_rpc(mock_create_client):
+    mock_client = MagicMock()
+    mock_client.rpc.return_value.range.return_value.execute.return_value.data = [
+        {"day": "2025-10-01", "sensor_id": 1, "parameter_name": "no2",
+         "value_sum": 30.0, "value_count": 3, "value_min": 5.0, "value_max": 15.0},
+    ]
+    mock_create_client.return_value = mock_client
+
+    df = read_daily_stats("2025-10-01", "2025-10-02")
+
+    mock_client.rpc.assert_called_once_with(
+        "measurements_daily_stats",
+        {"start_date": "2025-10-01", "end_date": "2025-10-02"},
+    )
+    assert len(df) == 1
+    assert df.iloc[0]["value_count"] == 3
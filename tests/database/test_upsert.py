@@ -0,0 +1,99 @@
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartcity.database import (
+    UNIQUE_MEASUREMENT,
+    bulk_upsert,
+    encode_copy_csv,
+    encode_records,
+    upsert_measurements,
+)
+
+
+def _measurements(n):
+    return pd.DataFrame(
+        {
+            "sensor_id": np.arange(n),
+            "parameter_name": "pm25",
+            "parameter_units": "µg/m³",
+            "value": [1.5] * (n - 1) + [np.nan],
+            "datetime_from": pd.date_range("2025-01-01", periods=n, freq="h", tz="UTC"),
+        }
+    )
+
+
+def test_encode_records_matches_to_dict():
+    df = _measurements(3)
+    records = json.loads(encode_records(df))
+
+    assert len(records) == 3
+    assert records[0]["sensor_id"] == 0
+    assert records[0]["parameter_units"] == "µg/m³"
+    assert records[2]["value"] is None
+    assert records[1]["datetime_from"] == "2025-01-01T01:00:00Z"
+
+
+def test_encode_records_gzip_roundtrip():
+    df = _measurements(50)
+    assert gzip.decompress(encode_records(df, compress=True)) == encode_records(df)
+
+
+@patch("smartcity.database.requests.post")
+def test_upsert_measurements_posts_chunks(mock_post):
+    mock_post.return_value = MagicMock(ok=True)
+
+    result = upsert_measurements(_measurements(5), chunk_size=2, return_records=False)
+
+    assert result == []
+    assert mock_post.call_count == 3
+    kwargs = mock_post.call_args.kwargs
+    assert kwargs["params"] == {"on_conflict": UNIQUE_MEASUREMENT}
+    assert "resolution=merge-duplicates" in kwargs["headers"]["Prefer"]
+    assert "return=minimal" in kwargs["headers"]["Prefer"]
+    assert len(json.loads(kwargs["data"])) == 1  # last chunk
+
+
+@patch("smartcity.database.GZIP_REQUESTS", True)
+@patch("smartcity.database.requests.post")
+def test_upsert_measurements_gzip_body(mock_post):
+    mock_post.return_value = MagicMock(ok=True)
+    mock_post.return_value.json.return_value = [{"id": 1}]
+
+    assert upsert_measurements(_measurements(2)) == [{"id": 1}]
+    kwargs = mock_post.call_args.kwargs
+    assert kwargs["headers"]["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(kwargs["data"]))) == 2
+
+
+def test_encode_copy_csv_writes_json_and_nulls():
+    df = pd.DataFrame(
+        {
+            "sensor_id": [1, 2],
+            "coordinates": [{"latitude": 45.78, "longitude": 3.08}, None],
+            "parameters": [["no2", "pm10"], np.nan],
+            "value": [1.5, np.nan],
+        }
+    )
+    rows = encode_copy_csv(df).splitlines()
+
+    assert rows[0] == '1,"{""latitude"": 45.78, ""longitude"": 3.08}","[""no2"", ""pm10""]",1.5'
+    assert rows[1] == "2,,,"
+
+
+@patch("smartcity.database.psycopg")
+def test_bulk_upsert_keeps_the_last_duplicate(mock_psycopg):
+    pytest.importorskip("psycopg")
+    cursor = mock_psycopg.connect.return_value.__enter__.return_value.cursor.return_value
+    cursor = cursor.__enter__.return_value
+    cursor.rowcount = 1
+    df = pd.DataFrame({"sensor_id": [1, 1], "value": [1.0, 2.0]})
+
+    assert bulk_upsert(df, table_name="t", on_conflict="sensor_id", db_url="postgresql://x") == 1
+
+    merge = cursor.execute.call_args_list[-1].args[0].as_string(None)
+    assert 'ORDER BY "sensor_id", _copy_row DESC' in merge
@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from smartcity.database import publish_data_version
+from smartcity.datasets import DatasetCache, get_dataset_cache
+
+
+@pytest.fixture
+def loader():
+    mock = MagicMock()
+    mock.side_effect = lambda: pd.DataFrame({"value": [mock.call_count]})
+    return mock
+
+
+@pytest.fixture
+def cache(loader, tmp_path):
+    cache = DatasetCache(cache_dir=str(tmp_path), interval=3600)
+    cache.register("measurements", loader, "openaq_measurements")
+    return cache
+
+
+@patch("smartcity.datasets.read_data_versions")
+def test_reload_only_when_version_moves(mock_versions, cache, loader):
+    mock_versions.return_value = {"openaq_measurements": "v1"}
+    assert cache.warm_up() == ["measurements"]
+    data, key = cache.get("measurements")
+    assert cache.refresh() == []  # same version: nothing reloaded
+    assert cache.get("measurements") == (data, key)
+
+    mock_versions.return_value = {"openaq_measurements": "v2"}
+    assert cache.refresh() == ["measurements"]
+    assert loader.call_count == 2
+    assert cache.get("measurements")[1].startswith("v2@")
+    assert cache.marker("openaq_measurements") == "v2"
+
+
+@patch("smartcity.datasets.read_data_versions")
+def test_failed_reload_keeps_serving_previous_copy(mock_versions, cache, loader):
+    mock_versions.return_value = {"openaq_measurements": "v1"}
+    cache.warm_up()
+    served = cache.get("measurements")
+
+    loader.side_effect = Exception("Supabase unreachable")
+    mock_versions.return_value = {"openaq_measurements": "v2"}
+    assert cache.refresh() == []
+    assert cache.get("measurements") == served
+
+
+@patch("smartcity.datasets.read_data_versions", side_effect=Exception("no table"))
+def test_restart_serves_disk_copy(mock_versions, cache, loader, tmp_path):
+    first, _ = cache.get("measurements")  # never loaded: loads synchronously
+    assert loader.call_count == 1
+
+    restarted = DatasetCache(cache_dir=str(tmp_path))
+    restarted.register("measurements", loader, "openaq_measurements")
+    assert restarted.warm_up() == []  # fresh copy on disk, no marker: not reloaded
+    pd.testing.assert_frame_equal(restarted.get("measurements")[0], first)
+    assert loader.call_count == 1
+
+
+@patch("smartcity.datasets.read_data_versions")
+def test_lazy_dataset_loads_on_first_get(mock_versions, cache):
+    mock_versions.return_value = {"openaq_measurements": "v1"}
+    raw = MagicMock(return_value=pd.DataFrame({"value": [1.0]}))
+    cache.register("raw", raw, "openaq_measurements", preload=False)
+
+    assert cache.warm_up() == ["measurements"]
+    raw.assert_not_called()
+    cache.get("raw")
+    assert raw.call_count == 1
+
+    mock_versions.return_value = {"openaq_measurements": "v2"}  # requested once: now refreshed
+    assert sorted(cache.refresh()) == ["measurements", "raw"]
+
+
+@patch("smartcity.database.upsert_rows")
+def test_publish_data_version(mock_upsert):
+    assert publish_data_version("weather_hourly", "run-42") == "run-42"
+    marker, table = mock_upsert.call_args.args
+    assert table == "smartcity_data_versions"
+    assert marker[["dataset", "version"]].values.tolist() == [["weather_hourly", "run-42"]]
+    assert mock_upsert.call_args.kwargs["on_conflict"] == "dataset"
+
+
+@pytest.mark.parametrize("aggregated", [False, True])
+def test_default_view_dataset_is_preloaded(aggregated):
+    with patch("smartcity.datasets._cache", None), patch(
+        "smartcity.datasets.DASHBOARD_AGGREGATED", aggregated
+    ):
+        cache = get_dataset_cache()
+    preloaded = {name for name in cache.names() if cache._datasets[name].preload}
+    expected = {"daily_stats", "weather"} if aggregated else {"measurements", "daily_stats", "weather"}
+    assert preloaded == expected
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from postgrest import APIError
+from unittest.mock import patch
+
+from smartcity.air_quality.anomalies import AnomalyDetector
+from prefect_flows.task import detect_openaq_anomalies, insert_openaq_data
+
+
+def _measurements(values):
+    hours = pd.date_range("2025-01-01T00:00:00+00:00", periods=len(values), freq="h")
+    return pd.DataFrame(
+        {
+            "sensor_id": 1,
+            "parameter_name": "no2",
+            "parameter_units": "µg/m³",
+            "value": values,
+            "datetime_from": hours.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+            "datetime_to": (hours + pd.Timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        }
+    )
+
+
+@patch("smartcity.air_quality.anomalies.upsert_rows")
+@patch(
+    "smartcity.air_quality.anomalies.read_db",
+    side_effect=APIError({"code": "PGRST205", "message": "Could not find the table"}),
+)
+@patch("smartcity.air_quality.validation.quarantine_measurements", return_value="quarantine")
+@patch("prefect_flows.task.upsert_measurements")
+def test_quarantined_rows_raise_no_anomaly(mock_upsert, mock_quarantine, _read, mock_save):
+    values = np.random.default_rng(3).normal(30, 3, 48)
+    values[40] = 50_000.0  # out of range for µg/m³: quarantined
+    raw = _measurements(values)
+    assert len(AnomalyDetector().update(raw)) == 1  # the spike, if it reached detection
+    clean = insert_openaq_data.fn(raw)
+
+    assert len(clean) == 47
+    assert mock_quarantine.call_args.args[0]["value"].tolist() == [50_000.0]
+    pd.testing.assert_frame_equal(mock_upsert.call_args.args[0], clean)
+    assert detect_openaq_anomalies.fn(clean) == 0
@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from smartcity import insights
+from smartcity.insights import InsightIndex, daily_summaries, embed_texts, index_daily_insights
+
+
+@pytest.fixture(params=["faiss", "numpy"])
+def backend(request):
+    if request.param == "faiss":
+        pytest.importorskip("faiss")
+        yield "faiss"
+    else:
+        with patch.object(insights, "faiss", None):
+            yield "numpy"
+
+
+@pytest.fixture
+def stats():
+    return pd.DataFrame(
+        {
+            "day": ["2025-01-01", "2025-01-02", "2025-01-01", "2025-01-02"],
+            "sensor_id": [101, 101, 201, 201],
+            "parameter_name": ["no2", "no2", "pm10", "pm10"],
+            "value_sum": [240.0, 1200.0, 480.0, 470.0],
+            "value_count": [24, 24, 24, 24],
+            "value_min": [2.0, 20.0, 10.0, 9.0],
+            "value_max": [20.0, 90.0, 30.0, 31.0],
+        }
+    )
+
+
+@pytest.fixture
+def locations():
+    return pd.DataFrame({"sensor_id": [101, 201], "name": ["Jardin Lecoq", "Montferrand"]})
+
+
+def test_embeddings_are_normalised_and_deterministic():
+    vectors = embed_texts(["no2 rising at Jardin Lecoq", "no2 rising at Jardin Lecoq", ""])
+    assert vectors.dtype == np.float32
+    assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert not vectors[2].any()
+
+
+def test_daily_summaries(stats, locations):
+    summaries = daily_summaries(stats, locations)
+    assert summaries[["sensor_id", "day"]].values.tolist() == [
+        [101, "2025-01-01"],
+        [101, "2025-01-02"],
+        [201, "2025-01-01"],
+        [201, "2025-01-02"],
+    ]
+    text = summaries["text"].iat[1]
+    assert "Jardin Lecoq" in text and "daily mean 50.0" in text
+    assert "Air quality fair" in text  # 50 µg/m³ NO2
+    assert "Trend rising (+400% vs previous day)" in text
+    assert "Trend" not in summaries["text"].iat[0]
+
+
+def test_append_and_search(backend, stats, locations, tmp_path):
+    directory = str(tmp_path / "index")
+    index = InsightIndex(directory)
+    assert index.search("anything").empty
+
+    summaries = daily_summaries(stats, locations)
+    assert index.append(summaries.iloc[:2]) == 2
+    assert index.append(summaries) == 2  # already indexed documents are skipped
+    assert len(index) == 4
+    segments = sorted(os.listdir(directory))
+    assert len([s for s in segments if s.startswith("segment-")]) == 2
+
+    top = index.search("no2 Jardin Lecoq rising", k=2)
+    assert top["sensor_id"].tolist() == [101, 101]
+    assert top["day"].iat[0] == "2025-01-02"
+    assert top["score"].is_monotonic_decreasing
+
+    # Reopened from disk: same results, nothing rebuilt
+    reopened = InsightIndex(directory).search("no2 Jardin Lecoq rising", k=2)
+    pd.testing.assert_frame_equal(top, reopened)
+
+
+def test_changed_document_supersedes_previous(backend, stats, locations, tmp_path):
+    index = InsightIndex(str(tmp_path))
+    index.append(daily_summaries(stats, locations))
+
+    updated = stats.copy()
+    updated.loc[3, "value_sum"] = 4800.0  # Montferrand PM10 day 2 now extremely poor
+    assert index.append(daily_summaries(updated, locations)) == 1
+    assert len(index) == 4
+
+    hits = index.search("pm10 Montferrand", k=2)
+    assert hits["sensor_id"].tolist() == [201, 201]
+    assert sorted(hits["day"]) == ["2025-01-01", "2025-01-02"]
+    assert any("extremely poor" in text for text in hits["text"])
+
+    index.compact()
+    assert len(index) == 4
+    assert len(index.documents) == 4
+    pd.testing.assert_frame_equal(
+        hits.drop(columns="id").reset_index(drop=True),
+        index.search("pm10 Montferrand", k=2).drop(columns="id").reset_index(drop=True),
+    )
+
+
+def test_context_and_current_days_are_not_indexed(stats, locations, tmp_path):
+    today = stats.assign(day="2025-01-03")
+    appended = index_daily_insights(
+        pd.concat([stats, today]),
+        locations,
+        directory=str(tmp_path),
+        first_day="2025-01-02 00:00:00",
+        end_day="2025-01-03 00:00:00",
+    )
+    assert appended == 2
+    documents = InsightIndex(str(tmp_path)).documents.values()
+    assert {d["day"] for d in documents} == {"2025-01-02"}
+    assert all("Trend" in d["text"] for d in documents)
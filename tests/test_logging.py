@@ -0,0 +1,47 @@
+import json
+import logging
+import threading
+
+from smartcity import LazyMessage, _JsonFormatter, flush_logs, logger, LOG_FILE_PATH
+
+
+def test_lazy_message_not_evaluated_when_level_disabled():
+    calls = []
+    logger.debug("expensive: %s", LazyMessage(lambda: calls.append(1)))
+    flush_logs()
+    assert calls == []
+
+
+def test_flush_logs_writes_queued_records():
+    logger.info("queued record %s", "marker-42")
+    flush_logs()
+    with open(LOG_FILE_PATH, encoding="utf-8") as f:
+        assert "queued record marker-42" in f.read()
+
+
+def test_json_formatter_outputs_structured_record():
+    record = logging.LogRecord(
+        "smartcity", logging.INFO, __file__, 1, "hello %s", ("world",), None, func="f"
+    )
+    payload = json.loads(_JsonFormatter().format(record))
+    assert payload["message"] == "hello world"
+    assert payload["level"] == "INFO"
+    assert payload["func"] == "f"
+
+
+def test_arguments_are_captured_at_call_time():
+    values = [1, 2]
+    logger.info("captured values %s", values)
+    values.append(3)  # the listener thread must not see this
+    flush_logs()
+    with open(LOG_FILE_PATH, encoding="utf-8") as f:
+        assert "captured values [1, 2]\n" in f.read()
+
+
+def test_concurrent_flushes():
+    threads = [threading.Thread(target=flush_logs, args=(5.0,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
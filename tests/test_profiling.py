@@ -0,0 +1,97 @@
+import json
+import os
+import pstats
+import time
+from unittest.mock import patch
+
+import pytest
+
+from smartcity import profiling
+from smartcity.profiling import Profiler, TimingHistogram, profiled, upload_profiles
+
+
+def busy(seconds: float) -> int:
+    end, n = time.perf_counter() + seconds, 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+@pytest.fixture
+def use_profiler():
+    def install(mode: str, interval: float = 0.001) -> Profiler:
+        instance = Profiler(mode, interval)
+        patcher = patch.object(profiling, "profiler", instance)
+        patcher.start()
+        installed.append(patcher)
+        return instance
+
+    installed = []
+    yield install
+    for patcher in installed:
+        patcher.stop()
+
+
+def test_histogram_buckets():
+    histogram = TimingHistogram()
+    for ms in (0.5, 3, 3, 40, 90_000):
+        histogram.record(ms / 1000)
+    summary = histogram.summary()
+    assert summary["calls"] == 5
+    assert summary["buckets"] == {"<=1ms": 1, "<=5ms": 2, "<=50ms": 1, ">60000ms": 1}
+    assert summary["p50_ms"] == 5
+    assert summary["max_ms"] == 90_000
+
+
+def test_disabled_hooks_call_through(use_profiler, tmp_path):
+    instance = use_profiler("")
+    assert profiled()(busy)(0) == 0
+    assert instance.timings == {}
+    assert instance.dump(str(tmp_path)) == []
+
+
+def test_cprofile_mode(use_profiler, tmp_path):
+    instance = use_profiler("cprofile")
+    inner = profiled("inner")(busy)
+
+    @profiled("outer")
+    def outer():
+        return inner(0.01) + inner(0.01)
+
+    outer()
+    assert instance.timing_summary()["inner"]["calls"] == 2
+    assert instance.timing_summary()["outer"]["calls"] == 1
+    assert list(instance.stats) == ["outer"]  # nested hooks belong to the outermost profile
+
+    paths = instance.dump(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["outer.prof", "timings.json"]
+    functions = {func for _, _, func in pstats.Stats(paths[1]).stats}
+    assert "busy" in functions
+    with open(paths[0]) as f:
+        assert json.load(f)["mode"] == "cprofile"
+
+
+def test_sampling_mode(use_profiler, tmp_path):
+    instance = use_profiler("sampling", interval=0.001)
+    profiled("hot")(busy)(0.2)
+
+    paths = instance.dump(str(tmp_path))
+    assert os.path.basename(paths[1]) == "hot.folded"
+    with open(paths[1]) as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("busy (test_profiling.py" in line for line in lines)
+
+
+@patch("smartcity.profiling.create_client")
+def test_upload_profiles(mock_create_client, use_profiler, tmp_path):
+    use_profiler("timing")
+    profiled("hot")(busy)(0)
+
+    remote = upload_profiles(directory=str(tmp_path))
+    assert len(remote) == 1
+    assert remote[0].startswith("smartcity-logs/profiles/")
+    assert remote[0].endswith("/timings.json")
+    bucket = mock_create_client.return_value.storage.from_
+    bucket.assert_called_with("data")
+    assert bucket.return_value.upload.call_args.kwargs["path"] == remote[0]
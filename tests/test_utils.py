@@ -0,0 +1,39 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartcity.utils import slice_time_range, sort_by_time
+
+
+@pytest.fixture
+def measurements():
+    rng = np.random.default_rng(1)
+    times = pd.Timestamp("2025-10-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 10 * 24, 200), unit="h"
+    )
+    return pd.DataFrame({"datetime_from": times, "value": rng.uniform(0, 1, 200)})
+
+
+def test_sort_by_time_builds_monotonic_index(measurements):
+    data = sort_by_time(measurements, "datetime_from")
+    assert isinstance(data.index, pd.DatetimeIndex)
+    assert data.index.is_monotonic_increasing
+    assert "datetime_from" in data.columns
+
+
+def test_slice_time_range_matches_mask(measurements):
+    data = sort_by_time(measurements, "datetime_from")
+    start, end = date(2025, 10, 3), date(2025, 10, 6)
+
+    result = slice_time_range(data, start, end)
+
+    day = data["datetime_from"].dt.date
+    expected = data[(day >= start) & (day < end)]
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_slice_time_range_requires_datetime_index(measurements):
+    with pytest.raises(TypeError):
+        slice_time_range(measurements, "2025-10-01", "2025-10-02")
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from smartcity.weather.correlation import (
+    CorrelationEngine,
+    align_measurements_weather,
+    pearson,
+)
+
+HOURS = pd.date_range("2025-01-01", periods=24 * 6, freq="h", tz="UTC")
+
+
+@pytest.fixture
+def locations():
+    return pd.DataFrame({"id": [1, 2], "sensor_id": [11, 21]})
+
+
+@pytest.fixture
+def weather():
+    rng = np.random.default_rng(0)
+    rows = []
+    for location_id in (1, 2):
+        temperature = rng.normal(10, 3, len(HOURS))
+        wind = rng.normal(5, 2, len(HOURS))
+        for variable, values in (("temperature_2m", temperature), ("wind_speed_10m", wind)):
+            rows.append(
+                pd.DataFrame(
+                    {
+                        "location_id": location_id,
+                        "parameter_name": variable,
+                        "datetime_from": HOURS,
+                        "value": values,
+                    }
+                )
+            )
+    return pd.concat(rows, ignore_index=True)
+
+
+@pytest.fixture
+def measurements(weather):
+    # NO2 follows the temperature two hours earlier (10 minutes off the hour)
+    temperature = weather[weather["parameter_name"] == "temperature_2m"]
+    return pd.DataFrame(
+        {
+            "sensor_id": temperature["location_id"].map({1: 11, 2: 21}).to_numpy(),
+            "parameter_name": "no2",
+            "datetime_from": (
+                temperature["datetime_from"] + pd.Timedelta(hours=2, minutes=10)
+            ).map(lambda ts: ts.isoformat()).to_numpy(),
+            "value": 3.0 * temperature["value"].to_numpy() + 1.0,
+        }
+    )
+
+
+def test_asof_alignment_tolerance(measurements, weather, locations):
+    aligned = align_measurements_weather(measurements, weather, locations, lag=2)
+    assert aligned["temperature_2m"].notna().all()
+    np.testing.assert_allclose(aligned["value"], 3.0 * aligned["temperature_2m"] + 1.0)
+
+    strict = align_measurements_weather(
+        measurements, weather, locations, lag=2, tolerance=pd.Timedelta(minutes=5)
+    )
+    assert strict["temperature_2m"].isna().all()
+
+
+def test_pearson_matches_numpy():
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(size=100), rng.normal(size=100)
+    stats = pd.DataFrame(
+        {"n": [100], "sx": [x.sum()], "sy": [y.sum()], "sxx": [x @ x], "syy": [y @ y], "sxy": [x @ y]}
+    )
+    assert pearson(stats)[0] == pytest.approx(np.corrcoef(x, y)[0, 1])
+    assert np.isnan(pearson(stats, min_pairs=101)[0])
+
+
+def test_lag_matrix_finds_the_lag(measurements, weather, locations):
+    engine = CorrelationEngine(lags=[0, 1, 2, 3])
+    engine.update(measurements, weather, locations)
+
+    matrix = engine.lag_matrix("no2", window_days=30)
+    assert list(matrix.columns) == [0, 1, 2, 3]
+    assert matrix.loc["temperature_2m", 2] == pytest.approx(1.0)
+    assert abs(matrix.loc["temperature_2m", 0]) < 0.5
+    assert abs(matrix.loc["wind_speed_10m", 2]) < 0.5
+
+    per_sensor = engine.correlations(window_days=30)
+    lag2 = per_sensor[(per_sensor["lag"] == 2) & (per_sensor["variable"] == "temperature_2m")]
+    assert lag2["sensor_id"].tolist() == [11, 21]
+    np.testing.assert_allclose(lag2["r"], 1.0)
+
+
+def test_incremental_updates_match_full_recompute(measurements, weather, locations):
+    full = CorrelationEngine(lags=[0, 2])
+    full.update(measurements, weather, locations)
+
+    incremental = CorrelationEngine(lags=[0, 2])
+    days = pd.to_datetime(measurements["datetime_from"]).dt.floor("D")
+    for day in days.unique():
+        incremental.update(measurements[days == day], weather, locations)
+    # Re-feeding a day replaces its buckets instead of double counting
+    revision, last_day = incremental.revision, incremental.last_day
+    incremental.update(measurements[days == days.max()], weather, locations)
+    assert incremental.last_day == last_day
+    assert incremental.revision == revision + 1  # same last day, new cache key
+
+    pd.testing.assert_frame_equal(
+        full.correlations(window_days=30), incremental.correlations(window_days=30)
+    )
+
+    rolling = incremental.rolling_correlation("no2", "temperature_2m", lag=2, window_days=2)
+    assert len(rolling) == days.nunique()
+    np.testing.assert_allclose(rolling.dropna(), 1.0)
+
+
+def test_save_and_load(measurements, weather, locations, tmp_path):
+    path = str(tmp_path / "correlation.pkl")
+    engine = CorrelationEngine(lags=[0, 2])
+    engine.update(measurements, weather, locations)
+    engine.save(path)
+
+    loaded = CorrelationEngine.load(path, lags=[0, 2])
+    assert loaded.last_day == engine.last_day
+    assert len(loaded.stats) == len(engine.stats)
+    assert CorrelationEngine.load(path).stats.empty  # other lags: not reused
+    assert CorrelationEngine.load(str(tmp_path / "missing.pkl")).stats.empty
@@ -0,0 +1,143 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from smartcity.weather.open_meteo import (
+    UNIQUE_WEATHER,
+    delete_old_weather,
+    fetch_weather,
+    upsert_weather,
+    weather_points,
+)
+
+START = 1735689600  # 2025-01-01T00:00:00Z
+
+
+class _OpenMeteoStandIn(BaseHTTPRequestHandler):
+    """Answers like Open-Meteo: one object per requested coordinate."""
+
+    requests = []
+    fail_first = 0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        type(self).requests.append(query)
+        if type(self).fail_first > 0:
+            type(self).fail_first -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        latitudes = [float(v) for v in query["latitude"][0].split(",")]
+        variables = query["hourly"][0].split(",")
+        payload = [
+            {
+                "latitude": lat,
+                "hourly_units": {"time": "unixtime", **{v: "°C" for v in variables}},
+                "hourly": {
+                    "time": [START + 3600 * h for h in range(4)],
+                    **{v: [lat, lat + 1, None, lat + 3] for v in variables},
+                },
+            }
+            for lat in latitudes
+        ]
+        body = json.dumps(payload if len(payload) > 1 else payload[0]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def open_meteo():
+    _OpenMeteoStandIn.requests = []
+    _OpenMeteoStandIn.fail_first = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OpenMeteoStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/forecast", _OpenMeteoStandIn
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def locations():
+    # Locations 1 and 2 share a rounded point; one row per sensor
+    return pd.DataFrame(
+        {
+            "id": [1, 1, 2, 3, 4],
+            "sensor_id": [11, 12, 21, 31, 41],
+            "latitude": [45.771, 45.771, 45.7712, 45.79, None],
+            "longitude": [3.081, 3.081, 3.0811, 3.11, None],
+        }
+    )
+
+
+def test_weather_points(locations):
+    points = weather_points(locations)
+    assert points["location_id"].tolist() == [1, 2, 3]
+    assert points["point_latitude"].tolist() == [45.77, 45.77, 45.79]
+
+
+def test_fetch_weather_batches_coordinates(open_meteo, locations):
+    url, server = open_meteo
+    now = pd.Timestamp(START + 3600, unit="s", tz="UTC")
+
+    data = fetch_weather(
+        locations, variables=["temperature_2m", "wind_speed_10m"], batch_size=2, url=url, now=now
+    )
+
+    # Two unique points in one request, not one call per station
+    assert len(server.requests) == 1
+    assert server.requests[0]["latitude"] == ["45.77,45.79"]
+    assert server.requests[0]["timeformat"] == ["unixtime"]
+
+    # 3 locations × 2 variables × 3 non-null hours
+    assert len(data) == 18
+    station = data[(data["location_id"] == 3) & (data["parameter_name"] == "temperature_2m")]
+    assert station["value"].tolist() == [45.79, 46.79, 48.79]
+    assert station["datetime_from"].iat[0] == "2025-01-01T00:00:00+00:00"
+    assert station["is_forecast"].tolist() == [False, False, True]
+    assert (data["parameter_units"] == "°C").all()
+
+
+def test_fetch_weather_single_point_and_retries(open_meteo, locations):
+    url, server = open_meteo
+    server.fail_first = 1
+
+    with patch("smartcity.weather.open_meteo.time.sleep") as mock_sleep:
+        data = fetch_weather(locations, variables=["precipitation"], batch_size=1, url=url)
+
+    assert mock_sleep.call_count == 1
+    assert len(server.requests) == 3  # throttled + one request per point
+    assert sorted(data["location_id"].unique()) == [1, 2, 3]
+
+
+@patch("smartcity.weather.open_meteo.upsert_measurements")
+def test_upsert_weather_uses_measurement_upsert(mock_upsert):
+    df = pd.DataFrame({"location_id": [1]})
+    upsert_weather(df, chunk_size=500)
+
+    kwargs = mock_upsert.call_args.kwargs
+    assert kwargs["table_name"] == "weather_hourly"
+    assert kwargs["on_conflict"] == UNIQUE_WEATHER
+    assert kwargs["chunk_size"] == 500
+
+
+@patch("smartcity.database.create_client")
+def test_delete_old_weather_calls_its_function(mock_create_client):
+    mock_create_client.return_value.rpc.return_value.execute.return_value.data = 12
+    with patch("smartcity.database.SUPABASE_URL", "http://x"), patch(
+        "smartcity.database.SUPABASE_KEY", "k"
+    ):
+        delete_old_weather(days=61)
+    mock_create_client.return_value.rpc.assert_called_once_with("delete_old_weather", {"days": 61})